@@ -0,0 +1,75 @@
+"""Import-time benchmark for the CLI.
+
+Runs the CLI with '--help' under '-X importtime' several times, reports
+the median cumulative import time of src.main and fails if it exceeds the
+budget or if any heavy module (plotting, NumPy, the HTTP client) is imported
+on the startup path.
+
+Usage:
+    python scripts/check_startup.py [--runs 5] [--budget-ms 150]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that must only be imported once a run actually needs them
+HEAVY_MODULES = ['numpy', 'matplotlib', 'requests', 'PIL']
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once():
+    """Return (cumulative microseconds for src.main, set of imported modules)."""
+    # Import src.main as a module (rather than running it with -m) so that its
+    # cumulative import time shows up under its own name
+    code = "import sys; sys.argv = ['src.main', '--help']; import src.main; src.main.main()"
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                               cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    modules = set()
+    main_time = None
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        modules.add(name)
+        if name == 'src.main':
+            main_time = int(cumulative)
+    return main_time, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Guard against CLI startup regressions')
+    parser.add_argument('--runs', type=int, default=5, help='Number of measured runs')
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help='Maximum median import time of src.main in milliseconds')
+    args = parser.parse_args()
+
+    times = []
+    imported = set()
+    for _ in range(args.runs):
+        main_time, modules = measure_once()
+        times.append(main_time / 1000)
+        imported |= modules
+
+    median_ms = statistics.median(times)
+    print(f"src.main import time: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(times):.1f} ms, max {max(times):.1f} ms)")
+
+    failures = []
+    heavy = sorted(name for name in imported if name.split('.')[0] in HEAVY_MODULES)
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy[:10])}")
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import hashlib
+import itertools
+import numpy as np
+
+# The eight symmetries of a square grid (rotations and reflections)
+GRID_SYMMETRIES = [
+    lambda g: g,
+    lambda g: np.rot90(g, 1, axes=(-2, -1)),
+    lambda g: np.rot90(g, 2, axes=(-2, -1)),
+    lambda g: np.rot90(g, 3, axes=(-2, -1)),
+    lambda g: g[..., ::-1, :],
+    lambda g: g[..., :, ::-1],
+    lambda g: np.swapaxes(g, -2, -1),
+    lambda g: np.rot90(g, 2, axes=(-2, -1)).swapaxes(-2, -1)
+]
+
+
+def digest(data):
+    """Return the index key of a canonical form."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _relabel_map(symbols, size, keep=(0,)):
+    """Map symbols to labels in order of first appearance.
+
+    Symbols in keep (such as the background color) map to themselves; symbols
+    that do not occur get the remaining labels in their natural order, so the
+    map also covers answers that use new symbols.
+    """
+    mapping = np.full(size, -1, dtype=np.int64)
+    for symbol in keep:
+        mapping[symbol] = symbol
+    _, first = np.unique(symbols, return_index=True)
+    order = symbols[np.sort(first)]
+    order = [s for s in order.tolist() if mapping[s] < 0]
+    unseen = [s for s in range(size) if mapping[s] < 0 and s not in order]
+    free = [label for label in range(size) if label not in keep]
+    for symbol, label in zip(order + unseen, free):
+        mapping[symbol] = label
+    return mapping
+
+
+def canonical_grid_task(pairs, test_input, num_colors=10):
+    """Canonicalize a grid transformation task.
+
+    Two tasks are equivalent if one becomes the other by applying the same
+    rotation or reflection to every grid, permuting the non-background colors
+    and reordering the example pairs. The canonical form is the smallest
+    serialization over all of these.
+
+    Args:
+        pairs: uint8 array of shape (num_pairs, 2, size, size) of example
+               input/output grids
+        test_input: uint8 array of shape (size, size)
+        num_colors: Number of colors, including the background 0
+
+    Returns:
+        tuple: (key, canonical_answer) where key indexes the task and
+               canonical_answer(grid) returns the key of an answer grid under
+               the same symmetry and color map
+    """
+    best = None
+    for order in itertools.permutations(range(len(pairs))):
+        stacked = np.concatenate([pairs[list(order)].reshape((-1,) + test_input.shape), test_input[None]])
+        for symmetry in GRID_SYMMETRIES:
+            grids = symmetry(stacked)
+            mapping = _relabel_map(grids.ravel(), num_colors)
+            serialized = mapping[grids].astype(np.uint8).tobytes()
+            if best is None or serialized < best[0]:
+                best = (serialized, symmetry, mapping)
+
+    serialized, symmetry, mapping = best
+
+    def canonical_answer(grid):
+        return digest(mapping[symmetry(np.asarray(grid))].astype(np.uint8).tobytes())
+
+    return digest(serialized), canonical_answer
+
+
+def canonical_rule_task(variables, examples, query):
+    """Canonicalize a boolean rule task.
+
+    Two tasks are equivalent if they differ only in the names of the
+    variables and the order of the examples. The label of the query does not
+    depend on either, so answers need no mapping.
+
+    Args:
+        variables: Variable names
+        examples: List of (assignment, label) with assignment a tuple of
+                  booleans, one per variable
+        query: Assignment to classify
+
+    Returns:
+        bytes: The key of the task
+    """
+    best = None
+    for permutation in itertools.permutations(range(len(variables))):
+        permuted = sorted((tuple(assignment[i] for i in permutation), label) for assignment, label in examples)
+        serialized = repr((len(variables), permuted, tuple(query[i] for i in permutation))).encode('ascii')
+        if best is None or serialized < best:
+            best = serialized
+    return digest(best)
+
+
+def canonical_string_task(examples, query):
+    """Canonicalize a string rewriting task.
+
+    Two tasks are equivalent if one becomes the other by consistently renaming
+    letters and reordering the examples. Letters are renamed in order of first
+    appearance.
+
+    Args:
+        examples: List of (input, output) strings
+        query: Input string to rewrite
+
+    Returns:
+        tuple: (key, canonical_answer) where canonical_answer(text) returns
+               the key of an answer under the same renaming
+    """
+    best = None
+    for order in itertools.permutations(examples):
+        text = ''.join(a + b for a, b in order) + query
+        mapping = {}
+        for letter in text:
+            mapping.setdefault(letter, chr(ord('a') + len(mapping)))
+        serialized = '|'.join(''.join(mapping[c] for c in a) + '>' + ''.join(mapping[c] for c in b)
+                              for a, b in order) + '|' + ''.join(mapping[c] for c in query)
+        if best is None or serialized < best[0]:
+            best = (serialized, mapping)
+
+    serialized, mapping = best
+
+    def canonical_answer(answer):
+        # Letters the task never shows cannot be renamed consistently; keep
+        # them distinct from renamed ones
+        return digest(''.join(mapping.get(c, '#' + c) for c in answer).encode('utf-8'))
+
+    return digest(serialized.encode('utf-8')), canonical_answer
+
+
+class ConceptIndex:
+    """Hash index over the canonical forms of concept tasks.
+
+    Maps the key of each canonical task to the key of its canonical answer,
+    so duplicates are rejected with one dictionary lookup during generation
+    and responses are verified by comparing answer keys.
+    """
+
+    def __init__(self):
+        self._answers = {}
+        self.duplicates = 0
+
+    def add(self, task_key, answer_key):
+        """Add a task unless an equivalent one is already indexed.
+
+        Returns:
+            bool: True if the task was added, False if it is a duplicate
+        """
+        if task_key in self._answers:
+            self.duplicates += 1
+            return False
+        self._answers[task_key] = answer_key
+        return True
+
+    def verify(self, task_key, answer_key):
+        """Check an answer against the indexed answer of a task.
+
+        Returns:
+            bool: True if the answer is equivalent to the expected answer
+        """
+        if task_key not in self._answers:
+            raise KeyError("Task is not in the index")
+        return self._answers[task_key] == answer_key
+
+    def __contains__(self, task_key):
+        return task_key in self._answers
+
+    def __len__(self):
+        return len(self._answers)
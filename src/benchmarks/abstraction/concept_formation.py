@@ -1,3 +1,30 @@
+import os
+import json
+import re
+import string
+from ...domains.vision.grids import GRID_SIZES, GridGenerator, parse_grid, render_grid
+from ...utils.adaptive import adaptive_map, apply_estimates
+from ...utils.dispatch import TaskDispatcher, split_errors, timed_solve
+from ...utils.task_stream import select_tasks, task_rng
+from .canonical import (ConceptIndex, canonical_grid_task, canonical_rule_task, canonical_string_task,
+                        digest)
+
+# Logical concepts: number of variables and labeled examples per difficulty
+RULE_VARIABLES = {'easy': 2, 'medium': 3, 'hard': 4}
+RULE_EXAMPLES = {'easy': 3, 'medium': 6, 'hard': 10}
+
+# Linguistic concepts: string length and alphabet size per difficulty; hard
+# tasks compose two rewrite rules
+STRING_LENGTHS = {'easy': 3, 'medium': 5, 'hard': 6}
+STRING_ALPHABETS = {'easy': 3, 'medium': 4, 'hard': 5}
+STRING_RULES = {
+    'reverse': lambda s: s[::-1],
+    'rotate': lambda s: s[1:] + s[:1],
+    'double': lambda s: ''.join(c + c for c in s),
+    'swap_pairs': lambda s: ''.join(s[i + 1] + s[i] if i + 1 < len(s) else s[i] for i in range(0, len(s), 2)),
+    'mirror': lambda s: s + s[::-1]
+}
+
 class ConceptFormationBenchmark:
     """Benchmark for testing an agent's ability to form abstract concepts.
     
@@ -5,26 +32,164 @@ class ConceptFormationBenchmark:
     generalizable concepts from examples.
     """
     
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, **config):
         self.config = {}
         if config_path and os.path.exists(config_path):
             with open(config_path, 'r') as f:
                 self.config = json.load(f)
+        self.config.update(config)
         
         # Default configuration
         self.config.setdefault('concept_types', ['visual', 'logical', 'linguistic'])
         self.config.setdefault('difficulty_levels', ['easy', 'medium', 'hard'])
+        self.config.setdefault('tasks_per_type', 10)  # per concept type and difficulty
+        # Candidates drawn per task before giving up on finding new concepts
+        self.config.setdefault('max_attempts_per_task', 20)
         
-        self.tasks = self._generate_tasks()
+        # Adaptive evaluation: run a stratified random sample of the tasks and
+        # stop each stratum once its score is known to within +/- tolerance
+        self.config.setdefault('adaptive', False)
+        self.config.setdefault('tolerance', 0.05)
+        self.config.setdefault('confidence', 0.95)
+        self.config.setdefault('min_samples', 10)  # per stratum
+        
+        # Task streaming: tasks are generated lazily from the seed, and a run can
+        # be limited or split into shards
+        self.config.setdefault('seed', 0)
+        self.config.setdefault('limit', None)
+        self.config.setdefault('shard', None)  # (index, count)
+    
+    def iter_tasks(self, start=0, index=None):
+        """Yield the tasks of this run on demand, honoring the limit and shard settings.
+        
+        Args:
+            start: Number of tasks of this run to skip, counted after the shard
+                   and limit are applied
+            index: Optional ConceptIndex the generated concepts are added to;
+                   every call deduplicates against its own index, so runs
+                   sharing this benchmark see the same tasks
+        """
+        return select_tasks(self._generate_tasks(ConceptIndex() if index is None else index), start=start,
+                            limit=self.config['limit'], shard=self.config['shard'])
+    
+    def _generate_tasks(self, index):
+        """Generate concept formation tasks of varying types and difficulties.
+        
+        Every candidate is reduced to a canonical form that is independent of
+        grid symmetries, color permutations, variable and letter names and
+        example order, and is only kept if no equivalent task was generated
+        before, so the agent is never asked to solve the same concept twice.
+        
+        Args:
+            index: ConceptIndex of the concepts generated so far
+        """
+        generators = {
+            'visual': self._visual_candidates,
+            'logical': self._logical_candidates,
+            'linguistic': self._linguistic_candidates
+        }
+        count = self.config['tasks_per_type']
+        for concept_type in self.config['concept_types']:
+            for difficulty in self.config['difficulty_levels']:
+                candidates = generators[concept_type](difficulty)
+                accepted = 0
+                for _ in range(count * self.config['max_attempts_per_task']):
+                    task = next(candidates)
+                    if not index.add(task['task_key'], task['answer_key']):
+                        continue
+                    task.update(id=f"{concept_type}-{difficulty}-{accepted}", concept_type=concept_type,
+                                difficulty=difficulty)
+                    yield task
+                    accepted += 1
+                    if accepted == count:
+                        break
+    
+    def _visual_candidates(self, difficulty):
+        """Yield grid transformation concepts: two examples and a test grid.
+        
+        The puzzles come from a stream of their own, so a suite run does not
+        send the visual reasoning benchmark's analogies a second time.
+        """
+        generator = GridGenerator(seed=task_rng(self.config['seed'], 'abstraction-visual').getrandbits(63))
+        size = GRID_SIZES[difficulty]
+        start = 0
+        while True:
+            grids, _ = generator.generate('visual_analogy', difficulty, start, generator.chunk_size)
+            start += generator.chunk_size
+            for puzzle in grids:
+                task_key, canonical_answer = canonical_grid_task(puzzle[:4].reshape(2, 2, size, size), puzzle[4])
+                examples = "\n\n".join(f"Example {i + 1} input:\n{render_grid(puzzle[2 * i])}\n\n"
+                                        f"Example {i + 1} output:\n{render_grid(puzzle[2 * i + 1])}"
+                                        for i in range(2))
+                yield {
+                    'description': (f"Each example shows a grid of color numbers (0 is background) and the "
+                                    f"grid it turns into under one rule.\n\n{examples}\n\n"
+                                    f"Test input:\n{render_grid(puzzle[4])}\n\n"
+                                    f"Respond with the output grid only, in the same format."),
+                    'expected_solution': render_grid(puzzle[5]),
+                    'size': size,
+                    'task_key': task_key,
+                    'answer_key': canonical_answer(puzzle[5]),
+                    'canonical_answer': canonical_answer
+                }
     
-    def _generate_tasks(self):
-        """Generate concept formation tasks of varying types and difficulties."""
-        tasks = []
-        # Implementation would create tasks requiring abstraction and generalization
-        # Similar to ARC (Abstraction and Reasoning Corpus) challenges
-        return tasks
+    def _logical_candidates(self, difficulty):
+        """Yield boolean rule concepts: labeled assignments and a query."""
+        num_variables = RULE_VARIABLES[difficulty]
+        attempt = 0
+        while True:
+            rng = task_rng(self.config['seed'], f"logical-{difficulty}-{attempt}")
+            attempt += 1
+            variables = rng.sample('PQRSTUVW', num_variables)
+            rule = _random_rule(rng, num_variables, depth=num_variables - 1)
+            assignments = [tuple(bool(bits >> i & 1) for i in range(num_variables))
+                           for bits in rng.sample(range(2 ** num_variables),
+                                                  min(RULE_EXAMPLES[difficulty] + 1, 2 ** num_variables))]
+            examples = [(assignment, _evaluate_rule(rule, assignment)) for assignment in assignments[:-1]]
+            query = assignments[-1]
+            label = _evaluate_rule(rule, query)
+            
+            def show(assignment):
+                return ", ".join(f"{v}={'true' if value else 'false'}" for v, value in zip(variables, assignment))
+            lines = "\n".join(f"{show(a)} -> {'yes' if l else 'no'}" for a, l in examples)
+            yield {
+                'description': (f"Each line assigns truth values to {', '.join(variables)} and says whether "
+                                f"they satisfy a hidden rule.\n\n{lines}\n\n"
+                                f"Does {show(query)} satisfy the rule? Respond with yes or no only."),
+                'expected_solution': 'yes' if label else 'no',
+                'task_key': canonical_rule_task(variables, examples, query),
+                'answer_key': digest(b'yes' if label else b'no'),
+                'canonical_answer': lambda answer: digest(answer.encode('ascii'))
+            }
     
-    def run(self, agent_interface):
+    def _linguistic_candidates(self, difficulty):
+        """Yield string rewriting concepts: three examples and a query."""
+        length = STRING_LENGTHS[difficulty]
+        attempt = 0
+        while True:
+            rng = task_rng(self.config['seed'], f"linguistic-{difficulty}-{attempt}")
+            attempt += 1
+            rules = rng.sample(sorted(STRING_RULES), 2 if difficulty == 'hard' else 1)
+            alphabet = rng.sample(string.ascii_lowercase, STRING_ALPHABETS[difficulty])
+            words = [''.join(rng.choice(alphabet) for _ in range(length)) for _ in range(4)]
+            
+            def rewrite(word):
+                for rule in rules:
+                    word = STRING_RULES[rule](word)
+                return word
+            examples = [(word, rewrite(word)) for word in words[:3]]
+            task_key, canonical_answer = canonical_string_task(examples, words[3])
+            lines = "\n".join(f"{a} -> {b}" for a, b in examples)
+            yield {
+                'description': (f"Each line shows a word and how one rule rewrites it.\n\n{lines}\n\n"
+                                f"Apply the same rule to '{words[3]}'. Respond with the rewritten word only."),
+                'expected_solution': rewrite(words[3]),
+                'task_key': task_key,
+                'answer_key': canonical_answer(rewrite(words[3])),
+                'canonical_answer': canonical_answer
+            }
+    
+    def run(self, agent_interface, dispatcher=None):
         """Run the abstraction benchmark on the provided agent."""
         results = {
             'tasks': [],
@@ -32,7 +197,92 @@ class ConceptFormationBenchmark:
             'concept_type_scores': {concept_type: 0 for concept_type in self.config['concept_types']}
         }
         
-        # Implementation would present examples of a concept, then test if the agent
-        # can apply the concept to new instances
+        if dispatcher is None:
+            dispatcher = TaskDispatcher()
+        
+        # Benchmarks are shared by the runs of several models, so the index
+        # belongs to this run
+        index = ConceptIndex()
+        if self.config['adaptive']:
+            # The first pass over the task stream counts the strata and fills
+            # the index; later streams deduplicate against their own
+            indexes = iter([index])
+            results['tasks'], results['sampling'] = adaptive_map(
+                dispatcher, lambda task: self._evaluate_task(agent_interface, task),
+                lambda start: self.iter_tasks(start, index=next(indexes, None)), ('concept_type', 'difficulty'),
+                key=lambda task: f"concept:{task['id']}", prompt=lambda task: task['description'],
+                tolerance=self.config['tolerance'], confidence=self.config['confidence'],
+                min_samples=self.config['min_samples'])
+        else:
+            results['tasks'] = dispatcher.map(
+                lambda task: self._evaluate_task(agent_interface, task), self.iter_tasks(index=index),
+                key=lambda task: f"concept:{task['id']}", prompt=lambda task: task['description'])
+        # Tasks the agent could not answer are reported, not scored as wrong
+        results['tasks'], results['errors'] = split_errors(results['tasks'])
+        results['unique_concepts'] = len(index)
+        results['duplicates_rejected'] = index.duplicates
+        
+        # Average scores overall and per concept type
+        if results['tasks']:
+            results['overall_score'] = sum(t['score'] for t in results['tasks']) / len(results['tasks'])
+        for concept_type in results['concept_type_scores']:
+            matching = [t['score'] for t in results['tasks'] if t['concept_type'] == concept_type]
+            if matching:
+                results['concept_type_scores'][concept_type] = sum(matching) / len(matching)
+        
+        # Strata of an adaptive run were sampled at different rates
+        if 'sampling' in results:
+            apply_estimates(results, {'concept_type': 'concept_type_scores'})
         
-        return results
\ No newline at end of file
+        return results
+    
+    def _evaluate_task(self, agent_interface, task):
+        """Evaluate an agent on a single concept task."""
+        solution, solve_time = timed_solve(agent_interface, task['description'])
+        
+        # Answers are checked by mapping them into the task's canonical form
+        # and comparing them with the canonical expected answer
+        if task['concept_type'] == 'visual':
+            answer = parse_grid(solution, task['size'])
+        elif task['concept_type'] == 'logical':
+            answer = re.search(r"\b(yes|no)\b", solution.lower())
+            answer = answer.group(1) if answer else None
+        else:
+            words = re.findall(r"[a-z]+", solution.lower())
+            answer = words[-1] if words else None
+        score = 0.0
+        if answer is not None and task['canonical_answer'](answer) == task['answer_key']:
+            score = 1.0
+        
+        return {
+            'task_id': task['id'],
+            'concept_type': task['concept_type'],
+            'difficulty': task['difficulty'],
+            'score': score,
+            'time': solve_time,
+            'solution': solution
+        }
+
+
+def _random_rule(rng, num_variables, depth):
+    """Draw a random boolean formula over variable indices."""
+    if depth == 0:
+        rule = ('var', rng.randrange(num_variables))
+    else:
+        rule = (rng.choice(['and', 'or', 'xor']), _random_rule(rng, num_variables, depth - 1),
+                ('var', rng.randrange(num_variables)))
+    return ('not', rule) if rng.random() < 0.2 else rule
+
+
+def _evaluate_rule(rule, assignment):
+    op = rule[0]
+    if op == 'var':
+        return assignment[rule[1]]
+    if op == 'not':
+        return not _evaluate_rule(rule[1], assignment)
+    left, right = _evaluate_rule(rule[1], assignment), _evaluate_rule(rule[2], assignment)
+    if op == 'and':
+        return left and right
+    if op == 'or':
+        return left or right
+    return left != right
@@ -1,3 +1,43 @@
+import os
+import json
+import itertools
+import re
+from ...utils.dispatch import TaskDispatcher, timed_solve
+from ...utils.task_stream import select_tasks, task_rng
+
+# Objects whose codes an episode asks the agent to memorize
+ITEMS = ['anchor', 'basket', 'candle', 'drum', 'engine', 'feather', 'globe', 'hammer', 'island',
+         'jacket', 'kettle', 'ladder', 'magnet', 'needle', 'orchard', 'pillow', 'quilt', 'rocket',
+         'saddle', 'teapot', 'umbrella', 'violin', 'wagon', 'yacht', 'zipper']
+
+
+def interleave_episodes(num_episodes, delays):
+    """Schedule the study and recall turns of several episodes in one conversation.
+
+    Each episode has a study turn and one recall turn per delay, placed exactly
+    that many turns after the study turn. Episodes are placed one after another
+    at the earliest turn where all of their turns are free, so the turns of the
+    other episodes form each episode's delays. Turns no episode needs are left
+    as fillers.
+
+    Args:
+        num_episodes: Number of episodes
+        delays: Delays to test, in turns (1 means the next turn)
+
+    Returns:
+        list: One entry per turn: (episode, delay) with delay 0 for the study
+              turn, or None for a filler turn
+    """
+    turns = {}
+    for episode in range(num_episodes):
+        start = 0
+        while any(start + delay in turns for delay in [0] + list(delays)):
+            start += 1
+        for delay in [0] + list(delays):
+            turns[start + delay] = (episode, delay)
+    return [turns.get(turn) for turn in range(max(turns) + 1 if turns else 0)]
+
+
 class EpisodicMemoryBenchmark:
     """Benchmark for testing an agent's ability to recall past experiences.
     
@@ -5,32 +45,164 @@ class EpisodicMemoryBenchmark:
     interactions and use them in current tasks.
     """
     
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, **config):
         self.config = {}
         if config_path and os.path.exists(config_path):
             with open(config_path, 'r') as f:
                 self.config = json.load(f)
+        self.config.update(config)
         
         # Default configuration
         self.config.setdefault('memory_span', 10)  # Number of items to remember
         self.config.setdefault('delay_intervals', [1, 5, 10])  # Intervals to test recall
+        self.config.setdefault('episodes', 24)
+        
+        # Episodes interleaved in one conversation; their turns serve as each
+        # other's delays
+        self.config.setdefault('episodes_per_session', 8)
+        
+        # Task streaming: tasks are generated lazily from the seed, and a run can
+        # be limited or split into shards
+        self.config.setdefault('seed', 0)
+        self.config.setdefault('limit', None)
+        self.config.setdefault('shard', None)  # (index, count)
+    
+    def iter_tasks(self, start=0):
+        """Yield the tasks of this run on demand, honoring the limit and shard settings.
         
-        self.memory_tasks = self._generate_memory_tasks()
+        Args:
+            start: Number of tasks of this run to skip, counted after the shard
+                   and limit are applied
+        """
+        return select_tasks(self._generate_memory_tasks(), start=start, limit=self.config['limit'],
+                            shard=self.config['shard'])
     
     def _generate_memory_tasks(self):
-        """Generate tasks that test episodic memory at different intervals."""
-        tasks = []
-        # Implementation would create sequences of information followed by recall tests
-        return tasks
+        """Generate tasks that test episodic memory at different intervals.
+        
+        Each task is an episode: a list of items with codes to memorize, and
+        one item to recall after each delay.
+        """
+        span = min(self.config['memory_span'], len(ITEMS))
+        delays = self.config['delay_intervals']
+        for index in range(self.config['episodes']):
+            rng = task_rng(self.config['seed'], index)
+            items = rng.sample(ITEMS, span)
+            codes = {item: str(rng.randrange(1000, 10000)) for item in items}
+            # Recall a different item after each delay where possible, so an
+            # early recall does not rehearse a later one
+            probes = rng.sample(items, len(delays)) if len(delays) <= span else rng.choices(items, k=len(delays))
+            yield {
+                'id': f"episode-{index}",
+                'codes': codes,
+                'probes': dict(zip(delays, probes))
+            }
     
-    def run(self, agent_interface):
-        """Run the memory benchmark on the provided agent."""
+    def run(self, agent_interface, dispatcher=None):
+        """Run the memory benchmark on the provided agent.
+        
+        Episodes are grouped into sessions of episodes_per_session, and each
+        session is one conversation in which the episodes' turns are
+        interleaved (see interleave_episodes). Sessions run in parallel on the
+        dispatcher, except for agents without start_session, whose single
+        conversation can only hold one session at a time.
+        """
         results = {
             'tasks': [],
             'overall_score': 0,
-            'decay_rate': 0  # How quickly memory performance degrades over time
+            'decay_rate': 0,  # How quickly memory performance degrades over time
+            'delay_scores': {str(delay): 0 for delay in self.config['delay_intervals']},
+            'errors': []
         }
         
-        # Implementation would present information, then test recall after various delays
+        if dispatcher is None:
+            dispatcher = TaskDispatcher()
+        if not hasattr(agent_interface, 'start_session'):
+            # Run the sessions one after another, still checkpointing them
+            dispatcher = TaskDispatcher(journal=dispatcher.journal)
+        
+        tasks = self.iter_tasks()
+        sessions = iter(lambda: list(itertools.islice(tasks, self.config['episodes_per_session'])), [])
+        session_results = dispatcher.map(
+            lambda episodes: self._run_session(agent_interface, episodes), sessions,
+            key=lambda episodes: f"memory:{episodes[0]['id']}+{len(episodes)}")
+        
+        # A session the agent dropped out of is reported, not scored
+        results['errors'] = [session for session in session_results if 'error' in session]
+        session_results = [session for session in session_results if 'error' not in session]
+        for session in session_results:
+            results['tasks'].extend(session['probes'])
+        results['model_calls'] = sum(session['turns'] for session in session_results)
+        results['filler_turns'] = sum(session['filler_turns'] for session in session_results)
+        # Calls needed when every recall gets its own conversation with filler
+        # turns for the delay: study, delay - 1 fillers, recall
+        results['naive_model_calls'] = sum(t['delay'] + 1 for t in results['tasks'])
         
-        return results
\ No newline at end of file
+        if results['tasks']:
+            results['overall_score'] = sum(t['score'] for t in results['tasks']) / len(results['tasks'])
+        for delay in results['delay_scores']:
+            matching = [t['score'] for t in results['tasks'] if str(t['delay']) == delay]
+            if matching:
+                results['delay_scores'][delay] = sum(matching) / len(matching)
+        
+        # Decay rate: recall accuracy lost per turn of delay, the negative slope
+        # of a least-squares line through the accuracy at each delay
+        points = [(t['delay'], t['score']) for t in results['tasks']]
+        if len({delay for delay, _ in points}) > 1:
+            mean_delay = sum(delay for delay, _ in points) / len(points)
+            mean_score = sum(score for _, score in points) / len(points)
+            covariance = sum((delay - mean_delay) * (score - mean_score) for delay, score in points)
+            variance = sum((delay - mean_delay) ** 2 for delay, _ in points)
+            results['decay_rate'] = -covariance / variance or 0.0
+        
+        return results
+    
+    def _run_session(self, agent_interface, episodes):
+        """Run a group of episodes interleaved in one conversation.
+        
+        Agents that keep their own conversation state and only implement
+        solve are used as the session directly.
+        
+        Returns:
+            dict: 'probes' (one result per recall), 'turns' and 'filler_turns'
+        """
+        start_session = getattr(agent_interface, 'start_session', None)
+        session = start_session() if start_session else agent_interface
+        schedule = interleave_episodes(len(episodes), self.config['delay_intervals'])
+        probes = []
+        for turn, slot in enumerate(schedule):
+            if slot is None:
+                # Nothing to study or recall on this turn; keep the delays exact
+                rng = task_rng(self.config['seed'], f"filler-{episodes[0]['id']}-{turn}")
+                a, b = rng.randrange(10, 100), rng.randrange(10, 100)
+                session.solve(f"Unrelated question: what is {a} + {b}? Respond with the number only.")
+                continue
+            
+            episode, delay = episodes[slot[0]], slot[1]
+            if delay == 0:
+                listing = "\n".join(f"{item}: {code}" for item, code in episode['codes'].items())
+                session.solve(f"Memorize this list for {episode['id']}. Each object has a code, and you "
+                              f"will be asked about them later.\n\n{listing}\n\nRespond with OK only.")
+                continue
+            
+            item = episode['probes'][delay]
+            expected = episode['codes'][item]
+            solution, solve_time = timed_solve(
+                session, f"From the list for {episode['id']}, what was the code of the {item}? "
+                         f"Respond with the code only.")
+            answer = re.search(r"\d+", solution)
+            probes.append({
+                'task_id': f"{episode['id']}-delay-{delay}",
+                'episode': episode['id'],
+                'delay': delay,
+                'time': solve_time,
+                'solution': solution,
+                'expected_solution': expected,
+                'score': 1.0 if answer and answer.group() == expected else 0.0
+            })
+        
+        return {
+            'probes': probes,
+            'turns': len(schedule),
+            'filler_turns': schedule.count(None)
+        }
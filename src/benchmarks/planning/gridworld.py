@@ -0,0 +1,208 @@
+import re
+from functools import lru_cache
+import numpy as np
+
+# Actions, in the order used by transition tables
+ACTIONS = ['up', 'right', 'down', 'left']
+_MOVES = np.array([(-1, 0), (0, 1), (1, 0), (0, -1)])
+
+# Rewards: every move costs STEP_COST, entering a trap costs TRAP_PENALTY
+# and reaching the goal, which ends the episode, earns GOAL_REWARD
+STEP_COST = 1.0
+TRAP_PENALTY = 5.0
+GOAL_REWARD = 50.0
+
+# Grid side length, wall density and number of traps per complexity level
+LAYOUTS = {
+    'simple': {'size': 5, 'wall_density': 0.1, 'traps': 0},
+    'complex': {'size': 8, 'wall_density': 0.2, 'traps': 4}
+}
+
+# Probability that a move in a stochastic environment slips to one of the
+# two perpendicular directions instead
+SLIP_PROBABILITY = 0.2
+
+
+class GridWorld:
+    """A gridworld stored as flat arrays, with a vectorized step function.
+
+    Cells are numbered row by row. The transition table holds the cell each
+    action leads to from every cell (moving into a wall or off the grid leaves
+    the agent in place), and entry_reward holds the reward for entering each
+    cell, so simulating any number of agents at once is a few array lookups.
+    """
+
+    def __init__(self, walls, start, goal, traps=(), slip=0.0):
+        """Initialize the environment.
+
+        Args:
+            walls: Boolean array of shape (size, size), True for walls
+            start: Index of the start cell
+            goal: Index of the goal cell
+            traps: Indices of trap cells
+            slip: Probability that a move goes in a perpendicular direction
+        """
+        self.size = walls.shape[0]
+        self.walls = walls
+        self.start = int(start)
+        self.goal = int(goal)
+        self.traps = [int(t) for t in traps]
+        self.slip = slip
+
+        rows, cols = np.divmod(np.arange(self.size * self.size), self.size)
+        self.transitions = np.empty((len(ACTIONS), self.size * self.size), dtype=np.int64)
+        for action, (dy, dx) in enumerate(_MOVES):
+            next_rows, next_cols = rows + dy, cols + dx
+            inside = (next_rows >= 0) & (next_rows < self.size) & (next_cols >= 0) & (next_cols < self.size)
+            target = np.where(inside, next_rows * self.size + next_cols, 0)
+            blocked = ~inside | walls.ravel()[target]
+            self.transitions[action] = np.where(blocked, np.arange(self.size * self.size), target)
+
+        self.entry_reward = np.full(self.size * self.size, -STEP_COST)
+        self.entry_reward[self.traps] -= TRAP_PENALTY
+        self.entry_reward[self.goal] += GOAL_REWARD
+
+    def step(self, states, actions, rng=None):
+        """Advance a batch of agents by one move.
+
+        Args:
+            states: Array of current cells
+            actions: Array of action indices, one per agent
+            rng: numpy Generator used to draw slips (required if slip > 0)
+
+        Returns:
+            tuple: (next_states, rewards, done) arrays, where done marks agents
+                   that reached the goal
+        """
+        states = np.asarray(states)
+        actions = np.asarray(actions)
+        if self.slip > 0:
+            u = rng.random(states.shape)
+            actions = np.where(u < self.slip / 2, (actions + 1) % 4,
+                               np.where(u < self.slip, (actions + 3) % 4, actions))
+        next_states = self.transitions[actions, states]
+        return next_states, self.entry_reward[next_states], next_states == self.goal
+
+    def shortest_path_length(self):
+        """Return the number of moves from start to goal ignoring slips (BFS), or None."""
+        distance = np.full(self.size * self.size, -1)
+        distance[self.start] = 0
+        frontier = np.array([self.start])
+        steps = 0
+        while len(frontier) and distance[self.goal] < 0:
+            steps += 1
+            neighbors = np.unique(self.transitions[:, frontier])
+            frontier = neighbors[distance[neighbors] < 0]
+            distance[frontier] = steps
+        return int(distance[self.goal]) if distance[self.goal] >= 0 else None
+
+    def optimal_values(self, horizon):
+        """Return the optimal expected return from every cell with a given number of moves left.
+
+        Finite-horizon value iteration over all cells at once. In a stochastic
+        environment this is the return of the best policy that may react to
+        where each slip leaves the agent.
+
+        Returns:
+            numpy.ndarray: Array of shape (horizon + 1, cells); row t holds the
+                           values with t moves left
+        """
+        num_cells = self.size * self.size
+        values = np.zeros((horizon + 1, num_cells))
+        outcomes = [(1 - self.slip, 0), (self.slip / 2, 1), (self.slip / 2, 3)] if self.slip else [(1.0, 0)]
+        not_goal = np.arange(num_cells) != self.goal
+        for t in range(1, horizon + 1):
+            # Reaching the goal ends the episode, so no value follows it
+            future = self.entry_reward + values[t - 1] * not_goal
+            q = np.zeros((len(ACTIONS), num_cells))
+            for action in range(len(ACTIONS)):
+                for probability, turn in outcomes:
+                    q[action] += probability * future[self.transitions[(action + turn) % 4]]
+            values[t] = np.where(not_goal, q.max(axis=0), 0.0)
+        return values
+
+    def render(self):
+        """Render the grid as text: # wall, . floor, S start, G goal, X trap."""
+        cells = np.where(self.walls.ravel(), '#', '.').astype('<U1')
+        cells[self.traps] = 'X'
+        cells[self.start] = 'S'
+        cells[self.goal] = 'G'
+        return '\n'.join(''.join(row) for row in cells.reshape(self.size, self.size))
+
+
+@lru_cache(maxsize=4096)
+def make_environment(env_seed, complexity, stochastic, horizon):
+    """Build the environment for a seed, redrawing until the goal is reachable within the horizon.
+
+    Args:
+        env_seed: Seed of the environment layout
+        complexity: One of LAYOUTS
+        stochastic: Whether moves can slip
+        horizon: Number of moves the agent may make
+
+    Returns:
+        GridWorld: The environment
+    """
+    layout = LAYOUTS[complexity]
+    size = layout['size']
+    rng = np.random.default_rng(env_seed)
+    while True:
+        walls = rng.random((size, size)) < layout['wall_density']
+        free = np.flatnonzero(~walls.ravel())
+        if len(free) < 2 + layout['traps']:
+            continue
+        start, goal, *traps = rng.choice(free, size=2 + layout['traps'], replace=False)
+        env = GridWorld(walls, start, goal, traps, slip=SLIP_PROBABILITY if stochastic else 0.0)
+        distance = env.shortest_path_length()
+        if distance is not None and 1 < distance <= horizon:
+            return env
+
+
+@lru_cache(maxsize=4096)
+def optimal_return(env_seed, complexity, stochastic, horizon):
+    """Return the optimal expected return of an environment, memoized per environment."""
+    env = make_environment(env_seed, complexity, stochastic, horizon)
+    return float(env.optimal_values(horizon)[horizon, env.start])
+
+
+def parse_plan(text):
+    """Read a sequence of moves (up/down/left/right or U/D/L/R) from a response.
+
+    Returns:
+        list: Action indices in order
+    """
+    aliases = {'u': 0, 'up': 0, 'north': 0, 'r': 1, 'right': 1, 'east': 1,
+               'd': 2, 'down': 2, 'south': 2, 'l': 3, 'left': 3, 'west': 3}
+    words = re.findall(r"[a-z]+", text.lower())
+    return [aliases[word] for word in words if word in aliases]
+
+
+def rollout_returns(env, plan, horizon, num_rollouts=1, rng=None):
+    """Execute an open-loop plan in many independent rollouts at once.
+
+    All rollouts advance together through one batched step per move of the
+    plan, so the cost grows with the plan length rather than with the number
+    of rollouts. Moves beyond the horizon are ignored, and a rollout stops
+    collecting reward once it reaches the goal.
+
+    Args:
+        env: The GridWorld
+        plan: List of action indices
+        horizon: Maximum number of moves executed
+        num_rollouts: Number of rollouts
+        rng: numpy Generator used to draw slips (required if env.slip > 0)
+
+    Returns:
+        numpy.ndarray: Total reward of each rollout
+    """
+    states = np.full(num_rollouts, env.start)
+    totals = np.zeros(num_rollouts)
+    active = np.ones(num_rollouts, dtype=bool)
+    for action in plan[:horizon]:
+        next_states, rewards, done = env.step(states, np.full(num_rollouts, action), rng)
+        totals += np.where(active, rewards, 0.0)
+        states = np.where(active, next_states, states)
+        active &= ~done
+        if not active.any():
+            break
+    return totals
@@ -1,3 +1,14 @@
+import os
+import json
+import math
+from statistics import NormalDist
+import numpy as np
+from ...utils.adaptive import adaptive_map, apply_estimates
+from ...utils.dispatch import TaskDispatcher, split_errors, timed_solve
+from ...utils.task_stream import select_tasks
+from .gridworld import (ACTIONS, GOAL_REWARD, LAYOUTS, SLIP_PROBABILITY, STEP_COST, TRAP_PENALTY,
+                        make_environment, optimal_return, parse_plan, rollout_returns)
+
 class SequentialDecisionBenchmark:
     """Benchmark for testing an agent's ability to plan and make sequential decisions.
     
@@ -5,26 +16,82 @@ class SequentialDecisionBenchmark:
     adapt them as new information becomes available.
     """
     
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, **config):
         self.config = {}
         if config_path and os.path.exists(config_path):
             with open(config_path, 'r') as f:
                 self.config = json.load(f)
+        self.config.update(config)
         
         # Default configuration
         self.config.setdefault('environment_types', ['deterministic', 'stochastic'])
         self.config.setdefault('horizon_lengths', [5, 10, 20])  # Number of steps to plan ahead
         self.config.setdefault('complexity_levels', ['simple', 'complex'])
+        self.config.setdefault('tasks_per_setting', 3)  # per environment type, horizon and complexity
         
-        self.tasks = self._generate_tasks()
+        # Plans for stochastic environments are scored by their mean return
+        # over this many simulated rollouts, reported with a confidence interval
+        self.config.setdefault('rollouts', 1000)
+        self.config.setdefault('confidence', 0.95)
+        
+        # Adaptive evaluation: run a stratified random sample of the tasks and
+        # stop each stratum once its score is known to within +/- tolerance
+        self.config.setdefault('adaptive', False)
+        self.config.setdefault('tolerance', 0.05)
+        self.config.setdefault('min_samples', 10)  # per stratum
+        
+        # Task streaming: tasks are generated lazily from the seed, and a run can
+        # be limited or split into shards
+        self.config.setdefault('seed', 0)
+        self.config.setdefault('limit', None)
+        self.config.setdefault('shard', None)  # (index, count)
+    
+    def iter_tasks(self, start=0):
+        """Yield the tasks of this run on demand, honoring the limit and shard settings.
+        
+        Args:
+            start: Number of tasks of this run to skip, counted after the shard
+                   and limit are applied
+        """
+        return select_tasks(self._generate_tasks(), start=start, limit=self.config['limit'],
+                            shard=self.config['shard'])
     
     def _generate_tasks(self):
-        """Generate planning tasks with different environments and horizons."""
-        tasks = []
-        # Implementation would create planning problems requiring multi-step reasoning
-        return tasks
+        """Generate planning tasks with different environments and horizons.
+        
+        Each task is a gridworld built from its own seed; the agent writes a
+        plan of moves, which is scored by simulating it in the environment.
+        """
+        for env_index, env_type in enumerate(self.config['environment_types']):
+            for horizon in self.config['horizon_lengths']:
+                for complexity in self.config['complexity_levels']:
+                    for index in range(self.config['tasks_per_setting']):
+                        env_seed = (self.config['seed'], env_index, horizon,
+                                    list(LAYOUTS).index(complexity), index)
+                        yield self._make_task(env_type, horizon, complexity, index, env_seed)
+    
+    def _make_task(self, env_type, horizon, complexity, index, env_seed):
+        """Build the prompt of one planning problem."""
+        env = make_environment(env_seed, complexity, env_type == 'stochastic', horizon)
+        rules = (f"Each move costs {STEP_COST:g} point. Entering a trap (X) costs {TRAP_PENALTY:g} more "
+                 f"points. Reaching the goal (G) earns {GOAL_REWARD:g} points and ends the episode. "
+                 f"Moving into a wall (#) or off the grid leaves you where you are.")
+        if env_type == 'stochastic':
+            rules += (f" Moves are unreliable: with probability {SLIP_PROBABILITY:g} a move goes in one "
+                      f"of the two perpendicular directions instead.")
+        return {
+            'id': f"{env_type}-{horizon}-{complexity}-{index}",
+            'environment_type': env_type,
+            'horizon': horizon,
+            'complexity': complexity,
+            'env_seed': env_seed,
+            'description': (f"You are at S in the grid below and want to collect as many points as "
+                            f"possible. {rules}\n\n{env.render()}\n\n"
+                            f"Write a plan of at most {horizon} moves, each one of "
+                            f"{', '.join(ACTIONS)}, separated by spaces. Respond with the plan only.")
+        }
     
-    def run(self, agent_interface):
+    def run(self, agent_interface, dispatcher=None):
         """Run the planning benchmark on the provided agent."""
         results = {
             'tasks': [],
@@ -33,6 +100,74 @@ class SequentialDecisionBenchmark:
             'horizon_scores': {str(horizon): 0 for horizon in self.config['horizon_lengths']}
         }
         
-        # Implementation would present planning problems and evaluate solutions
+        if dispatcher is None:
+            dispatcher = TaskDispatcher()
         
-        return results
\ No newline at end of file
+        if self.config['adaptive']:
+            results['tasks'], results['sampling'] = adaptive_map(
+                dispatcher, lambda task: self._evaluate_task(agent_interface, task), self.iter_tasks,
+                ('environment_type', 'horizon', 'complexity'), key=lambda task: f"planning:{task['id']}",
+                prompt=lambda task: task['description'], tolerance=self.config['tolerance'],
+                confidence=self.config['confidence'], min_samples=self.config['min_samples'])
+        else:
+            results['tasks'] = dispatcher.map(
+                lambda task: self._evaluate_task(agent_interface, task), self.iter_tasks(),
+                key=lambda task: f"planning:{task['id']}", prompt=lambda task: task['description'])
+        # Tasks the agent could not answer are reported, not scored as wrong
+        results['tasks'], results['errors'] = split_errors(results['tasks'])
+        
+        # Average scores overall and per environment type and horizon, and the
+        # expected return with a confidence interval over the rollouts
+        z = NormalDist().inv_cdf(0.5 + self.config['confidence'] / 2)
+        if results['tasks']:
+            results['overall_score'] = sum(t['score'] for t in results['tasks']) / len(results['tasks'])
+        for field, scores, returns in (('environment_type', results['environment_scores'], 'environment_returns'),
+                                       ('horizon', results['horizon_scores'], 'horizon_returns')):
+            results[returns] = {}
+            for name in scores:
+                matching = [t for t in results['tasks'] if str(t[field]) == name]
+                if matching:
+                    scores[name] = sum(t['score'] for t in matching) / len(matching)
+                    mean = sum(t['expected_return'] for t in matching) / len(matching)
+                    margin = z * math.sqrt(sum(t['return_stderr'] ** 2 for t in matching)) / len(matching)
+                    results[returns][name] = {'expected_return': mean,
+                                              'ci': [mean - margin, mean + margin]}
+        
+        # Strata of an adaptive run were sampled at different rates
+        if 'sampling' in results:
+            apply_estimates(results, {'environment_type': 'environment_scores', 'horizon': 'horizon_scores'})
+        
+        return results
+    
+    def _evaluate_task(self, agent_interface, task):
+        """Evaluate an agent's plan by simulating it against the optimal return."""
+        solution, solve_time = timed_solve(agent_interface, task['description'])
+        stochastic = task['environment_type'] == 'stochastic'
+        env = make_environment(task['env_seed'], task['complexity'], stochastic, task['horizon'])
+        optimum = optimal_return(task['env_seed'], task['complexity'], stochastic, task['horizon'])
+        
+        plan = parse_plan(solution)
+        if stochastic:
+            # Common random numbers: every agent's plan meets the same slips
+            rng = np.random.default_rng(task['env_seed'])
+            returns = rollout_returns(env, plan, task['horizon'], self.config['rollouts'], rng)
+        else:
+            returns = rollout_returns(env, plan, task['horizon'])
+        expected = float(returns.mean())
+        stderr = float(returns.std(ddof=1) / np.sqrt(len(returns))) if len(returns) > 1 else 0.0
+        z = NormalDist().inv_cdf(0.5 + self.config['confidence'] / 2)
+        return {
+            'task_id': task['id'],
+            'environment_type': task['environment_type'],
+            'horizon': task['horizon'],
+            'complexity': task['complexity'],
+            'time': solve_time,
+            'solution': solution,
+            'plan_length': len(plan),
+            'rollouts': len(returns),
+            'expected_return': expected,
+            'return_stderr': stderr,
+            'return_ci': [expected - z * stderr, expected + z * stderr],
+            'optimal_return': optimum,
+            'score': min(1.0, max(0.0, expected / optimum))
+        }
@@ -1,6 +1,8 @@
 import os
 import json
+from ...utils.dispatch import TaskDispatcher, server_time, timed_solve
 from ...utils.evaluation import evaluate_response
+from ...utils.task_stream import select_tasks
 
 class TaskAdaptationBenchmark:
     """Benchmark for testing an agent's ability to adapt to new tasks.
@@ -9,18 +11,38 @@ class TaskAdaptationBenchmark:
     related but different task without explicit retraining.
     """
     
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, **config):
         self.config = {}
         if config_path and os.path.exists(config_path):
             with open(config_path, 'r') as f:
                 self.config = json.load(f)
+        self.config.update(config)
         
         # Default configuration
         self.config.setdefault('difficulty_levels', ['easy', 'medium', 'hard'])
         self.config.setdefault('num_tasks', 5)
         self.config.setdefault('time_limit', 300)  # seconds
         
-        self.tasks = self._generate_tasks()
+        # Clock used for transfer efficiency: 'server' uses the compute time the
+        # model server reports, which queueing does not inflate, and falls back to
+        # 'wall' (client-side elapsed time) when the agent does not report it
+        self.config.setdefault('timing', 'server')
+        
+        # Task streaming: tasks are generated lazily from the seed, and a run can
+        # be limited or split into shards
+        self.config.setdefault('seed', 0)
+        self.config.setdefault('limit', None)
+        self.config.setdefault('shard', None)  # (index, count)
+    
+    def iter_tasks(self, start=0):
+        """Yield the tasks of this run on demand, honoring the limit and shard settings.
+        
+        Args:
+            start: Number of tasks of this run to skip, counted after the shard
+                   and limit are applied
+        """
+        return select_tasks(self._generate_tasks(), start=start, limit=self.config['limit'],
+                            shard=self.config['shard'])
     
     def _generate_tasks(self):
         """Generate a series of related tasks with increasing difficulty."""
@@ -29,12 +51,13 @@ class TaskAdaptationBenchmark:
         # should transfer to the second
         return tasks
     
-    def run(self, agent_interface):
+    def run(self, agent_interface, dispatcher=None):
         """Run the benchmark on the provided agent interface.
         
         Args:
             agent_interface: An object with a 'solve' method that takes a task description
                             and returns a solution.
+            dispatcher: Optional TaskDispatcher used to run tasks in parallel
         
         Returns:
             dict: Results including scores, timing, and analysis of transfer efficiency.
@@ -42,15 +65,30 @@ class TaskAdaptationBenchmark:
         results = {
             'tasks': [],
             'overall_score': 0,
-            'transfer_efficiency': 0
+            'transfer_efficiency': 0,
+            'errors': []
         }
         
-        for i, task_pair in enumerate(self.tasks):
-            # First task - baseline performance
-            base_task, transfer_task = task_pair
+        if dispatcher is None:
+            dispatcher = TaskDispatcher()
+        
+        # Base and transfer tasks are independent requests, so stream them to the
+        # dispatcher one after the other and pair the ordered results back up
+        flat_tasks = (task for task_pair in self.iter_tasks() for task in task_pair)
+        flat_results = dispatcher.imap(
+            lambda task: self._evaluate_task(agent_interface, task), flat_tasks,
+            key=lambda task: f"transfer:{task['id']}", prompt=lambda task: task['description'])
+        
+        num_pairs = 0
+        for base_result, transfer_result in zip(flat_results, flat_results):
+            # A pair missing either answer says nothing about transfer
+            failed = [result for result in (base_result, transfer_result) if 'error' in result]
+            if failed:
+                results['errors'].extend(failed)
+                continue
             
-            base_result = self._evaluate_task(agent_interface, base_task)
-            transfer_result = self._evaluate_task(agent_interface, transfer_task)
+            # First task - baseline performance
+            num_pairs += 1
             
             # Calculate transfer efficiency
             transfer_efficiency = self._calculate_transfer_efficiency(base_result, transfer_result)
@@ -65,17 +103,16 @@ class TaskAdaptationBenchmark:
             results['transfer_efficiency'] += transfer_efficiency
         
         # Normalize scores
-        if self.tasks:
-            results['overall_score'] /= len(self.tasks)
-            results['transfer_efficiency'] /= len(self.tasks)
+        if num_pairs:
+            results['overall_score'] /= num_pairs
+            results['transfer_efficiency'] /= num_pairs
         
         return results
     
     def _evaluate_task(self, agent_interface, task):
         """Evaluate an agent on a single task."""
-        start_time = time.time()
-        solution = agent_interface.solve(task['description'])
-        solve_time = time.time() - start_time
+        solution, solve_time = timed_solve(agent_interface, task['description'])
+        compute_time = server_time(agent_interface)
         
         score = evaluate_response(solution, task['expected_solution'])
         
@@ -83,6 +120,7 @@ class TaskAdaptationBenchmark:
             'task_id': task['id'],
             'score': score,
             'time': solve_time,
+            'server_time': compute_time,
             'solution': solution
         }
     
@@ -94,6 +132,16 @@ class TaskAdaptationBenchmark:
         
         # Higher score in less time indicates good transfer
         score_ratio = transfer_result['score'] / base_result['score']
-        time_ratio = base_result['time'] / max(transfer_result['time'], 0.001)  # Avoid division by zero
+        base_time, transfer_time = self._solve_times(base_result, transfer_result)
+        time_ratio = base_time / max(transfer_time, 0.001)  # Avoid division by zero
         
-        return score_ratio * time_ratio
\ No newline at end of file
+        return score_ratio * time_ratio
+    
+    def _solve_times(self, base_result, transfer_result):
+        """Return the (base, transfer) solve times on the configured clock."""
+        if self.config['timing'] == 'server':
+            base_time = base_result.get('server_time')
+            transfer_time = transfer_result.get('server_time')
+            if base_time is not None and transfer_time is not None:
+                return base_time, transfer_time
+        return base_result['time'], transfer_result['time']
\ No newline at end of file
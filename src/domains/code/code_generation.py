@@ -1,3 +1,77 @@
+import itertools
+import os
+import json
+from ...utils.dispatch import TaskDispatcher, timed_solve
+from ...utils.task_stream import select_tasks
+from .sandbox import CodeGrader, extract_code
+
+# Language-independent programming problems, keyed by (task type, difficulty).
+# Programs read from stdin and write to stdout so the same tests apply to
+# every language.
+TASK_SPECS = {
+    ('algorithm', 'easy'): {
+        'spec': "Read two integers separated by a space from standard input and print their sum.",
+        'tests': [{'input': '2 3\n', 'expected_output': '5'},
+                  {'input': '-7 7\n', 'expected_output': '0'},
+                  {'input': '1000000000 1000000000\n', 'expected_output': '2000000000'}]
+    },
+    ('algorithm', 'medium'): {
+        'spec': "Read an integer n from standard input and print the n-th Fibonacci number, "
+                "where F(0) = 0 and F(1) = 1.",
+        'tests': [{'input': '0\n', 'expected_output': '0'},
+                  {'input': '10\n', 'expected_output': '55'},
+                  {'input': '50\n', 'expected_output': '12586269025'}]
+    },
+    ('algorithm', 'hard'): {
+        'spec': "Read an integer n from standard input and print the number of primes less than "
+                "or equal to n. The program must handle n up to 10000000 within a few seconds.",
+        'tests': [{'input': '10\n', 'expected_output': '4'},
+                  {'input': '1\n', 'expected_output': '0'},
+                  {'input': '10000000\n', 'expected_output': '664579'}]
+    },
+    ('data_processing', 'easy'): {
+        'spec': "Read lines of text from standard input until end of input and print the number "
+                "of non-empty lines.",
+        'tests': [{'input': 'a\n\nb\nc\n', 'expected_output': '3'},
+                  {'input': '', 'expected_output': '0'}]
+    },
+    ('data_processing', 'medium'): {
+        'spec': "Read CSV data from standard input. The first line is a header containing a column "
+                "named 'amount'. Print the sum of the 'amount' column as an integer.",
+        'tests': [{'input': 'id,amount\n1,10\n2,32\n', 'expected_output': '42'},
+                  {'input': 'amount,name\n5,a\n-2,b\n0,c\n', 'expected_output': '3'}]
+    },
+    ('data_processing', 'hard'): {
+        'spec': "Read text from standard input and print the three most frequent words (lowercased, "
+                "split on whitespace) one per line as 'word count', ordered by descending count and "
+                "then alphabetically.",
+        'tests': [{'input': 'b a b c a b\nd\n', 'expected_output': 'b 3\na 2\nc 1'},
+                  {'input': 'The the THE cat\n', 'expected_output': 'the 3\ncat 1'}]
+    },
+    ('web_api', 'easy'): {
+        'spec': "Read a URL query string such as 'a=1&b=2' from standard input and print the value "
+                "of the parameter 'id', or 'missing' if it is absent.",
+        'tests': [{'input': 'x=1&id=42\n', 'expected_output': '42'},
+                  {'input': 'x=1\n', 'expected_output': 'missing'}]
+    },
+    ('web_api', 'medium'): {
+        'spec': "Read an HTTP request line such as 'GET /users/17 HTTP/1.1' from standard input. "
+                "Print '200 <id>' if it is a GET request for /users/<id> with a numeric id, and "
+                "'404' otherwise.",
+        'tests': [{'input': 'GET /users/17 HTTP/1.1\n', 'expected_output': '200 17'},
+                  {'input': 'POST /users/17 HTTP/1.1\n', 'expected_output': '404'},
+                  {'input': 'GET /users/abc HTTP/1.1\n', 'expected_output': '404'}]
+    },
+    ('web_api', 'hard'): {
+        'spec': "Implement a token bucket rate limiter. The first line of standard input holds the "
+                "bucket capacity and the refill rate in tokens per second. Each following line holds "
+                "a request timestamp in seconds (non-decreasing). The bucket starts full and each "
+                "request consumes one token. Print 'allow' or 'deny' for each request, one per line.",
+        'tests': [{'input': '2 1\n0\n0\n0\n1\n', 'expected_output': 'allow\nallow\ndeny\nallow'},
+                  {'input': '1 0.5\n0\n1\n2\n', 'expected_output': 'allow\ndeny\nallow'}]
+    }
+}
+
 class CodeGenerationBenchmark:
     """Benchmark for testing an agent's ability to generate code.
     
@@ -5,35 +79,122 @@ class CodeGenerationBenchmark:
     specifications into working code across different programming languages and tasks.
     """
     
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, **config):
         self.config = {}
         if config_path and os.path.exists(config_path):
             with open(config_path, 'r') as f:
                 self.config = json.load(f)
+        self.config.update(config)
         
         # Default configuration
         self.config.setdefault('languages', ['python', 'javascript', 'rust'])
         self.config.setdefault('task_types', ['algorithm', 'data_processing', 'web_api'])
         self.config.setdefault('difficulty_levels', ['easy', 'medium', 'hard'])
         
-        self.tasks = self._generate_tasks()
+        # Grading limits
+        self.config.setdefault('grader_workers', None)  # Defaults to the number of CPUs
+        self.config.setdefault('artifact_dir', os.path.join('.cache', 'code_artifacts'))
+        self.config.setdefault('cpu_time_limit', 5)  # seconds per test case
+        self.config.setdefault('memory_limit_mb', 512)
+        self.config.setdefault('wall_time_limit', 10)  # seconds per test case
+        
+        # Task streaming: tasks are generated lazily from the seed, and a run can
+        # be limited or split into shards
+        self.config.setdefault('seed', 0)
+        self.config.setdefault('limit', None)
+        self.config.setdefault('shard', None)  # (index, count)
+    
+    def iter_tasks(self, start=0):
+        """Yield the tasks of this run on demand, honoring the limit and shard settings.
+        
+        Args:
+            start: Number of tasks of this run to skip, counted after the shard
+                   and limit are applied
+        """
+        return select_tasks(self._generate_tasks(), start=start, limit=self.config['limit'],
+                            shard=self.config['shard'])
     
     def _generate_tasks(self):
         """Generate code generation tasks across languages and difficulties."""
-        tasks = []
-        # Implementation would create programming tasks with specifications
-        return tasks
+        for task_type in self.config['task_types']:
+            for difficulty in self.config['difficulty_levels']:
+                spec = TASK_SPECS.get((task_type, difficulty))
+                if spec is None:
+                    continue
+                for language in self.config['languages']:
+                    yield {
+                        'id': f"{task_type}-{difficulty}-{language}",
+                        'language': language,
+                        'task_type': task_type,
+                        'difficulty': difficulty,
+                        'description': (f"Write a complete {language} program for the following task. "
+                                        f"Respond with the program in a single fenced code block.\n\n"
+                                        f"{spec['spec']}"),
+                        'tests': spec['tests']
+                    }
     
-    def run(self, agent_interface):
+    def run(self, agent_interface, dispatcher=None):
         """Run the code generation benchmark on the provided agent."""
         results = {
             'tasks': [],
             'overall_score': 0,
             'language_scores': {lang: 0 for lang in self.config['languages']},
-            'task_type_scores': {task_type: 0 for task_type in self.config['task_types']}
+            'task_type_scores': {task_type: 0 for task_type in self.config['task_types']},
+            'errors': []
         }
         
-        # Implementation would present coding tasks and evaluate solutions
-        # for correctness, efficiency, and style
+        if dispatcher is None:
+            dispatcher = TaskDispatcher()
+        
+        grader = CodeGrader(max_workers=self.config['grader_workers'],
+                            artifact_dir=self.config['artifact_dir'],
+                            cpu_time_limit=self.config['cpu_time_limit'],
+                            memory_limit_mb=self.config['memory_limit_mb'],
+                            wall_time_limit=self.config['wall_time_limit'])
+        gradings = {}
+        
+        def solve(task):
+            # Hand the program to the grader as soon as it arrives, so grading
+            # runs while the remaining tasks are still being generated
+            solution, solve_time = timed_solve(agent_interface, task['description'])
+            gradings[task['id']] = grader.submit(extract_code(solution, task['language']),
+                                                 task['language'], task['tests'])
+            return {'task_id': task['id'], 'solution': solution, 'time': solve_time}
+        
+        with grader:
+            tasks, submitted = itertools.tee(self.iter_tasks())
+            solved = list(zip(tasks, dispatcher.imap(solve, submitted,
+                                                     key=lambda task: f"code:{task['id']}",
+                                                     prompt=lambda task: task['description'])))
+            
+            # Tasks the agent could not answer are reported, not graded
+            results['errors'] = [task_result for _, task_result in solved if 'error' in task_result]
+            solved = [(task, task_result) for task, task_result in solved if 'error' not in task_result]
+            
+            # Solutions restored from the journal on resume were never submitted
+            for task, task_result in solved:
+                if task['id'] not in gradings:
+                    gradings[task['id']] = grader.submit(
+                        extract_code(task_result['solution'], task['language']),
+                        task['language'], task['tests'])
+            
+            for task, task_result in solved:
+                grading = gradings[task['id']].result()
+                results['tasks'].append(dict(task_result, language=task['language'],
+                                             task_type=task['task_type'], difficulty=task['difficulty'],
+                                             score=grading['score'], passed=grading['passed'],
+                                             total=grading['total'], grading_error=grading['error']))
+        
+        results['grading'] = grader.stats()
+        
+        # Average scores overall and per language and task type
+        if results['tasks']:
+            results['overall_score'] = sum(t['score'] for t in results['tasks']) / len(results['tasks'])
+        for field, scores in (('language', results['language_scores']),
+                              ('task_type', results['task_type_scores'])):
+            for name in scores:
+                matching = [t['score'] for t in results['tasks'] if t[field] == name]
+                if matching:
+                    scores[name] = sum(matching) / len(matching)
         
-        return results
\ No newline at end of file
+        return results
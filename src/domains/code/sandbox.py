@@ -0,0 +1,301 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# How each language is compiled and run. '{source}' and '{artifact}' are
+# replaced with paths inside the artifact cache. memory_limit names the
+# rlimit used to cap memory: V8 reserves far more address space than it uses,
+# so JavaScript is limited by data segment size instead of address space.
+LANGUAGES = {
+    'python': {
+        'suffix': '.py',
+        'compile': None,
+        'run': [sys.executable, '-I', '-S', '{source}'],
+        'memory_limit': 'RLIMIT_AS'
+    },
+    'javascript': {
+        'suffix': '.js',
+        'compile': None,
+        'run': ['node', '{source}'],
+        'memory_limit': 'RLIMIT_DATA'
+    },
+    'rust': {
+        'suffix': '.rs',
+        'compile': ['rustc', '-O', '--edition', '2021', '-o', '{artifact}', '{source}'],
+        'run': ['{artifact}'],
+        'memory_limit': 'RLIMIT_AS'
+    }
+}
+
+# Wall-time limit for compiling a single program
+COMPILE_TIMEOUT = 120
+
+_FENCE = re.compile(r"```[ \t]*([\w+#-]*)[^\n]*\n(.*?)```", re.DOTALL)
+
+
+def extract_code(response, language=None):
+    """Extract the program from a model response.
+
+    Returns the first fenced code block tagged with the language, else the first
+    fenced block, else the whole response.
+    """
+    blocks = _FENCE.findall(response)
+    aliases = {'python': ('python', 'py', 'python3'), 'javascript': ('javascript', 'js', 'node'),
+               'rust': ('rust', 'rs')}.get(language, ())
+    for tag, code in blocks:
+        if tag.lower() in aliases:
+            return code
+    if blocks:
+        return blocks[0][1]
+    return response
+
+
+class CodeGrader:
+    """Grades generated programs against test cases in isolated subprocesses.
+
+    Programs are graded on a pool of worker processes, each of which compiles a
+    program (if needed) and runs it once per test case in a fresh subprocess with
+    CPU-time, memory and wall-time limits. Sources and compiled artifacts are
+    cached on disk by a hash of the source, so a program seen before is never
+    recompiled. Grading is asynchronous: submit() returns immediately, so it
+    overlaps with inference for the remaining tasks.
+    """
+
+    def __init__(self, max_workers=None, artifact_dir='.cache/code_artifacts',
+                 cpu_time_limit=5, memory_limit_mb=512, wall_time_limit=10):
+        """Initialize the grader.
+
+        Args:
+            max_workers: Number of grading processes (default: number of CPUs)
+            artifact_dir: Directory for cached sources and compiled artifacts
+            cpu_time_limit: CPU seconds allowed per test case
+            memory_limit_mb: Memory allowed per test case, in megabytes
+            wall_time_limit: Wall-clock seconds allowed per test case
+        """
+        self.artifact_dir = os.path.abspath(artifact_dir)
+        self.limits = {
+            'cpu_time': cpu_time_limit,
+            'memory': memory_limit_mb * 1024 * 1024,
+            'wall_time': wall_time_limit
+        }
+        # Worker processes run no threads of their own, so it is safe for them
+        # to apply rlimits between fork and exec
+        self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def submit(self, code, language, tests):
+        """Queue a program for grading.
+
+        Args:
+            code: Source code of the program
+            language: One of LANGUAGES
+            tests: List of {'input': stdin text, 'expected_output': stdout text}
+
+        Returns:
+            concurrent.futures.Future: Resolves to a dict with 'passed', 'total',
+            'score', 'error' and timing fields
+        """
+        if language not in LANGUAGES:
+            raise ValueError(f"Unsupported language: {language}")
+
+        with self._lock:
+            self._stats.setdefault(language, {
+                'programs': 0, 'tests_run': 0, 'tests_passed': 0, 'cache_hits': 0,
+                'compile_time': 0.0, 'run_time': 0.0, 'first_submit': time.monotonic(),
+                'last_done': None
+            })
+
+        future = self._executor.submit(_grade, code, language, tests, self.artifact_dir, self.limits)
+        future.add_done_callback(lambda f: self._record(language, f))
+        return future
+
+    def _record(self, language, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        with self._lock:
+            stats = self._stats[language]
+            stats['programs'] += 1
+            stats['tests_run'] += result['total']
+            stats['tests_passed'] += result['passed']
+            stats['cache_hits'] += int(result['cache_hit'])
+            stats['compile_time'] += result['compile_time']
+            stats['run_time'] += result['run_time']
+            stats['last_done'] = time.monotonic()
+
+    def stats(self):
+        """Return grading throughput statistics per language.
+
+        Returns:
+            dict: Per language, the number of programs and tests graded, the
+                  artifact cache hits, total compile and run time, and programs
+                  graded per second of wall time
+        """
+        summary = {}
+        with self._lock:
+            for language, stats in self._stats.items():
+                elapsed = (stats['last_done'] or stats['first_submit']) - stats['first_submit']
+                summary[language] = {
+                    'programs': stats['programs'],
+                    'tests_run': stats['tests_run'],
+                    'tests_passed': stats['tests_passed'],
+                    'cache_hits': stats['cache_hits'],
+                    'compile_time': stats['compile_time'],
+                    'run_time': stats['run_time'],
+                    'programs_per_sec': stats['programs'] / elapsed if elapsed > 0 else 0.0
+                }
+        return summary
+
+    def shutdown(self):
+        """Wait for pending programs and stop the worker processes."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+_default_grader = None
+_default_grader_lock = threading.Lock()
+
+
+def grade_program(code, tests, language='python'):
+    """Grade a single program synchronously on a shared default grader.
+
+    Args:
+        code: Source code of the program
+        tests: List of {'input': ..., 'expected_output': ...} test cases
+        language: One of LANGUAGES
+
+    Returns:
+        dict: The grading result (see CodeGrader.submit)
+    """
+    global _default_grader
+    with _default_grader_lock:
+        if _default_grader is None:
+            _default_grader = CodeGrader()
+    return _default_grader.submit(code, language, tests).result()
+
+
+def _grade(code, language, tests, artifact_dir, limits):
+    """Compile and test one program; runs inside a worker process."""
+    spec = LANGUAGES[language]
+    result = {'passed': 0, 'total': len(tests), 'score': 0.0, 'error': None,
+              'cache_hit': False, 'compile_time': 0.0, 'run_time': 0.0}
+
+    digest = hashlib.sha256(code.encode('utf-8')).hexdigest()
+    language_dir = os.path.join(artifact_dir, language)
+    os.makedirs(language_dir, exist_ok=True)
+    source = os.path.join(language_dir, digest + spec['suffix'])
+    artifact = os.path.join(language_dir, digest + '.bin')
+    error_file = os.path.join(language_dir, digest + '.err')
+    paths = {'source': source, 'artifact': artifact, 'error': error_file}
+
+    # Compile failures are cached too, so a broken program is only compiled once
+    target = artifact if spec['compile'] else source
+    if os.path.exists(error_file):
+        result['cache_hit'] = True
+        with open(error_file, 'r') as f:
+            result['error'] = f"compile error: {f.read()}"
+        return result
+    elif os.path.exists(target):
+        result['cache_hit'] = True
+    else:
+        _write_atomic(source, code)
+        if spec['compile']:
+            start_time = time.monotonic()
+            error = _compile(spec['compile'], paths)
+            result['compile_time'] = time.monotonic() - start_time
+            if error:
+                result['error'] = f"compile error: {error}"
+                return result
+
+    command = [part.format(**paths) for part in spec['run']]
+    work_dir = tempfile.mkdtemp(prefix='agi-grade-')
+    try:
+        for test in tests:
+            start_time = time.monotonic()
+            outcome, stdout = _run_limited(command, test.get('input', ''), work_dir,
+                                           spec['memory_limit'], limits)
+            result['run_time'] += time.monotonic() - start_time
+            if outcome != 'ok':
+                result['error'] = result['error'] or outcome
+            elif stdout.strip() == str(test['expected_output']).strip():
+                result['passed'] += 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if tests:
+        result['score'] = result['passed'] / len(tests)
+    return result
+
+
+def _write_atomic(path, text):
+    """Write a file so that concurrent workers never see it half-written."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _compile(command_template, paths):
+    """Compile a source file into its cached artifact; returns an error message or None."""
+    tmp_artifact = f"{paths['artifact']}.{os.getpid()}.tmp"
+    command = [part.format(source=paths['source'], artifact=tmp_artifact) for part in command_template]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=COMPILE_TIMEOUT)
+    except FileNotFoundError:
+        return f"compiler not found: {command[0]}"
+    except subprocess.TimeoutExpired:
+        return "compilation timed out"
+    if completed.returncode != 0:
+        error = completed.stderr.strip()[-2000:]
+        _write_atomic(paths['error'], error)
+        return error
+    os.replace(tmp_artifact, paths['artifact'])
+    return None
+
+
+def _run_limited(command, stdin_text, work_dir, memory_limit, limits):
+    """Run a command with resource limits; returns (outcome, stdout)."""
+    import resource
+
+    def apply_limits():
+        resource.setrlimit(resource.RLIMIT_CPU, (limits['cpu_time'], limits['cpu_time']))
+        limit = getattr(resource, memory_limit)
+        resource.setrlimit(limit, (limits['memory'], limits['memory']))
+
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, cwd=work_dir, text=True,
+                                   env={'PATH': os.environ.get('PATH', '')},
+                                   preexec_fn=apply_limits, start_new_session=True)
+    except FileNotFoundError:
+        return f"runtime not found: {command[0]}", ''
+
+    try:
+        stdout, _ = process.communicate(stdin_text, timeout=limits['wall_time'])
+    except subprocess.TimeoutExpired:
+        # Kill the whole process group in case the program spawned children
+        os.killpg(process.pid, signal.SIGKILL)
+        process.communicate()
+        return 'wall time limit exceeded', ''
+
+    if process.returncode == -signal.SIGXCPU or process.returncode == -signal.SIGKILL:
+        return 'cpu time limit exceeded', ''
+    if process.returncode != 0:
+        return f"runtime error (exit code {process.returncode})", stdout
+    return 'ok', stdout
@@ -0,0 +1,355 @@
+import argparse
+import os
+import re
+import numpy as np
+
+# Grids are uint8 arrays of color indices: 0 is the background, 1-9 are
+# colors and MASK marks a hidden cell the agent has to fill in
+NUM_COLORS = 10
+MASK = 10
+
+# Side length of the square grids for each difficulty
+GRID_SIZES = {'easy': 5, 'medium': 8, 'hard': 12}
+
+# Side length of the repeated motif in pattern completion puzzles
+MOTIF_SIZES = {'easy': 2, 'medium': 3, 'hard': 4}
+
+# Number of rectangles painted into a scene
+SCENE_OBJECTS = {'easy': 2, 'medium': 4, 'hard': 6}
+
+# Fraction of non-background cells in analogy input grids
+DENSITIES = {'easy': 0.3, 'medium': 0.35, 'hard': 0.4}
+
+# Transformations of visual analogy puzzles, and the parameters each takes:
+# rotate by 90 * k degrees, reflect (0: top-bottom, 1: left-right,
+# 2: transpose), shift every color by k (1-9 wrap around, background stays),
+# translate by (dy, dx) with cells moved off the grid dropped
+TRANSFORMS = ['rotate', 'reflect', 'recolor', 'translate']
+TRANSFORM_PARAMS = {
+    'rotate': [1, 2, 3],
+    'reflect': [0, 1, 2],
+    'recolor': list(range(1, 9)),
+    # (dy + 2) * 5 + (dx + 2) for dy, dx in -2..2, except no shift at all
+    'translate': [p for p in range(25) if p != 12]
+}
+
+# Transformations used at each difficulty; hard puzzles compose two
+DIFFICULTY_TRANSFORMS = {
+    'easy': ['rotate', 'reflect'],
+    'medium': TRANSFORMS,
+    'hard': TRANSFORMS
+}
+
+# Grids stored per puzzle: the input/output pairs shown to the agent, then
+# the test input and its expected output
+GRIDS_PER_PUZZLE = {'visual_analogy': 6, 'pattern_completion': 2, 'scene_understanding': 1}
+
+# Per-puzzle metadata kept alongside the grids
+META_DTYPE = np.dtype([('transform', 'i1'), ('param', 'i1'), ('transform2', 'i1'),
+                       ('param2', 'i1'), ('answer', 'i2')])
+
+_CELL_CHARS = np.frombuffer(b'0123456789?', dtype=np.uint8)
+
+
+class GridGenerator:
+    """Seeded, vectorized generator of ARC-style grid puzzles.
+
+    Puzzles are produced in chunks of chunk_size. Every chunk draws from its
+    own random generator derived from the seed, the puzzle type, difficulty
+    and chunk index, so any range of puzzles can be regenerated independently
+    and the output does not depend on how the range is split into batches.
+    All transformations are applied to whole batches of grids at once.
+    """
+
+    def __init__(self, seed=0, chunk_size=4096):
+        """Initialize the generator.
+
+        Args:
+            seed: Seed of the puzzle stream
+            chunk_size: Number of puzzles drawn from one random generator
+        """
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def generate(self, task_type, difficulty, start, count):
+        """Generate a range of puzzles.
+
+        Args:
+            task_type: One of GRIDS_PER_PUZZLE
+            difficulty: One of GRID_SIZES
+            start: Index of the first puzzle
+            count: Number of puzzles
+
+        Returns:
+            tuple: (grids, meta) where grids is a uint8 array of shape
+                   (count, GRIDS_PER_PUZZLE[task_type], size, size) and meta a
+                   META_DTYPE array of length count
+        """
+        if task_type not in GRIDS_PER_PUZZLE:
+            raise ValueError(f"Unknown task type: {task_type}")
+        if difficulty not in GRID_SIZES:
+            raise ValueError(f"Unknown difficulty: {difficulty}")
+
+        grids, meta = [], []
+        first_chunk = start // self.chunk_size
+        last_chunk = (start + count - 1) // self.chunk_size
+        for chunk in range(first_chunk, last_chunk + 1):
+            chunk_grids, chunk_meta = self._generate_chunk(task_type, difficulty, chunk)
+            lo = max(start - chunk * self.chunk_size, 0)
+            hi = min(start + count - chunk * self.chunk_size, self.chunk_size)
+            grids.append(chunk_grids[lo:hi])
+            meta.append(chunk_meta[lo:hi])
+        if not grids:
+            size = GRID_SIZES[difficulty]
+            return (np.zeros((0, GRIDS_PER_PUZZLE[task_type], size, size), dtype=np.uint8),
+                    np.zeros(0, dtype=META_DTYPE))
+        return np.concatenate(grids), np.concatenate(meta)
+
+    def _generate_chunk(self, task_type, difficulty, chunk):
+        type_index = list(GRIDS_PER_PUZZLE).index(task_type)
+        difficulty_index = list(GRID_SIZES).index(difficulty)
+        rng = np.random.default_rng([self.seed, type_index, difficulty_index, chunk])
+        if task_type == 'visual_analogy':
+            return _analogies(rng, difficulty, self.chunk_size)
+        if task_type == 'pattern_completion':
+            return _patterns(rng, difficulty, self.chunk_size)
+        return _scenes(rng, difficulty, self.chunk_size)
+
+
+def _random_grids(rng, shape, density):
+    """Return sparse random grids: background with randomly colored cells."""
+    colors = rng.integers(1, NUM_COLORS, size=shape, dtype=np.uint8)
+    return np.where(rng.random(shape) < density, colors, 0).astype(np.uint8)
+
+
+def _draw_transforms(rng, difficulty, count):
+    """Draw a transformation and parameter for each puzzle."""
+    allowed = np.array([TRANSFORMS.index(name) for name in DIFFICULTY_TRANSFORMS[difficulty]])
+    kinds = allowed[rng.integers(0, len(allowed), size=count)]
+    params = np.zeros(count, dtype=np.int8)
+    for kind, name in enumerate(TRANSFORMS):
+        selected = kinds == kind
+        choices = np.array(TRANSFORM_PARAMS[name], dtype=np.int8)
+        params[selected] = choices[rng.integers(0, len(choices), size=int(selected.sum()))]
+    return kinds.astype(np.int8), params
+
+
+def apply_transforms(grids, kinds, params):
+    """Apply a per-puzzle transformation to a batch of grids.
+
+    Args:
+        grids: uint8 array of shape (n, ..., size, size)
+        kinds: Index into TRANSFORMS for each puzzle, or -1 for none
+        params: Parameter of each puzzle's transformation
+
+    Returns:
+        numpy.ndarray: The transformed grids
+    """
+    out = grids.copy()
+    rotate, reflect, recolor, translate = range(len(TRANSFORMS))
+
+    for k in TRANSFORM_PARAMS['rotate']:
+        selected = (kinds == rotate) & (params == k)
+        out[selected] = np.rot90(grids[selected], k, axes=(-2, -1))
+
+    for axis, flip in ((0, lambda g: g[..., ::-1, :]), (1, lambda g: g[..., :, ::-1]),
+                       (2, lambda g: np.swapaxes(g, -2, -1))):
+        selected = (kinds == reflect) & (params == axis)
+        out[selected] = flip(grids[selected])
+
+    selected = kinds == recolor
+    if selected.any():
+        g = grids[selected].astype(np.int16)
+        shift = params[selected].astype(np.int16).reshape((-1,) + (1,) * (g.ndim - 1))
+        out[selected] = np.where(g > 0, (g - 1 + shift) % (NUM_COLORS - 1) + 1, 0)
+
+    selected = np.flatnonzero(kinds == translate)
+    if len(selected):
+        size = grids.shape[-1]
+        dy = params[selected] // 5 - 2
+        dx = params[selected] % 5 - 2
+        # Gather each output cell from its source cell, dropping cells whose
+        # source lies outside the grid
+        rows = np.arange(size)[None, :] - dy[:, None]
+        cols = np.arange(size)[None, :] - dx[:, None]
+        valid = (((rows >= 0) & (rows < size))[:, :, None] & ((cols >= 0) & (cols < size))[:, None, :])
+        # Treat any dimensions between the batch and the grid as one
+        g = grids[selected].reshape(len(selected), -1, size, size)
+        gathered = g[np.arange(len(selected))[:, None, None, None], np.arange(g.shape[1])[None, :, None, None],
+                     np.clip(rows, 0, size - 1)[:, None, :, None], np.clip(cols, 0, size - 1)[:, None, None, :]]
+        out[selected] = np.where(valid[:, None], gathered, 0).reshape(grids[selected].shape)
+    return out
+
+
+def _analogies(rng, difficulty, count):
+    """Example pairs sharing a hidden transformation, plus a test pair."""
+    size = GRID_SIZES[difficulty]
+    inputs = _random_grids(rng, (count, 3, size, size), DENSITIES[difficulty])
+    meta = np.zeros(count, dtype=META_DTYPE)
+    meta['transform'], meta['param'] = _draw_transforms(rng, difficulty, count)
+    outputs = apply_transforms(inputs, meta['transform'], meta['param'])
+    if difficulty == 'hard':
+        meta['transform2'], meta['param2'] = _draw_transforms(rng, difficulty, count)
+        outputs = apply_transforms(outputs, meta['transform2'], meta['param2'])
+    else:
+        meta['transform2'] = -1
+
+    grids = np.empty((count, 6, size, size), dtype=np.uint8)
+    grids[:, 0::2] = inputs
+    grids[:, 1::2] = outputs
+    return grids, meta
+
+
+def _patterns(rng, difficulty, count):
+    """A tiled motif with a rectangular region hidden."""
+    size = GRID_SIZES[difficulty]
+    motif_size = MOTIF_SIZES[difficulty]
+    motifs = rng.integers(0, NUM_COLORS, size=(count, motif_size, motif_size), dtype=np.uint8)
+    repeats = -(-size // motif_size)
+    full = np.tile(motifs, (1, repeats, repeats))[:, :size, :size]
+
+    # Hide at most one motif's worth of rows and columns, so every hidden
+    # cell still has a visible copy one period away
+    heights = rng.integers(1, motif_size + 1, size=count)
+    widths = rng.integers(1, motif_size + 1, size=count)
+    top = rng.integers(0, size - heights + 1)
+    left = rng.integers(0, size - widths + 1)
+    index = np.arange(size)
+    hidden = (((index[None, :] >= top[:, None]) & (index[None, :] < (top + heights)[:, None]))[:, :, None] &
+              ((index[None, :] >= left[:, None]) & (index[None, :] < (left + widths)[:, None]))[:, None, :])
+
+    grids = np.empty((count, 2, size, size), dtype=np.uint8)
+    grids[:, 0] = np.where(hidden, MASK, full)
+    grids[:, 1] = full
+    meta = np.zeros(count, dtype=META_DTYPE)
+    meta['transform'] = meta['transform2'] = -1
+    meta['answer'] = hidden.sum(axis=(1, 2))
+    return grids, meta
+
+
+def _scenes(rng, difficulty, count):
+    """Overlapping colored rectangles; the answer is the color covering the most cells."""
+    size = GRID_SIZES[difficulty]
+    grids = np.zeros((count, 1, size, size), dtype=np.uint8)
+    index = np.arange(size)
+    for _ in range(SCENE_OBJECTS[difficulty]):
+        heights = rng.integers(1, size // 2 + 1, size=count)
+        widths = rng.integers(1, size // 2 + 1, size=count)
+        top = rng.integers(0, size - heights + 1)
+        left = rng.integers(0, size - widths + 1)
+        colors = rng.integers(1, NUM_COLORS, size=count, dtype=np.uint8)
+        inside = (((index[None, :] >= top[:, None]) & (index[None, :] < (top + heights)[:, None]))[:, :, None] &
+                  ((index[None, :] >= left[:, None]) & (index[None, :] < (left + widths)[:, None]))[:, None, :])
+        grids[:, 0] = np.where(inside, colors[:, None, None], grids[:, 0])
+
+    # Cells per color; argmax picks the smallest color number on ties
+    counts = (grids[:, 0, :, :, None] == np.arange(1, NUM_COLORS, dtype=np.uint8)).sum(axis=(1, 2))
+    meta = np.zeros(count, dtype=META_DTYPE)
+    meta['transform'] = meta['transform2'] = -1
+    meta['answer'] = counts.argmax(axis=1) + 1
+    return grids, meta
+
+
+def render_grid(grid):
+    """Render a grid as text, one row per line with cells separated by spaces."""
+    size = grid.shape[-1]
+    text = np.full((grid.shape[0], 2 * size), ord(' '), dtype=np.uint8)
+    text[:, 0::2] = _CELL_CHARS[grid]
+    text[:, -1] = ord('\n')
+    return text.tobytes().decode('ascii').rstrip('\n')
+
+
+def parse_grid(text, size):
+    """Read a size x size grid of digits from a response.
+
+    Lines holding exactly size digits (optionally separated by spaces or
+    commas) are grid rows; the last size such lines are used, so a response
+    may restate the input before giving its answer.
+
+    Returns:
+        numpy.ndarray: The grid, or None if the response holds too few rows
+    """
+    rows = []
+    for line in text.splitlines():
+        cells = re.sub(r"[\s,\[\]|]", '', line)
+        if len(cells) == size and cells.isdigit():
+            rows.append(cells)
+    if len(rows) < size:
+        return None
+    return np.frombuffer(''.join(rows[-size:]).encode('ascii'), dtype=np.uint8).reshape(size, size) - ord('0')
+
+
+def write_corpus(directory, task_type, difficulty, count, seed=0, chunk_size=4096):
+    """Generate puzzles into memory-mapped .npy files.
+
+    Puzzles are generated and written one chunk at a time, so corpora far
+    larger than memory can be built. The grids go to
+    '<task_type>-<difficulty>.grids.npy' and the metadata to
+    '<task_type>-<difficulty>.meta.npy' in directory.
+
+    Args:
+        directory: Directory to write the corpus files into
+        task_type: One of GRIDS_PER_PUZZLE
+        difficulty: One of GRID_SIZES
+        count: Number of puzzles
+        seed: Seed of the puzzle stream
+        chunk_size: Number of puzzles generated at a time
+
+    Returns:
+        tuple: Paths of the grids and metadata files
+    """
+    os.makedirs(directory, exist_ok=True)
+    size = GRID_SIZES[difficulty]
+    grids_path, meta_path = corpus_paths(directory, task_type, difficulty)
+    generator = GridGenerator(seed=seed, chunk_size=chunk_size)
+
+    grids = np.lib.format.open_memmap(grids_path + '.tmp', mode='w+', dtype=np.uint8,
+                                      shape=(count, GRIDS_PER_PUZZLE[task_type], size, size))
+    meta = np.lib.format.open_memmap(meta_path + '.tmp', mode='w+', dtype=META_DTYPE, shape=(count,))
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        grids[start:stop], meta[start:stop] = generator.generate(task_type, difficulty, start, stop - start)
+    grids.flush()
+    meta.flush()
+    del grids, meta
+
+    os.replace(grids_path + '.tmp', grids_path)
+    os.replace(meta_path + '.tmp', meta_path)
+    return grids_path, meta_path
+
+
+def corpus_paths(directory, task_type, difficulty):
+    """Return the grids and metadata file paths of a corpus."""
+    prefix = os.path.join(directory, f"{task_type}-{difficulty}")
+    return prefix + '.grids.npy', prefix + '.meta.npy'
+
+
+def open_corpus(directory, task_type, difficulty):
+    """Open a corpus written by write_corpus without reading it into memory.
+
+    Returns:
+        tuple: (grids, meta) as read-only memory-mapped arrays
+    """
+    grids_path, meta_path = corpus_paths(directory, task_type, difficulty)
+    return np.load(grids_path, mmap_mode='r'), np.load(meta_path, mmap_mode='r')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate memory-mapped corpora of grid puzzles')
+    parser.add_argument('--output-dir', type=str, required=True, help='Directory to write the corpora into')
+    parser.add_argument('--count', type=int, default=100000, help='Puzzles per task type and difficulty')
+    parser.add_argument('--task-types', type=str, nargs='+', choices=list(GRIDS_PER_PUZZLE),
+                        default=list(GRIDS_PER_PUZZLE), help='Task types to generate')
+    parser.add_argument('--difficulties', type=str, nargs='+', choices=list(GRID_SIZES),
+                        default=list(GRID_SIZES), help='Difficulties to generate')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    for task_type in args.task_types:
+        for difficulty in args.difficulties:
+            grids_path, _ = write_corpus(args.output_dir, task_type, difficulty, args.count, seed=args.seed)
+            print(f"Wrote {args.count} {difficulty} {task_type} puzzles to {grids_path}")
+
+
+if __name__ == '__main__':
+    main()
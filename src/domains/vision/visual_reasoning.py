@@ -1,3 +1,13 @@
+import os
+import json
+import re
+import numpy as np
+from ...utils.adaptive import adaptive_map, apply_estimates
+from ...utils.dispatch import TaskDispatcher, split_errors, timed_solve
+from ...utils.task_stream import select_tasks
+from .grids import (GRID_SIZES, TRANSFORMS, GridGenerator, corpus_paths, open_corpus, parse_grid,
+                    render_grid)
+
 class VisualReasoningBenchmark:
     """Benchmark for testing an agent's ability to reason about visual information.
     
@@ -5,32 +15,176 @@ class VisualReasoningBenchmark:
     visual scenes, patterns, and transformations.
     """
     
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, **config):
         self.config = {}
         if config_path and os.path.exists(config_path):
             with open(config_path, 'r') as f:
                 self.config = json.load(f)
+        self.config.update(config)
         
         # Default configuration
         self.config.setdefault('task_types', ['pattern_completion', 'scene_understanding', 'visual_analogy'])
         self.config.setdefault('difficulty_levels', ['easy', 'medium', 'hard'])
+        self.config.setdefault('tasks_per_type', 10)  # per task type and difficulty
         
-        self.tasks = self._generate_tasks()
+        # Directory of pre-generated puzzle corpora (see grids.write_corpus);
+        # puzzles are sampled from a corpus when one exists for a task type and
+        # difficulty, and generated on the fly otherwise
+        self.config.setdefault('corpus_dir', None)
+        
+        # Adaptive evaluation: run a stratified random sample of the tasks and
+        # stop each stratum once its score is known to within +/- tolerance
+        self.config.setdefault('adaptive', False)
+        self.config.setdefault('tolerance', 0.05)
+        self.config.setdefault('confidence', 0.95)
+        self.config.setdefault('min_samples', 10)  # per stratum
+        
+        # Task streaming: tasks are generated lazily from the seed, and a run can
+        # be limited or split into shards
+        self.config.setdefault('seed', 0)
+        self.config.setdefault('limit', None)
+        self.config.setdefault('shard', None)  # (index, count)
+    
+    def iter_tasks(self, start=0):
+        """Yield the tasks of this run on demand, honoring the limit and shard settings.
+        
+        Args:
+            start: Number of tasks of this run to skip, counted after the shard
+                   and limit are applied
+        """
+        return select_tasks(self._generate_tasks(), start=start, limit=self.config['limit'],
+                            shard=self.config['shard'])
     
     def _generate_tasks(self):
-        """Generate visual reasoning tasks of different types and difficulties."""
-        tasks = []
-        # Implementation would create visual puzzles similar to ARC or Raven's Progressive Matrices
-        return tasks
+        """Generate visual reasoning tasks of different types and difficulties.
+        
+        Puzzles are ARC-style grids produced in batches by GridGenerator, or
+        sampled from a memory-mapped corpus, and only turned into prompts as
+        the run consumes them.
+        """
+        generator = GridGenerator(seed=self.config['seed'])
+        count = self.config['tasks_per_type']
+        for task_type in self.config['task_types']:
+            for difficulty in self.config['difficulty_levels']:
+                for index, grids, meta in self._puzzles(generator, task_type, difficulty, count):
+                    yield self._make_task(task_type, difficulty, index, grids, meta)
+    
+    def _puzzles(self, generator, task_type, difficulty, count):
+        """Yield (index, grids, meta) for the puzzles of one task type and difficulty."""
+        corpus_dir = self.config['corpus_dir']
+        if corpus_dir and os.path.exists(corpus_paths(corpus_dir, task_type, difficulty)[0]):
+            grids, meta = open_corpus(corpus_dir, task_type, difficulty)
+            # Sample without replacement; only the chosen rows are read from disk
+            rng = np.random.default_rng([self.config['seed'], len(grids)])
+            indices = np.sort(rng.choice(len(grids), size=min(count, len(grids)), replace=False))
+            for index in indices:
+                yield int(index), np.asarray(grids[index]), meta[index]
+            return
+        
+        for start in range(0, count, generator.chunk_size):
+            grids, meta = generator.generate(task_type, difficulty, start,
+                                             min(generator.chunk_size, count - start))
+            for offset in range(len(grids)):
+                yield start + offset, grids[offset], meta[offset]
+    
+    def _make_task(self, task_type, difficulty, index, grids, meta):
+        """Build the prompt and expected answer of one puzzle."""
+        legend = ("Grids are written one row per line, with each cell a color number from 0 to 9 "
+                  "and 0 meaning background.")
+        task = {
+            'id': f"{task_type}-{difficulty}-{index}",
+            'task_type': task_type,
+            'difficulty': difficulty,
+            'size': GRID_SIZES[difficulty]
+        }
+        
+        if task_type == 'visual_analogy':
+            examples = "\n\n".join(f"Example {i + 1} input:\n{render_grid(grids[2 * i])}\n\n"
+                                    f"Example {i + 1} output:\n{render_grid(grids[2 * i + 1])}"
+                                    for i in range(2))
+            task['description'] = (f"Each example shows an input grid and the output grid produced from it "
+                                   f"by the same transformation. {legend}\n\n{examples}\n\n"
+                                   f"Test input:\n{render_grid(grids[4])}\n\n"
+                                   f"Apply the same transformation to the test input and respond with "
+                                   f"the output grid only, in the same format.")
+            task['expected_solution'] = render_grid(grids[5])
+            task['transform'] = '+'.join(TRANSFORMS[kind] for kind in (meta['transform'], meta['transform2'])
+                                         if kind >= 0)
+        elif task_type == 'pattern_completion':
+            task['description'] = (f"The grid below repeats a pattern, but the cells marked ? are hidden. "
+                                   f"{legend}\n\n{render_grid(grids[0])}\n\n"
+                                   f"Respond with the complete grid only, with every ? replaced by its "
+                                   f"color, in the same format.")
+            task['expected_solution'] = render_grid(grids[1])
+        else:
+            task['description'] = (f"The grid below shows colored rectangles painted over each other on a "
+                                   f"background. {legend}\n\n{render_grid(grids[0])}\n\n"
+                                   f"Which color covers the most cells? If several colors tie, give the "
+                                   f"smallest color number. Respond with the color number only.")
+            task['expected_solution'] = str(int(meta['answer']))
+        return task
     
-    def run(self, agent_interface):
+    def run(self, agent_interface, dispatcher=None):
         """Run the visual reasoning benchmark on the provided agent."""
         results = {
             'tasks': [],
             'overall_score': 0,
-            'task_type_scores': {task_type: 0 for task_type in self.config['task_types']}
+            'task_type_scores': {task_type: 0 for task_type in self.config['task_types']},
+            'difficulty_scores': {difficulty: 0 for difficulty in self.config['difficulty_levels']}
         }
         
-        # Implementation would present visual puzzles and evaluate solutions
+        if dispatcher is None:
+            dispatcher = TaskDispatcher()
+        
+        if self.config['adaptive']:
+            results['tasks'], results['sampling'] = adaptive_map(
+                dispatcher, lambda task: self._evaluate_task(agent_interface, task), self.iter_tasks,
+                ('task_type', 'difficulty'), key=lambda task: f"vision:{task['id']}",
+                prompt=lambda task: task['description'], tolerance=self.config['tolerance'],
+                confidence=self.config['confidence'], min_samples=self.config['min_samples'])
+        else:
+            results['tasks'] = dispatcher.map(
+                lambda task: self._evaluate_task(agent_interface, task), self.iter_tasks(),
+                key=lambda task: f"vision:{task['id']}", prompt=lambda task: task['description'])
+        # Tasks the agent could not answer are reported, not scored as wrong
+        results['tasks'], results['errors'] = split_errors(results['tasks'])
+        
+        # Average scores overall and per task type and difficulty
+        if results['tasks']:
+            results['overall_score'] = sum(t['score'] for t in results['tasks']) / len(results['tasks'])
+        for field, scores in (('task_type', results['task_type_scores']),
+                              ('difficulty', results['difficulty_scores'])):
+            for name in scores:
+                matching = [t['score'] for t in results['tasks'] if t[field] == name]
+                if matching:
+                    scores[name] = sum(matching) / len(matching)
         
-        return results
\ No newline at end of file
+        # Strata of an adaptive run were sampled at different rates
+        if 'sampling' in results:
+            apply_estimates(results, {'task_type': 'task_type_scores', 'difficulty': 'difficulty_scores'})
+        
+        return results
+    
+    def _evaluate_task(self, agent_interface, task):
+        """Evaluate an agent on a single puzzle."""
+        solution, solve_time = timed_solve(agent_interface, task['description'])
+        
+        result = {
+            'task_id': task['id'],
+            'task_type': task['task_type'],
+            'difficulty': task['difficulty'],
+            'time': solve_time,
+            'solution': solution
+        }
+        if task['task_type'] == 'scene_understanding':
+            answer = re.search(r"\d+", solution)
+            result['score'] = 1.0 if answer and answer.group() == task['expected_solution'] else 0.0
+        else:
+            # Grid answers also get partial credit for the fraction of correct cells
+            expected = parse_grid(task['expected_solution'], task['size'])
+            response = parse_grid(solution, task['size'])
+            result['cell_accuracy'] = float((response == expected).mean()) if response is not None else 0.0
+            result['score'] = 1.0 if result['cell_accuracy'] == 1.0 else 0.0
+        if 'transform' in task:
+            result['transform'] = task['transform']
+        return result
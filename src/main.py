@@ -1,76 +1,230 @@
 import argparse
+import importlib
 import json
 import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-from src.utils.agent_interfaces import OllamaInterface
-from src.utils.visualization import BenchmarkVisualizer
-from src.benchmarks.transfer.task_adaptation import TaskAdaptationBenchmark
-from src.benchmarks.memory.episodic_memory import EpisodicMemoryBenchmark
-from src.benchmarks.abstraction.concept_formation import ConceptFormationBenchmark
-from src.benchmarks.planning.sequential_decision import SequentialDecisionBenchmark
-from src.domains.code.code_generation import CodeGenerationBenchmark
-from src.domains.vision.visual_reasoning import VisualReasoningBenchmark
+# Only lightweight modules are imported at startup. The HTTP client, plotting
+# (matplotlib/NumPy) and each benchmark module are imported when first used,
+# so '--help' and runs without '--visualize' start quickly.
+from src.utils.checkpoint import ResultJournal, write_combined_results, write_results
+from src.utils.dispatch import TaskDispatcher
+from src.utils.prefix_schedule import PREFIX_WINDOW
+from src.utils.task_stream import parse_shard
+from src.utils.telemetry import summarize
+
+# Benchmark key, display name, module and class
+BENCHMARKS = [
+    ('transfer', 'Transfer Learning', 'src.benchmarks.transfer.task_adaptation', 'TaskAdaptationBenchmark'),
+    ('memory', 'Episodic Memory', 'src.benchmarks.memory.episodic_memory', 'EpisodicMemoryBenchmark'),
+    ('abstraction', 'Concept Formation', 'src.benchmarks.abstraction.concept_formation', 'ConceptFormationBenchmark'),
+    ('planning', 'Sequential Decision', 'src.benchmarks.planning.sequential_decision', 'SequentialDecisionBenchmark'),
+    ('code', 'Code Generation', 'src.domains.code.code_generation', 'CodeGenerationBenchmark'),
+    ('vision', 'Visual Reasoning', 'src.domains.vision.visual_reasoning', 'VisualReasoningBenchmark')
+]
+
+def load_benchmark(module_name, class_name, **options):
+    """Import a benchmark module on demand and instantiate its benchmark class."""
+    benchmark_class = getattr(importlib.import_module(module_name), class_name)
+    return benchmark_class(**options)
+
+def journal_path(args, model_name, multi_model):
+    """Return the journal path for one model's run."""
+    path = args.journal or f"{args.output}.journal.jsonl"
+    if multi_model:
+        root, ext = os.path.splitext(path)
+        safe_name = re.sub(r'[^\w.-]', '_', model_name)
+        path = f"{root}.{safe_name}{ext}"
+    return path
+
+def run_model(model_name, benchmarks_to_run, args, cache, multi_model=False):
+    """Run every selected benchmark against one model.
+    
+    Each model gets its own agent interface, worker pool and journal, so several
+    models can be evaluated at once while sharing the same benchmark instances.
+    
+    Returns:
+        ResultJournal: The closed journal holding the model's results
+    """
+    from src.utils.agent_interfaces import OllamaInterface
+    
+    prefix = f"[{model_name}] " if multi_model else ""
+    
+    options = {}
+    if args.temperature is not None:
+        options['temperature'] = args.temperature
+    
+    agent = OllamaInterface(model_name=model_name, base_url=args.hosts, pool_size=args.concurrency,
+                            stream=args.stream, read_timeout=args.timeout,
+                            options=options or None, cache=cache, max_retries=args.retries,
+                            adaptive_concurrency=args.adaptive_concurrency)
+    
+    # Run benchmarks, checkpointing every finished task and benchmark to the journal
+    journal = ResultJournal(journal_path(args, model_name, multi_model),
+                            model=model_name, resume=args.resume)
+    
+    with TaskDispatcher(concurrency=args.concurrency, journal=journal,
+                        prefix_window=args.prefix_window) as dispatcher:
+        for name, benchmark in benchmarks_to_run:
+            if journal.has_benchmark(name):
+                print(f"{prefix}Skipping {name} benchmark (already completed in {journal.path})")
+                continue
+            print(f"{prefix}Running {name} benchmark...")
+            agent.telemetry.drain()
+            if agent.limiter is not None:
+                agent.limiter.drain()
+            if dispatcher.scheduler is not None:
+                dispatcher.scheduler.drain()
+            benchmark_results = benchmark.run(agent, dispatcher=dispatcher)
+            benchmark_results['telemetry'] = summarize(agent.telemetry.drain())
+            if dispatcher.scheduler is not None:
+                benchmark_results['prefix_scheduling'] = dispatcher.scheduler.drain()
+            if agent.limiter is not None:
+                benchmark_results['concurrency'] = agent.limiter.drain()
+            journal.record_benchmark(name, benchmark_results)
+            print(f"{prefix}Completed {name} benchmark. Overall score: {benchmark_results['overall_score']:.2f}")
+            if 'sampling' in benchmark_results:
+                sampling = benchmark_results['sampling']
+                print(f"{prefix}  Adaptive sampling ran {sampling['tasks_run']} of {sampling['population']} tasks")
+            if benchmark_results.get('errors'):
+                print(f"{prefix}  {len(benchmark_results['errors'])} tasks failed and were not scored")
+    agent.close()
+    journal.close()
+    
+    return journal
 
 def main():
-    parser = argparse.ArgumentParser(description='Run AGI Benchmark Suite')
+    # 'history' queries past runs instead of running benchmarks
+    if len(sys.argv) > 1 and sys.argv[1] == 'history':
+        from src.utils.history import main as history_main
+        return history_main(sys.argv[2:])
+    
+    parser = argparse.ArgumentParser(description='Run AGI Benchmark Suite',
+                                     epilog="Run 'python -m src.main history --help' to query past runs.")
     parser.add_argument('--model', type=str, default='gemma3:latest', help='Ollama model to use')
+    parser.add_argument('--models', type=str, nargs='+', default=None,
+                        help='Several Ollama models to compare in one run (overrides --model)')
     parser.add_argument('--benchmarks', type=str, nargs='+', 
-                        choices=['transfer', 'memory', 'abstraction', 'planning', 'code', 'vision', 'all'],
+                        choices=[key for key, _, _, _ in BENCHMARKS] + ['all'],
                         default=['all'], help='Benchmarks to run')
     parser.add_argument('--output', type=str, default='results.json', help='Output file for results')
     parser.add_argument('--visualize', action='store_true', help='Generate visualization and reports')
     parser.add_argument('--report-format', type=str, choices=['text', 'html', 'all'], default='all',
                        help='Report format to generate')
+    parser.add_argument('--hosts', type=str, nargs='+', default=['http://localhost:11434'],
+                        help='Base URLs of one or more Ollama servers; requests go to the least busy one')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Number of agent requests to run in parallel')
+    parser.add_argument('--adaptive-concurrency', action='store_true',
+                        help='Adjust the requests in flight, up to --concurrency, to what the server '
+                             'can handle without queueing')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Times a failed request is retried with exponential backoff before the '
+                             'task is recorded as an error')
+    parser.add_argument('--prefix-window', type=int, default=PREFIX_WINDOW,
+                        help='Pending prompts reordered by shared prefix so the server can reuse its '
+                             'prompt cache (0 keeps task order)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream responses from Ollama and record time to first token')
+    parser.add_argument('--timeout', type=float, default=300.0,
+                        help='Seconds to wait for data from the Ollama server before failing a request')
+    parser.add_argument('--temperature', type=float, default=None,
+                        help='Sampling temperature passed to the model (use 0 for reproducible runs)')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for the persistent response cache (enables caching)')
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help='Maximum number of cached responses before LRU eviction')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the response cache even if --cache-dir is given')
+    parser.add_argument('--journal', type=str, default=None,
+                        help='JSONL journal of completed tasks (default: <output>.journal.jsonl)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted run, skipping tasks already in the journal')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for task generation')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Maximum number of tasks to run per benchmark')
+    parser.add_argument('--shard', type=str, default=None,
+                        help='Run only shard i of n (e.g. 0/4) to split a suite across machines')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Sample tasks per category until each score is known to within --tolerance')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help='Half-width of the 95%% confidence interval at which adaptive sampling stops')
+    parser.add_argument('--history-db', type=str, default=os.path.join('.cache', 'history.sqlite3'),
+                        help='Database of past runs the results are recorded in')
+    parser.add_argument('--no-history', action='store_true', help='Do not record the run in the history')
     args = parser.parse_args()
     
-    # Initialize agent interface
-    agent = OllamaInterface(model_name=args.model)
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        parser.error(str(e))
+    if not 0 < args.tolerance < 1:
+        parser.error("--tolerance must be between 0 and 1")
+    if args.retries < 0:
+        parser.error("--retries must not be negative")
+    
+    models = args.models or [args.model]
+    multi_model = len(models) > 1
     
-    # Determine which benchmarks to run
+    cache = None
+    if args.cache_dir and not args.no_cache:
+        from src.utils.response_cache import ResponseCache
+        cache = ResponseCache(args.cache_dir, max_entries=args.cache_size)
+    
+    # Determine which benchmarks to run. The benchmarks are shared by every model;
+    # their tasks are generated lazily from the seed as each run consumes them.
+    task_options = {'seed': args.seed, 'limit': args.limit, 'shard': shard}
+    if args.adaptive:
+        task_options.update(adaptive=True, tolerance=args.tolerance)
     benchmarks_to_run = []
-    if 'all' in args.benchmarks or 'transfer' in args.benchmarks:
-        benchmarks_to_run.append(('Transfer Learning', TaskAdaptationBenchmark()))
-    if 'all' in args.benchmarks or 'memory' in args.benchmarks:
-        benchmarks_to_run.append(('Episodic Memory', EpisodicMemoryBenchmark()))
-    if 'all' in args.benchmarks or 'abstraction' in args.benchmarks:
-        benchmarks_to_run.append(('Concept Formation', ConceptFormationBenchmark()))
-    if 'all' in args.benchmarks or 'planning' in args.benchmarks:
-        benchmarks_to_run.append(('Sequential Decision', SequentialDecisionBenchmark()))
-    if 'all' in args.benchmarks or 'code' in args.benchmarks:
-        benchmarks_to_run.append(('Code Generation', CodeGenerationBenchmark()))
-    if 'all' in args.benchmarks or 'vision' in args.benchmarks:
-        benchmarks_to_run.append(('Visual Reasoning', VisualReasoningBenchmark()))
-    
-    # Run benchmarks and collect results
-    results = {
-        'model': args.model,
-        'benchmarks': {}
-    }
-    
-    for name, benchmark in benchmarks_to_run:
-        print(f"Running {name} benchmark...")
-        benchmark_results = benchmark.run(agent)
-        results['benchmarks'][name] = benchmark_results
-        print(f"Completed {name} benchmark. Overall score: {benchmark_results['overall_score']:.2f}")
-    
-    # Calculate aggregate scores
-    if results['benchmarks']:
-        results['overall_score'] = sum(b['overall_score'] for b in results['benchmarks'].values()) / len(results['benchmarks'])
-    else:
-        results['overall_score'] = 0.0
+    for key, name, module_name, class_name in BENCHMARKS:
+        if 'all' in args.benchmarks or key in args.benchmarks:
+            benchmarks_to_run.append((name, load_benchmark(module_name, class_name, **task_options)))
+    
+    # Evaluate all models at once, each with its own worker pool
+    with ThreadPoolExecutor(max_workers=len(models)) as executor:
+        futures = [executor.submit(run_model, model_name, benchmarks_to_run, args, cache, multi_model)
+                   for model_name in models]
+        journals = [future.result() for future in futures]
     
-    # Save results
-    with open(args.output, 'w') as f:
-        json.dump(results, f, indent=2)
+    extra = {'timestamp': datetime.now().isoformat(timespec='seconds')}
+    if cache is not None:
+        extra['cache'] = cache.stats()
+        cache.close()
+        print(f"Response cache: {extra['cache']['hits']} hits, {extra['cache']['misses']} misses")
+    
+    # Save results, streaming them from the journals
+    if multi_model:
+        overall_scores = write_combined_results(journals, args.output, extra=extra)
+    else:
+        overall_scores = {models[0]: write_results(journals[0], args.output, extra=extra)}
     
     print(f"\nAll benchmarks completed.")
-    print(f"Overall AGI score: {results['overall_score']:.2f}")
+    for model_name, overall_score in overall_scores.items():
+        print(f"Overall AGI score{f' ({model_name})' if multi_model else ''}: {overall_score:.2f}")
     print(f"Detailed results saved to {args.output}")
     
+    if not args.no_history:
+        from src.utils.history import ResultsStore
+        store = ResultsStore(args.history_db)
+        run_ids = store.ingest_file(args.output)
+        store.close()
+        print(f"Recorded as run {', '.join(str(run_id) for run_id in run_ids)} in {args.history_db}")
+    
     # Generate visualizations and reports if requested
     if args.visualize:
         print("\nGenerating visualizations and reports...")
-        visualizer = BenchmarkVisualizer(results_data=results)
+        from src.utils.visualization import BenchmarkVisualizer
+        visualizer = BenchmarkVisualizer(results_file=args.output)
+        
+        # Render all charts, including the SVGs of the HTML report, in one batch
+        # so they are drawn in parallel; the report then finds its charts in the
+        # chart cache
+        charts = visualizer.render_charts(dict.fromkeys(visualizer.default_charts()),
+                                          include_report=args.report_format in ['html', 'all'])
         
         # Generate reports based on format
         if args.report_format in ['text', 'all']:
@@ -81,13 +235,16 @@ def main():
             html_report = visualizer.generate_html_report()
             print(f"HTML report saved to {html_report}")
         
-        # Always generate charts
-        overall_chart = visualizer.plot_overall_comparison()
-        print(f"Overall comparison chart saved to {overall_chart}")
-        
-        task_chart = visualizer.plot_task_type_comparison()
-        if task_chart:
-            print(f"Task type comparison chart saved to {task_chart}")
+        chart_titles = {
+            'models': "Model comparison chart",
+            'overall': "Overall comparison chart",
+            'tasks': "Task type comparison chart",
+            'latency': "Latency histogram",
+            'throughput': "Throughput chart"
+        }
+        for chart, chart_file in charts.items():
+            if chart_file:
+                print(f"{chart_titles[chart]} saved to {chart_file}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
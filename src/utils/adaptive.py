@@ -0,0 +1,192 @@
+import itertools
+import math
+from statistics import NormalDist
+
+
+def score_variance(total, count, population=None, z=1.96):
+    """Estimate the variance of a mean of scores in [0, 1].
+
+    Uses the Agresti-Coull adjusted proportion, which bounds the variance of
+    any scores in [0, 1] and never collapses to zero after a few identical
+    scores, with a finite population correction: a stratum of N tasks is known
+    exactly once all N have been run.
+
+    Args:
+        total: Sum of the scores
+        count: Number of scores
+        population: Number of tasks the scores were sampled from, if finite
+        z: Normal quantile of the interval the variance is used for
+
+    Returns:
+        float: The variance of the mean
+    """
+    adjusted = (total + z * z / 2) / (count + z * z)
+    variance = adjusted * (1 - adjusted) / (count + z * z)
+    if population is not None and population > 1:
+        variance *= max(0, population - count) / (population - 1)
+    return variance
+
+
+def _estimate(strata, z):
+    """Combine (total, count, population) strata into a stratified estimate.
+
+    Strata without a scored sample say nothing about their score and are left
+    out; the estimate then covers the population of the others.
+    """
+    strata = [(total, count, n) for total, count, n in strata if count]
+    population = sum(n for _, _, n in strata)
+    if not population:
+        return {'score': None, 'ci': [0.0, 1.0], 'samples': 0, 'population': 0}
+    score = sum(total / count * n for total, count, n in strata) / population
+    variance = sum(score_variance(total, count, n, z) * (n / population) ** 2 for total, count, n in strata)
+    margin = z * math.sqrt(variance)
+    return {
+        'score': score,
+        'ci': [max(0.0, score - margin), min(1.0, score + margin)],
+        'samples': sum(count for _, count, _ in strata),
+        'population': population
+    }
+
+
+def _stratum_stream(iter_tasks, start, stratum, stratum_of):
+    """Lazily yield the tasks of one stratum, from the first one at position start."""
+    return (task for task in iter_tasks(start) if stratum_of(task) == stratum)
+
+
+def adaptive_map(dispatcher, fn, iter_tasks, categories, key=None, prompt=None, tolerance=0.05,
+                 confidence=0.95, min_samples=10, batch_size=5):
+    """Evaluate a stratified sample of tasks, stopping each stratum once its score is known.
+
+    Tasks are grouped into strata by the values of their category fields. A
+    first pass over the task stream only counts the tasks of each stratum;
+    tasks are then drawn lazily from one stream per stratum, in stream order.
+    Benchmarks derive every task from its own seeded random generator, so the
+    first n tasks of a stratum are a random sample of it. Sampling proceeds in
+    rounds, each running batch_size more tasks from every stratum still open
+    (min_samples, but at most half of the stratum, in the first round) on the
+    dispatcher. A stratum closes once the confidence interval of its mean
+    score is at most tolerance wide on either side, or all of its tasks have
+    run or its stream has none left. Error results (see TaskDispatcher.imap) are kept but do not count as
+    samples.
+
+    Small strata rarely stop early: with the finite population correction, a
+    stratum of 10 tasks needs all 10 to reach +/- 0.05 at 95% confidence. The
+    'tasks_run' and 'population' of the returned sampling show the savings.
+
+    Args:
+        dispatcher: TaskDispatcher the tasks are run on
+        fn: Callable evaluating a task and returning a result with a 'score'
+            in [0, 1]
+        iter_tasks: Callable returning the selected task stream from a given
+                    position in it, such as a benchmark's iter_tasks. It is
+                    called once with position 0 to count the strata, then
+                    once per stratum.
+        categories: Names of the task fields that define the strata
+        key: Optional callable returning a task's journal key (see
+             TaskDispatcher.map)
+        prompt: Optional callable returning a task's prompt, used to order each
+                round by shared prefix (see TaskDispatcher.map)
+        tolerance: Half-width of the confidence interval at which a stratum stops
+        confidence: Confidence level of the intervals
+        min_samples: Tasks run per stratum before it may stop
+        batch_size: Tasks added per open stratum in each later round
+
+    Returns:
+        tuple: (results, sampling) where results lists the results of the tasks
+               that were run, in the order they ran, and sampling holds the
+               stratified 'overall' estimate, an estimate per value of each
+               category under 'categories' and one per stratum under 'strata',
+               each with 'score', 'ci', 'samples' and 'population', and the
+               numbers of tasks run and in the population
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    def stratum_of(task):
+        return tuple(str(task[field]) for field in categories)
+
+    populations, starts = {}, {}
+    for position, task in enumerate(iter_tasks(0)):
+        stratum = stratum_of(task)
+        starts.setdefault(stratum, position)
+        populations[stratum] = populations.get(stratum, 0) + 1
+    streams = {stratum: _stratum_stream(iter_tasks, starts[stratum], stratum, stratum_of)
+               for stratum in populations}
+
+    totals = dict.fromkeys(populations, 0.0)
+    counts = dict.fromkeys(populations, 0)
+    drawn = dict.fromkeys(populations, 0)
+    exhausted = set()
+    floors = {stratum: min(min_samples, math.ceil(n / 2)) for stratum, n in populations.items()}
+    open_strata = list(populations)
+    results = []
+    first_round = True
+    while open_strata:
+        batch = []
+        for stratum in open_strata:
+            size = floors[stratum] if first_round else batch_size
+            tasks = list(itertools.islice(streams[stratum], size))
+            drawn[stratum] += len(tasks)
+            if len(tasks) < size:
+                # The stream holds fewer tasks than counted; never wait on it again
+                exhausted.add(stratum)
+            batch.extend((stratum, task) for task in tasks)
+        batch_results = dispatcher.map(lambda item: fn(item[1]), batch,
+                                       key=(lambda item: key(item[1])) if key else None,
+                                       prompt=(lambda item: prompt(item[1])) if prompt else None)
+        for (stratum, _), result in zip(batch, batch_results):
+            if 'error' in result:
+                continue
+            totals[stratum] += result['score']
+            counts[stratum] += 1
+        results.extend(batch_results)
+
+        still_open = []
+        for stratum in open_strata:
+            count, population = counts[stratum], populations[stratum]
+            if drawn[stratum] >= population or stratum in exhausted:
+                continue
+            margin = z * math.sqrt(score_variance(totals[stratum], count, population, z))
+            if count < floors[stratum] or margin > tolerance:
+                still_open.append(stratum)
+            else:
+                streams[stratum].close()
+        open_strata = still_open
+        first_round = False
+
+    summary = {stratum: (totals[stratum], counts[stratum], populations[stratum]) for stratum in populations}
+    sampling = {
+        'tolerance': tolerance,
+        'confidence': confidence,
+        'tasks_run': sum(drawn.values()),
+        'population': sum(populations.values()),
+        'overall': _estimate(list(summary.values()), z),
+        'categories': {},
+        'strata': {'/'.join(stratum): _estimate([summary[stratum]], z) for stratum in populations}
+    }
+    for i, field in enumerate(categories):
+        values = {}
+        for stratum in populations:
+            values.setdefault(stratum[i], []).append(summary[stratum])
+        sampling['categories'][field] = {value: _estimate(members, z) for value, members in values.items()}
+    return results, sampling
+
+
+def apply_estimates(results, fields):
+    """Replace a benchmark's score averages by the estimates of an adaptive run.
+
+    Strata are sampled at different rates, so plain averages over the tasks
+    that ran would over-weight the strata that needed more samples.
+    Categories without a scored sample keep their plain average.
+
+    Args:
+        results: Benchmark results with a 'sampling' entry from adaptive_map
+        fields: Dict mapping each category field to the key of its scores in
+                results
+    """
+    sampling = results['sampling']
+    if sampling['overall']['score'] is not None:
+        results['overall_score'] = sampling['overall']['score']
+    for field, scores_key in fields.items():
+        for value, estimate in sampling['categories'][field].items():
+            if estimate['score'] is not None:
+                results[scores_key][value] = estimate['score']
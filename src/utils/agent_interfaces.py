@@ -1,15 +1,331 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import threading
 import time
+from collections import deque
+from .concurrency import AdaptiveConcurrency, backoff_delay
+from .dispatch import AgentError
+from .load_balancer import HostPool
+from .telemetry import InferenceTelemetry
+
+# Characters of each message kept in the interface's conversation history
+HISTORY_PREVIEW_CHARS = 200
+
+class OllamaError(requests.exceptions.RequestException):
+    """The server accepted a request but reported an error, e.g. a model failure."""
+
+def _is_retryable(error):
+    """Return whether a failed request may succeed when sent again.
+    
+    Client errors (HTTP 4xx) and errors reported by the model will fail the
+    same way again, except 429, which the server returns when it is
+    overloaded.
+    """
+    if isinstance(error, OllamaError):
+        return False
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
 
 class OllamaInterface:
     """Interface for interacting with Ollama models."""
     
-    def __init__(self, model_name="gemma3:latest", base_url="http://localhost:11434"):
+    def __init__(self, model_name="gemma3:latest", base_url="http://localhost:11434",
+                 pool_size=1, stream=False, connect_timeout=5.0, read_timeout=300.0,
+                 options=None, cache=None, history_size=100, max_retries=3, retry_delay=0.5,
+                 adaptive_concurrency=False):
+        """Initialize the interface.
+        
+        Args:
+            model_name: Name of the Ollama model to query
+            base_url: Base URL of the Ollama server, or a list of base URLs of
+                      servers running the same models to balance requests across
+            pool_size: Number of keep-alive connections to hold open per server;
+                       should match the number of requests dispatched in parallel
+            stream: Whether to request incremental NDJSON output from the server
+            connect_timeout: Seconds to wait for a connection to the server
+            read_timeout: Seconds to wait between bytes of the server's response
+            options: Generation options passed to Ollama (e.g. {"temperature": 0})
+            cache: Optional ResponseCache used to reuse responses across runs
+            history_size: Number of recent messages kept in conversation_history
+            max_retries: Times a failed request is retried, with jittered
+                         exponential backoff, before it is given up
+            retry_delay: Upper bound in seconds of the first backoff delay
+            adaptive_concurrency: Limit the requests in flight with an AIMD
+                                  controller (see AdaptiveConcurrency) that
+                                  probes up to pool_size and backs off when
+                                  the server starts queueing or failing
+        """
         self.model_name = model_name
-        self.base_url = base_url
-        self.api_url = f"{base_url}/api/generate"
-        self.conversation_history = []
+        base_urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.base_url = base_urls[0] if base_urls else None
+        self.stream = stream
+        self.timeout = (connect_timeout, read_timeout)
+        self.options = options
+        self.cache = cache
+        self.telemetry = InferenceTelemetry()
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.limiter = AdaptiveConcurrency(max_limit=pool_size) if adaptive_concurrency else None
+        # Recent (role, truncated content) pairs, kept for debugging only; prompts
+        # are independent, so the history is never sent back to the model
+        self.conversation_history = deque(maxlen=history_size)
+        self._model_digest = None
+        # Final response of each thread's last request, for last_server_time
+        self._local = threading.local()
+        
+        # A single session reuses TCP connections across requests instead of
+        # opening a new one per prompt
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(1, len(base_urls)), pool_maxsize=max(1, pool_size))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Requests go to the least busy of the servers; failed servers are taken
+        # out of rotation (see HostPool)
+        self.hosts = HostPool(base_urls, self.session, health_timeout=connect_timeout)
+    
+    def model_digest(self):
+        """Return the digest of the model weights as reported by the servers.
+        
+        The servers are asked in order until one answers. The lookup is made
+        once per interface, so if none answers, the empty digest is kept
+        rather than asked for again with every cache key.
+        
+        Returns:
+            str: The model digest, or an empty string if it cannot be determined
+        """
+        if self._model_digest is None:
+            models = []
+            for host in self.hosts.hosts:
+                try:
+                    response = self.session.get(f"{host.url}/api/tags", timeout=self.timeout)
+                    response.raise_for_status()
+                    models = response.json().get("models", [])
+                    break
+                except (requests.exceptions.RequestException, ValueError):
+                    continue
+            
+            self._model_digest = ""
+            for model in models:
+                if self.model_name in (model.get("name"), model.get("model")):
+                    self._model_digest = model.get("digest", "")
+                    break
+        return self._model_digest
+    
+    def generate(self, prompt):
+        """Send a prompt to the model and return the server's final response.
+        
+        Args:
+            prompt: The prompt to send
+            
+        Returns:
+            dict: The final response object from Ollama, with the full generated text
+                  under 'response'. In streaming mode 'time_to_first_token' holds the
+                  seconds until the first generated text arrived. Responses served
+                  from the cache have 'cached' set to True.
+            
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_name, self.model_digest(), prompt, self.options)
+            result = self.cache.get(key)
+            if result is not None:
+                result["cached"] = True
+                self.telemetry.record_cached()
+                self._local.last_response = result
+                return result
+        
+        result = self._request("/api/generate", self._generate_data(prompt))
+        
+        # Standalone prompts are never continued, so drop the (large) list of
+        # context tokens instead of keeping it around
+        result.pop("context", None)
+        
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+    
+    def _generate_data(self, prompt, context=None):
+        """Build the body of a generate request."""
+        request_data = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": self.stream
+        }
+        if context:
+            request_data["context"] = context
+        if self.options:
+            request_data["options"] = self.options
+        return request_data
+    
+    def _request(self, path, request_data, host=None):
+        """Send a single request, retrying failures with jittered exponential backoff.
+        
+        Args:
+            path: API path, e.g. '/api/generate'
+            request_data: Body of the request
+            host: Optional base URL of the server to prefer
+        
+        Returns:
+            dict: The final response, with the base URL of the server that
+                  produced it under 'host'
+        
+        Raises:
+            requests.exceptions.RequestException: If the request still fails
+                after max_retries retries, or fails with a client error
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._send(path, request_data, host)
+            except requests.exceptions.RequestException as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+            time.sleep(backoff_delay(attempt, self.retry_delay))
+            attempt += 1
+    
+    def _send(self, path, request_data, host=None):
+        """Send a request to a server and record its timings.
+        
+        The request goes to the least busy healthy server, or to host if it is
+        healthy. If the server fails, it is taken out of rotation and the
+        request is sent to the next one until every server has been tried.
+        Client errors (HTTP 4xx) and errors reported by the model are raised
+        without trying other servers.
+        
+        Raises:
+            requests.exceptions.RequestException: If every server failed
+        """
+        tried = []
+        error = None
+        while True:
+            # Wait for the limiter before picking a server, so requests held
+            # back by it do not count as outstanding on any server
+            token = self.limiter.acquire() if self.limiter else None
+            target = self.hosts.acquire(prefer=host, exclude=tried)
+            if target is None:
+                if self.limiter:
+                    self.limiter.release(token)
+                raise error or requests.exceptions.ConnectionError("No healthy Ollama server available")
+            start_time = time.perf_counter()
+            try:
+                result = self._post(target.url + path, request_data)
+            except OllamaError:
+                # The server is up; the model failed
+                self.hosts.release(target)
+                if self.limiter:
+                    self.limiter.release(token)
+                raise
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code < 500:
+                    # The server is up; 429 means it is overloaded
+                    self.hosts.release(target)
+                    if self.limiter:
+                        self.limiter.release(token, failed=e.response.status_code == 429)
+                    raise
+                error = e
+            except requests.exceptions.RequestException as e:
+                error = e
+            else:
+                wall_time = time.perf_counter() - start_time
+                self.hosts.release(target)
+                if self.limiter:
+                    compute_time = (result.get("prompt_eval_duration", 0) + result.get("eval_duration", 0)) / 1e9
+                    self.limiter.release(token, wait=max(0.0, wall_time - compute_time))
+                self.telemetry.record(result, wall_time, host=target.url)
+                self._local.last_response = result
+                result["host"] = target.url
+                return result
+            
+            self.hosts.release(target, failed=True)
+            if self.limiter:
+                self.limiter.release(token, failed=True)
+            self.telemetry.record_failure(time.perf_counter() - start_time, host=target.url)
+            tried.append(target.url)
+    
+    def last_server_time(self):
+        """Return the server compute time of the calling thread's last request.
+        
+        This is the prompt_eval_duration plus eval_duration reported by Ollama,
+        which, unlike the client-side wall time, excludes time the request spent
+        queued behind others on the server or in the client.
+        
+        Returns:
+            float: Seconds, or None if this thread has not completed a request,
+                   the response came from the cache, or the server did not
+                   report timings
+        """
+        result = getattr(self._local, "last_response", None)
+        if result is None or result.get("cached") or "eval_duration" not in result:
+            return None
+        return (result.get("prompt_eval_duration", 0) + result["eval_duration"]) / 1e9
+    
+    def _post(self, url, request_data):
+        """Send a single generate or chat request to the server.
+        
+        The generated text is returned under 'response' for both endpoints.
+        A stream that is cut short or holds a line that is not JSON raises
+        ChunkedEncodingError, which is retried like a connection failure.
+        """
+        if not self.stream:
+            response = self.session.post(url, json=request_data, timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            if "error" in result:
+                raise OllamaError(result["error"])
+            if "message" in result:
+                result["response"] = result["message"].get("content", "")
+            return result
+        
+        start_time = time.perf_counter()
+        first_token_time = None
+        pieces = []
+        result = {}
+        with self.session.post(url, json=request_data, timeout=self.timeout,
+                               stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Malformed line in response stream: {line[:100]!r}") from None
+                if 'error' in chunk:
+                    raise OllamaError(chunk['error'])
+                
+                piece = chunk.get("response") or chunk.get("message", {}).get("content", "")
+                if piece and first_token_time is None:
+                    first_token_time = time.perf_counter() - start_time
+                pieces.append(piece)
+                
+                if chunk.get("done"):
+                    result = chunk
+                    break
+            else:
+                raise requests.exceptions.ChunkedEncodingError("Response stream ended before the final chunk")
+        
+        result["response"] = "".join(pieces)
+        result["time_to_first_token"] = first_token_time
+        return result
+    
+    def start_session(self, mode="context"):
+        """Start a multi-turn conversation with the model.
+        
+        Args:
+            mode: 'context' to continue from the context tokens returned by
+                  /api/generate, or 'chat' to send the transcript to /api/chat.
+                  Both let the server reuse its KV cache for earlier turns.
+        
+        Returns:
+            ConversationSession: A session whose turns build on each other
+        """
+        return ConversationSession(self, mode=mode)
     
     def solve(self, task_description):
         """Solve a task using the Ollama model.
@@ -19,35 +335,113 @@ class OllamaInterface:
             
         Returns:
             str: The model's solution to the task
+        
+        Raises:
+            AgentError: If the model server could not be reached or kept failing
         """
         # Add the task to conversation history
-        self.conversation_history.append({"role": "user", "content": task_description})
-        
-        # Prepare the request
-        request_data = {
-            "model": self.model_name,
-            "prompt": task_description,
-            "stream": False
-        }
+        self.conversation_history.append(("user", task_description[:HISTORY_PREVIEW_CHARS]))
         
         # Send the request to Ollama
         try:
-            response = requests.post(self.api_url, json=request_data)
-            response.raise_for_status()
-            result = response.json()
+            result = self.generate(task_description)
             
             # Extract the generated response
             solution = result.get("response", "")
             
             # Add the response to conversation history
-            self.conversation_history.append({"role": "assistant", "content": solution})
+            self.conversation_history.append(("assistant", solution[:HISTORY_PREVIEW_CHARS]))
             
             return solution
             
         except requests.exceptions.RequestException as e:
-            print(f"Error communicating with Ollama: {e}")
-            return ""
+            raise AgentError(f"Error communicating with Ollama: {e}") from e
     
     def reset(self):
         """Reset the conversation history."""
-        self.conversation_history = []
\ No newline at end of file
+        self.conversation_history.clear()
+    
+    def close(self):
+        """Close the pooled HTTP connections."""
+        self.session.close()
+
+
+class ConversationSession:
+    """A multi-turn conversation with an Ollama model.
+    
+    Unlike OllamaInterface.solve, where every prompt stands alone, each turn sent
+    through a session follows on from the previous ones. Only the new turn has to
+    be evaluated by the server; earlier turns are reused from its KV cache.
+    """
+    
+    def __init__(self, interface, mode="context"):
+        """Initialize the session.
+        
+        Args:
+            interface: The OllamaInterface whose connections and settings are used
+            mode: 'context' or 'chat' (see OllamaInterface.start_session)
+        """
+        if mode not in ("context", "chat"):
+            raise ValueError(f"Unknown session mode: {mode}")
+        self.interface = interface
+        self.mode = mode
+        self.context = None
+        self.messages = []
+        # Server holding this conversation in its cache
+        self.host = None
+    
+    def generate(self, message):
+        """Send the next turn and return the server's final response.
+        
+        Args:
+            message: The user's next message
+            
+        Returns:
+            dict: The final response object, with the generated text under 'response'
+            
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        interface = self.interface
+        if self.mode == "context":
+            result = interface._request("/api/generate",
+                                        interface._generate_data(message, context=self.context),
+                                        host=self.host)
+            self.context = result.get("context", self.context)
+            self.host = result["host"]
+            return result
+        
+        request_data = {
+            "model": interface.model_name,
+            "messages": self.messages + [{"role": "user", "content": message}],
+            "stream": interface.stream
+        }
+        if interface.options:
+            request_data["options"] = interface.options
+        
+        result = interface._request("/api/chat", request_data, host=self.host)
+        self.host = result["host"]
+        self.messages = request_data["messages"] + [{"role": "assistant", "content": result["response"]}]
+        return result
+    
+    def solve(self, task_description):
+        """Send the next turn and return the model's reply.
+        
+        Args:
+            task_description: The user's next message
+            
+        Returns:
+            str: The model's reply
+        
+        Raises:
+            AgentError: If the model server could not be reached or kept failing
+        """
+        try:
+            return self.generate(task_description).get("response", "")
+        except requests.exceptions.RequestException as e:
+            raise AgentError(f"Error communicating with Ollama: {e}") from e
+    
+    def reset(self):
+        """Forget all previous turns."""
+        self.context = None
+        self.messages = []
\ No newline at end of file
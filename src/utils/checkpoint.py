@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+
+
+class ResultJournal:
+    """Append-only JSONL journal of completed tasks and benchmarks.
+
+    Every finished task and benchmark is written to the journal as soon as it
+    completes, so an interrupted run can be resumed without recomputing any of
+    them. Only the byte offset of each record is kept in memory; stored results
+    are read back from disk when needed.
+    """
+
+    def __init__(self, path, model, resume=False):
+        """Open the journal.
+
+        Args:
+            path: Path of the JSONL journal file
+            model: Name of the model being evaluated
+            resume: Keep the records of a previous run instead of starting over
+
+        Raises:
+            ValueError: If resuming a journal that was written for another model
+        """
+        self.path = path
+        self.model = model
+        self._lock = threading.Lock()
+        self._task_offsets = {}
+        self._benchmark_offsets = {}
+
+        if resume and os.path.exists(path):
+            self._repair(self._index())
+        else:
+            with open(path, 'w') as f:
+                f.write(json.dumps({'kind': 'run', 'model': model}) + '\n')
+
+        self._file = open(path, 'a')
+
+    def _index(self):
+        """Record the offset of every complete record in an existing journal.
+
+        Returns:
+            int: The offset just past the last complete record
+        """
+        end = 0
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                start = offset
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; everything before it is valid
+                    continue
+                end = offset
+
+                if record['kind'] == 'run' and record['model'] != self.model:
+                    raise ValueError(f"Journal {self.path} belongs to model {record['model']}, "
+                                     f"not {self.model}")
+                elif record['kind'] == 'task':
+                    self._task_offsets[record['key']] = start
+                elif record['kind'] == 'benchmark':
+                    self._benchmark_offsets[record['name']] = start
+        return end
+
+    def _repair(self, end):
+        """Cut off a record left incomplete by a crash so new records start on a fresh line."""
+        with open(self.path, 'rb+') as f:
+            f.truncate(end)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+
+    def _append(self, record, offsets, key):
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            offsets[key] = offset
+
+    def _read_at(self, offset):
+        with open(self.path, 'r') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def has_task(self, key):
+        """Check whether a task finished in this or a previous run."""
+        return key in self._task_offsets
+
+    def get_task(self, key):
+        """Return the stored result of a completed task."""
+        return self._read_at(self._task_offsets[key])['result']
+
+    def record_task(self, key, result):
+        """Append a completed task result."""
+        self._append({'kind': 'task', 'key': key, 'result': result}, self._task_offsets, key)
+
+    def has_benchmark(self, name):
+        """Check whether a whole benchmark finished in this or a previous run."""
+        return name in self._benchmark_offsets
+
+    def record_benchmark(self, name, result):
+        """Append a completed benchmark result."""
+        self._append({'kind': 'benchmark', 'name': name, 'result': result}, self._benchmark_offsets, name)
+
+    def iter_benchmarks(self):
+        """Yield (name, result) for every completed benchmark, one at a time."""
+        seen = set()
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record['kind'] == 'benchmark' and record['name'] not in seen:
+                    seen.add(record['name'])
+                    yield record['name'], record['result']
+
+    def close(self):
+        """Close the journal file."""
+        self._file.close()
+
+
+def write_results(journal, output_file, extra=None):
+    """Write the final results file by streaming benchmark results from a journal.
+
+    Only one benchmark result is held in memory at a time.
+
+    Args:
+        journal: The ResultJournal of the run
+        output_file: Path of the results JSON file
+        extra: Optional dict of additional top-level fields
+
+    Returns:
+        float: The overall score across all benchmarks
+    """
+    with open(output_file, 'w') as f:
+        overall_score = _write_model_results(f, journal, extra, indent='')
+        f.write('\n')
+    return overall_score
+
+
+def write_combined_results(journals, output_file, extra=None):
+    """Write one results file covering several models.
+
+    The file has a 'models' object mapping each model name to the same structure
+    write_results produces for a single model.
+
+    Args:
+        journals: ResultJournals of the runs, one per model
+        output_file: Path of the results JSON file
+        extra: Optional dict of additional top-level fields
+
+    Returns:
+        dict: Overall score per model
+    """
+    overall_scores = {}
+    with open(output_file, 'w') as f:
+        f.write('{\n  "models": {')
+        for i, journal in enumerate(journals):
+            f.write(',' if i else '')
+            f.write(f'\n    {json.dumps(journal.model)}: ')
+            overall_scores[journal.model] = _write_model_results(f, journal, indent='    ')
+        f.write('\n  }')
+        for key, value in (extra or {}).items():
+            body = json.dumps(value, indent=2).replace('\n', '\n  ')
+            f.write(f',\n  {json.dumps(key)}: {body}')
+        f.write('\n}\n')
+    return overall_scores
+
+
+def _write_model_results(f, journal, extra=None, indent=''):
+    """Stream one model's results object from its journal into an open file."""
+    total = 0.0
+    count = 0
+
+    f.write('{\n')
+    f.write(f'{indent}  "model": {json.dumps(journal.model)},\n')
+    f.write(f'{indent}  "benchmarks": {{')
+    for name, result in journal.iter_benchmarks():
+        body = json.dumps(result, indent=2).replace('\n', f'\n{indent}    ')
+        f.write(',' if count else '')
+        f.write(f'\n{indent}    {json.dumps(name)}: {body}')
+        total += result['overall_score']
+        count += 1
+    f.write(f'\n{indent}  }},\n' if count else '},\n')
+
+    overall_score = total / count if count else 0.0
+    f.write(f'{indent}  "overall_score": {json.dumps(overall_score)}')
+    for key, value in (extra or {}).items():
+        body = json.dumps(value, indent=2).replace('\n', f'\n{indent}  ')
+        f.write(f',\n{indent}  {json.dumps(key)}: {body}')
+    f.write(f'\n{indent}}}')
+
+    return overall_score
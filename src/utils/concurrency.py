@@ -0,0 +1,124 @@
+import random
+import threading
+
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=30.0, rng=random):
+    """Return the seconds to wait before retrying a failed request.
+
+    Exponential backoff with full jitter: the delay is drawn uniformly up to
+    base_delay * 2 ** attempt (capped at max_delay), so clients that failed
+    together do not retry together.
+
+    Args:
+        attempt: Number of attempts that failed so far, minus one
+        base_delay: Upper bound of the first delay
+        max_delay: Largest upper bound
+        rng: Source of randomness
+    """
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on the number of requests in flight.
+
+    The controller watches how long requests wait before the server starts
+    working on them: the wall time minus the prompt evaluation and generation
+    time the server reports. That wait stays flat while the server has free
+    capacity and grows once requests queue. After every window of completed
+    requests the limit is raised (doubled until the first sign of congestion,
+    then by one), unless the window's mean wait exceeded the smallest wait seen
+    by more than the tolerance or a request failed, in which case the limit is
+    cut by the decrease factor. Requests sent before the last change of the
+    limit do not count towards the next decision.
+    """
+
+    def __init__(self, max_limit, initial_limit=1, decrease=0.5, tolerance=2.0, slack=0.05):
+        """Initialize the controller.
+
+        Args:
+            max_limit: Largest number of requests in flight
+            initial_limit: Number of requests in flight to start with
+            decrease: Factor the limit is multiplied by on congestion
+            tolerance: Mean wait, as a multiple of the smallest wait seen, above
+                       which a window counts as congested
+            slack: Seconds of wait always tolerated on top, so jitter around a
+                   near-zero baseline does not count as congestion
+        """
+        self.max_limit = max(1, max_limit)
+        self.limit = min(self.max_limit, max(1, initial_limit))
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.slack = slack
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._generation = 0
+        self._slow_start = True
+        self._baseline = None
+        self._window = []
+        self._window_failed = False
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {'increases': 0, 'decreases': 0, 'min_limit': self.limit, 'max_limit': self.limit}
+
+    def acquire(self):
+        """Wait until another request may be sent.
+
+        Returns:
+            int: Token to pass to release
+        """
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+            return self._generation
+
+    def release(self, token, wait=None, failed=False):
+        """Report a finished request and adjust the limit.
+
+        Args:
+            token: The value acquire returned for the request
+            wait: Seconds the request waited before the server worked on it
+            failed: Whether the request failed
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if token != self._generation:
+                # Sent under an earlier limit; its outcome was already acted on
+                self._condition.notify_all()
+                return
+            if failed:
+                self._window_failed = True
+            elif wait is not None:
+                self._window.append(wait)
+                self._baseline = wait if self._baseline is None else min(self._baseline, wait)
+
+            if self._window_failed or len(self._window) >= self.limit:
+                congested = self._window_failed or (
+                    self._window and sum(self._window) / len(self._window)
+                    > self._baseline * self.tolerance + self.slack)
+                if congested:
+                    self._slow_start = False
+                    self.limit = max(1, int(self.limit * self.decrease))
+                    self._stats['decreases'] += 1
+                elif self.limit < self.max_limit:
+                    self.limit = min(self.max_limit, self.limit * 2 if self._slow_start else self.limit + 1)
+                    self._stats['increases'] += 1
+                self._stats['min_limit'] = min(self._stats['min_limit'], self.limit)
+                self._stats['max_limit'] = max(self._stats['max_limit'], self.limit)
+                self._generation += 1
+                self._window = []
+                self._window_failed = False
+            self._condition.notify_all()
+
+    def drain(self):
+        """Return the limit and its changes since the last call.
+
+        Returns:
+            dict: Current 'limit', the 'min_limit' and 'max_limit' it reached, and
+                  the numbers of 'increases' and 'decreases'
+        """
+        with self._condition:
+            stats = dict(self._stats, limit=self.limit)
+            self._reset_stats()
+        return stats
@@ -0,0 +1,201 @@
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .prefix_schedule import PREFIX_WINDOW, PrefixScheduler
+
+
+class AgentError(Exception):
+    """An agent could not produce an answer, e.g. because its server kept failing.
+
+    Tasks that raise it are recorded as errors rather than scored as wrong
+    answers (see TaskDispatcher.imap).
+    """
+
+
+class TaskDispatcher:
+    """Shared executor that benchmarks submit their agent calls to.
+
+    A single dispatcher is created per run and handed to every benchmark, so the
+    number of in-flight requests against the model server is bounded by one
+    setting regardless of how many benchmarks are running.
+    """
+
+    def __init__(self, concurrency=1, journal=None, prefix_window=PREFIX_WINDOW):
+        """Initialize the dispatcher.
+
+        Args:
+            concurrency: Maximum number of tasks executed in parallel
+            journal: Optional ResultJournal that completed tasks are checkpointed to
+            prefix_window: Number of pending tasks whose prompts are reordered
+                           together by shared prefix (see PrefixScheduler); 0
+                           sends tasks in input order
+        """
+        self.concurrency = max(1, int(concurrency))
+        self.journal = journal
+        self.scheduler = PrefixScheduler(prefix_window) if prefix_window > 1 else None
+        self._executor = None
+        if self.concurrency > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                                thread_name_prefix='agi-dispatch')
+
+    def map(self, fn, items, key=None, prompt=None):
+        """Apply a function to every item, possibly in parallel.
+
+        Args:
+            fn: Callable taking a single item
+            items: Iterable of items to process
+            key: Optional callable returning a unique, stable id for an item. When
+                 given and the dispatcher has a journal, each result is
+                 checkpointed as it completes and items already in the journal
+                 are not run again.
+            prompt: Optional callable returning the prompt an item sends. When
+                    given, items are run in an order that lets the server reuse
+                    cached prompt prefixes (see PrefixScheduler).
+
+        Returns:
+            list: Results in the same order as the input items
+        """
+        return list(self.imap(fn, items, key=key, prompt=prompt))
+
+    def imap(self, fn, items, key=None, prompt=None):
+        """Lazily apply a function to a stream of items, possibly in parallel.
+
+        Items are pulled from the iterable only as workers free up (at most two
+        per worker ahead of the consumer), so a task stream is never
+        materialized in full.
+
+        Args:
+            fn: Callable taking a single item
+            items: Iterable of items to process
+            key: Optional callable returning a unique, stable id for an item
+                 (see map)
+            prompt: Optional callable returning the prompt an item sends (see map)
+
+        Yields:
+            Results in the same order as the input items. An item whose fn
+            raises AgentError yields {'error': message}, with its key under
+            'task_key' when key is given, and is not checkpointed, so a resumed
+            run retries it.
+        """
+        if prompt is not None and self.scheduler is not None:
+            # Run each window of pending items in prefix order and restore the
+            # input order of their results
+            items = iter(items)
+            while True:
+                window = list(itertools.islice(items, self.scheduler.window))
+                if not window:
+                    return
+                order = self.scheduler.order([prompt(item) for item in window])
+                results = [None] * len(window)
+                for index, result in zip(order, self.imap(fn, [window[i] for i in order], key=key)):
+                    results[index] = result
+                yield from results
+
+        if self.journal is not None and key is not None:
+            fn = self._checkpointed(fn, key)
+        fn = self._guarded(fn, key)
+
+        if self._executor is None:
+            for item in items:
+                yield fn(item)
+            return
+
+        pending = deque()
+        for item in items:
+            pending.append(self._executor.submit(fn, item))
+            if len(pending) >= 2 * self.concurrency:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _checkpointed(self, fn, key):
+        """Wrap fn so results are read from and written to the journal."""
+        journal = self.journal
+
+        def run(item):
+            item_key = key(item)
+            if journal.has_task(item_key):
+                return journal.get_task(item_key)
+            result = fn(item)
+            journal.record_task(item_key, result)
+            return result
+
+        return run
+
+    def _guarded(self, fn, key):
+        """Wrap fn so an AgentError becomes an error result."""
+
+        def run(item):
+            try:
+                return fn(item)
+            except AgentError as e:
+                failure = {'error': str(e)}
+                if key is not None:
+                    failure['task_key'] = key(item)
+                return failure
+
+        return run
+
+    def shutdown(self):
+        """Release the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+def timed_solve(agent_interface, prompt):
+    """Call an agent and measure how long that call took.
+
+    The timer runs inside the worker thread, so the measured time covers only
+    this request and not time spent waiting for a free worker. It uses the
+    monotonic high-resolution clock, which system clock adjustments do not
+    affect.
+
+    Args:
+        agent_interface: An object with a 'solve' method
+        prompt: The task description to send
+
+    Returns:
+        tuple: (solution, elapsed seconds)
+    """
+    start_time = time.perf_counter()
+    solution = agent_interface.solve(prompt)
+    return solution, time.perf_counter() - start_time
+
+
+def server_time(agent_interface):
+    """Return the server compute time of the agent's last call from this thread.
+
+    Call this right after timed_solve, in the same thread. Server time excludes
+    queueing, so it stays comparable across concurrency settings and on shared
+    inference hosts.
+
+    Args:
+        agent_interface: The agent that was called
+
+    Returns:
+        float: Seconds, or None if the agent does not report server timings
+    """
+    last_server_time = getattr(agent_interface, 'last_server_time', None)
+    return last_server_time() if last_server_time else None
+
+
+def split_errors(results):
+    """Separate the error results of TaskDispatcher.map from the scored ones.
+
+    Args:
+        results: List of results
+
+    Returns:
+        tuple: (results without an 'error', results with one)
+    """
+    scored = [result for result in results if 'error' not in result]
+    errors = [result for result in results if 'error' in result]
+    return scored, errors
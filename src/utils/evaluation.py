@@ -1,11 +1,24 @@
+import re
+import string
+from functools import lru_cache
+
+# NumPy is imported inside the batch scoring functions so that importing this
+# module for evaluate_response (as every benchmark does) stays cheap
+
+# Metrics supported by evaluate_batch
+BATCH_METRICS = ['exact_match', 'normalized_exact_match', 'token_overlap', 'token_f1',
+                 'edit_similarity', 'ngram_f1']
+
+_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+
 def evaluate_response(response, expected, metric='exact_match'):
     """Evaluate a response against an expected answer.
-    
+
     Args:
         response: The agent's response
         expected: The expected correct response
         metric: The evaluation metric to use
-    
+
     Returns:
         float: Score between 0.0 and 1.0
     """
@@ -19,8 +32,203 @@ def evaluate_response(response, expected, metric='exact_match'):
             return 0.0
         return len(response_tokens.intersection(expected_tokens)) / len(expected_tokens)
     elif metric == 'execution_result':
-        # For code, evaluate based on execution results
-        # Implementation would execute code and compare outputs
-        pass
+        # For code, run the program against test cases. expected is either a
+        # list of test cases (Python) or {'language': ..., 'tests': [...]}
+        from ..domains.code.sandbox import extract_code, grade_program
+        if isinstance(expected, dict):
+            language, tests = expected.get('language', 'python'), expected['tests']
+        else:
+            language, tests = 'python', expected
+        return grade_program(extract_code(response, language), tests, language)['score']
+    elif metric in BATCH_METRICS:
+        return float(evaluate_batch([response], [expected], metric)[0])
     else:
-        raise ValueError(f"Unknown evaluation metric: {metric}")
\ No newline at end of file
+        raise ValueError(f"Unknown evaluation metric: {metric}")
+
+def evaluate_batch(responses, expecteds, metric='exact_match', n=2):
+    """Evaluate many responses against their expected answers at once.
+
+    Reference answers are tokenized once per distinct text and the scores for
+    the whole batch are computed with array operations, so rescoring large sets
+    of stored responses is fast.
+
+    Args:
+        responses: Sequence of agent responses
+        expecteds: Sequence of expected answers, aligned with responses
+        metric: One of BATCH_METRICS
+        n: N-gram size for the 'ngram_f1' metric
+
+    Returns:
+        numpy.ndarray: Scores between 0.0 and 1.0, one per response
+    """
+    import numpy as np
+    if len(responses) != len(expecteds):
+        raise ValueError("responses and expecteds must have the same length")
+    if metric not in BATCH_METRICS:
+        raise ValueError(f"Unknown evaluation metric: {metric}")
+    if not len(responses):
+        return np.zeros(0)
+
+    if metric == 'exact_match':
+        return np.array([r == e for r, e in zip(responses, expecteds)], dtype=float)
+
+    if metric == 'normalized_exact_match':
+        normalized = {}
+        for text in expecteds:
+            if text not in normalized:
+                normalized[text] = _normalize(text)
+        return np.array([_normalize(r) == normalized[e] for r, e in zip(responses, expecteds)],
+                        dtype=float)
+
+    if metric == 'edit_similarity':
+        return _edit_similarity(responses, expecteds)
+
+    # Token-based metrics work on integer ids shared between responses and references
+    vocabulary = {}
+    if metric == 'ngram_f1':
+        response_ids = [_to_ids(_ngrams(_tokenize(r), n), vocabulary) for r in responses]
+        expected_ids = _intern_references(expecteds, vocabulary, lambda text: _ngrams(_tokenize(text), n))
+    else:
+        response_ids = [_to_ids(_tokenize(r), vocabulary) for r in responses]
+        expected_ids = _intern_references(expecteds, vocabulary, _tokenize)
+
+    if metric == 'token_overlap':
+        # Fraction of distinct expected tokens present in the response
+        common, _, expected_counts = _bag_overlap(response_ids, expected_ids, len(vocabulary), unique=True)
+        return np.divide(common, expected_counts, out=np.zeros(len(common)), where=expected_counts > 0)
+
+    # F1 over token (or n-gram) multisets
+    common, response_counts, expected_counts = _bag_overlap(
+        response_ids, expected_ids, len(vocabulary), unique=False)
+    precision = np.divide(common, response_counts, out=np.zeros(len(common)), where=response_counts > 0)
+    recall = np.divide(common, expected_counts, out=np.zeros(len(common)), where=expected_counts > 0)
+    total = precision + recall
+    return np.divide(2 * precision * recall, total, out=np.zeros(len(common)), where=total > 0)
+
+def _normalize(text):
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return ' '.join(_PUNCTUATION.sub(' ', text.lower()).split())
+
+@lru_cache(maxsize=65536)
+def _tokenize(text):
+    """Split text into lowercase tokens; cached because references repeat."""
+    return tuple(text.lower().split())
+
+def _ngrams(tokens, n):
+    return tuple(zip(*(tokens[i:] for i in range(n))))
+
+def _to_ids(tokens, vocabulary):
+    """Map tokens to integer ids, adding unseen tokens to the vocabulary."""
+    import numpy as np
+    return np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for t in tokens),
+                       dtype=np.int64, count=len(tokens))
+
+def _intern_references(expecteds, vocabulary, tokenize):
+    """Convert expected answers to id arrays, tokenizing each distinct text once."""
+    interned = {}
+    ids = []
+    for text in expecteds:
+        if text not in interned:
+            interned[text] = _to_ids(tokenize(text), vocabulary)
+        ids.append(interned[text])
+    return ids
+
+def _flatten(id_arrays):
+    """Concatenate id arrays and return them with the index of the pair each came from."""
+    import numpy as np
+    lengths = np.fromiter((len(a) for a in id_arrays), dtype=np.int64, count=len(id_arrays))
+    tokens = np.concatenate(id_arrays) if lengths.sum() else np.zeros(0, dtype=np.int64)
+    pairs = np.repeat(np.arange(len(id_arrays)), lengths)
+    return pairs, tokens
+
+def _occurrence_keys(pairs, tokens, vocab_size):
+    """Return sorted (pair, token) keys and the occurrence number of each key within its group."""
+    import numpy as np
+    keys = np.sort(pairs * vocab_size + tokens)
+    if not len(keys):
+        return keys, keys
+    positions = np.arange(len(keys))
+    starts = np.r_[True, keys[1:] != keys[:-1]]
+    group_start = np.maximum.accumulate(np.where(starts, positions, 0))
+    return keys, positions - group_start
+
+def _bag_overlap(response_ids, expected_ids, vocab_size, unique):
+    """Count tokens shared by each response/reference pair.
+
+    With unique=True every token counts once per text (set intersection);
+    otherwise repeated tokens are matched up to the smaller count (multiset
+    intersection). Returns (common, response_counts, expected_counts) arrays.
+    """
+    import numpy as np
+    vocab_size = max(vocab_size, 1)
+    num_pairs = len(response_ids)
+    response_keys, response_occ = _occurrence_keys(*_flatten(response_ids), vocab_size)
+    expected_keys, expected_occ = _occurrence_keys(*_flatten(expected_ids), vocab_size)
+
+    if unique:
+        response_keys = response_keys[response_occ == 0]
+        expected_keys = expected_keys[expected_occ == 0]
+        common_keys = np.intersect1d(response_keys, expected_keys, assume_unique=True)
+        common_pairs = common_keys // vocab_size
+    else:
+        # Tag each key with its occurrence number so the k-th copy of a token
+        # only matches the k-th copy on the other side
+        max_occ = int(max(response_occ.max(initial=0), expected_occ.max(initial=0))) + 1
+        common_keys = np.intersect1d(response_keys * max_occ + response_occ,
+                                     expected_keys * max_occ + expected_occ, assume_unique=True)
+        common_pairs = common_keys // (max_occ * vocab_size)
+
+    common = np.bincount(common_pairs, minlength=num_pairs).astype(float)
+    response_counts = np.bincount(response_keys // vocab_size, minlength=num_pairs).astype(float)
+    expected_counts = np.bincount(expected_keys // vocab_size, minlength=num_pairs).astype(float)
+    return common, response_counts, expected_counts
+
+def _edit_similarity(responses, expecteds, chunk_size=1024):
+    """Return 1 - normalized Levenshtein distance for each pair of strings.
+
+    Pairs are processed in chunks of similar length. Within a chunk the dynamic
+    programming table is filled one row at a time for all pairs together, with
+    the row's insertion step computed as a running minimum.
+    """
+    import numpy as np
+    responses = [_normalize(r) for r in responses]
+    expecteds = [_normalize(e) for e in expecteds]
+    scores = np.zeros(len(responses))
+    order = sorted(range(len(responses)), key=lambda i: (len(expecteds[i]), len(responses[i])))
+
+    for start in range(0, len(order), chunk_size):
+        chunk = order[start:start + chunk_size]
+        rows = [np.frombuffer(expecteds[i].encode('utf-32-le'), dtype=np.uint32) for i in chunk]
+        cols = [np.frombuffer(responses[i].encode('utf-32-le'), dtype=np.uint32) for i in chunk]
+        row_lengths = np.array([len(r) for r in rows])
+        col_lengths = np.array([len(c) for c in cols])
+        width = int(col_lengths.max())
+
+        # Pad with values that never match each other (code points are < 2**21)
+        a = np.full((len(chunk), int(row_lengths.max())), 2 ** 31, dtype=np.int64)
+        b = np.full((len(chunk), width), 2 ** 31 + 1, dtype=np.int64)
+        for k, (r, c) in enumerate(zip(rows, cols)):
+            a[k, :len(r)] = r
+            b[k, :len(c)] = c
+
+        offsets = np.arange(width + 1)
+        index = np.arange(len(chunk))
+        row = np.tile(offsets, (len(chunk), 1))
+        distances = row[index, col_lengths].copy()
+
+        for i in range(1, a.shape[1] + 1):
+            substitution = row[:, :-1] + (a[:, i - 1, None] != b)
+            deletion = row[:, 1:] + 1
+            current = np.empty_like(row)
+            current[:, 0] = i
+            current[:, 1:] = np.minimum(substitution, deletion)
+            row = np.minimum.accumulate(current - offsets, axis=1) + offsets
+
+            done = row_lengths == i
+            distances[done] = row[index[done], col_lengths[done]]
+
+        longest = np.maximum(row_lengths, col_lengths)
+        similarity = np.where(longest > 0, 1 - distances / np.maximum(longest, 1), 1.0)
+        scores[chunk] = similarity
+
+    return scores
@@ -0,0 +1,350 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Per-benchmark metrics kept for every run; the telemetry ones come from the
+# benchmark's 'telemetry' section. Latencies only cover requests the server
+# answered, so cache_hit_rate tells runs served from the response cache apart.
+BENCHMARK_METRICS = ['overall_score', 'requests', 'latency_p50', 'latency_p95', 'latency_p99',
+                     'prompt_tokens_per_sec', 'generation_tokens_per_sec', 'cache_hit_rate']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    overall_score REAL,
+    source TEXT,
+    digest TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    model TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    overall_score REAL,
+    requests INTEGER,
+    latency_p50 REAL,
+    latency_p95 REAL,
+    latency_p99 REAL,
+    prompt_tokens_per_sec REAL,
+    generation_tokens_per_sec REAL,
+    cache_hit_rate REAL,
+    PRIMARY KEY (run_id, benchmark)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    model TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    score REAL,
+    time REAL
+);
+CREATE INDEX IF NOT EXISTS runs_model_timestamp ON runs (model, timestamp);
+CREATE INDEX IF NOT EXISTS runs_timestamp ON runs (timestamp);
+CREATE INDEX IF NOT EXISTS benchmarks_model_benchmark_timestamp ON benchmarks (model, benchmark, timestamp);
+CREATE INDEX IF NOT EXISTS benchmarks_benchmark_timestamp ON benchmarks (benchmark, timestamp);
+CREATE INDEX IF NOT EXISTS tasks_run_benchmark_task ON tasks (run_id, benchmark, task_id);
+CREATE INDEX IF NOT EXISTS tasks_task_timestamp ON tasks (benchmark, task_id, timestamp);
+"""
+
+
+class ResultsStore:
+    """Indexed store of historical benchmark results.
+
+    Every ingested results file adds one run per model, with its benchmark
+    scores and telemetry and its per-task scores, to a SQLite database. Model,
+    benchmark, task id and timestamp are indexed, so score and latency trends
+    and comparisons between runs are answered by queries rather than by
+    loading old results files.
+    """
+
+    def __init__(self, path=os.path.join('.cache', 'history.sqlite3')):
+        """Open (or create) the store.
+
+        Args:
+            path: Path of the SQLite database
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def ingest(self, results, source=None):
+        """Add the runs in a results dict to the store.
+
+        Results that were ingested before are recognized by their content and
+        not added again.
+
+        Args:
+            results: Results as written by the benchmark suite, for one model or
+                     several (with a 'models' object)
+            source: Optional path of the results file, kept for reference
+
+        Returns:
+            list: The run id of each model's results
+        """
+        timestamp = results.get('timestamp')
+        timestamp = datetime.fromisoformat(timestamp).timestamp() if timestamp else datetime.now().timestamp()
+        if 'models' in results:
+            model_results = list(results['models'].items())
+        else:
+            model_results = [(results.get('model', 'Unknown'), results)]
+
+        run_ids = []
+        with self._lock:
+            for model, data in model_results:
+                digest = hashlib.sha256(json.dumps([model, timestamp, data], sort_keys=True,
+                                                   default=str).encode('utf-8')).hexdigest()
+                row = self._conn.execute("SELECT run_id FROM runs WHERE digest = ?", (digest,)).fetchone()
+                if row is not None:
+                    run_ids.append(row['run_id'])
+                    continue
+
+                run_id = self._conn.execute(
+                    "INSERT INTO runs (model, timestamp, overall_score, source, digest) VALUES (?, ?, ?, ?, ?)",
+                    (model, timestamp, data.get('overall_score'), source, digest)).lastrowid
+                for benchmark, benchmark_data in data.get('benchmarks', {}).items():
+                    telemetry = benchmark_data.get('telemetry', {})
+                    metrics = [benchmark_data.get('overall_score')] + [telemetry.get(m) for m in BENCHMARK_METRICS[1:]]
+                    self._conn.execute(
+                        f"INSERT INTO benchmarks (run_id, model, benchmark, timestamp, {', '.join(BENCHMARK_METRICS)}) "
+                        f"VALUES (?, ?, ?, ?{', ?' * len(BENCHMARK_METRICS)})",
+                        [run_id, model, benchmark, timestamp] + metrics)
+                    self._conn.executemany(
+                        "INSERT INTO tasks (run_id, model, benchmark, task_id, timestamp, score, time) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        ((run_id, model, benchmark, str(_task_id(task, index)), timestamp,
+                          task.get('score'), task.get('time'))
+                         for index, task in enumerate(benchmark_data.get('tasks', []))))
+                run_ids.append(run_id)
+            self._conn.commit()
+        return run_ids
+
+    def ingest_file(self, results_file):
+        """Add the runs in a results JSON file to the store; see ingest."""
+        with open(results_file, 'r') as f:
+            results = json.load(f)
+        return self.ingest(results, source=os.path.abspath(results_file))
+
+    def runs(self, model=None, limit=None):
+        """List stored runs, newest first.
+
+        Args:
+            model: Only list runs of this model
+            limit: Maximum number of runs to return
+
+        Returns:
+            list: Dicts with run_id, model, timestamp, overall_score and source
+        """
+        query = "SELECT run_id, model, timestamp, overall_score, source FROM runs"
+        params = []
+        if model is not None:
+            query += " WHERE model = ?"
+            params.append(model)
+        query += " ORDER BY timestamp DESC, run_id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._query(query, params)
+
+    def trend(self, metric='overall_score', model=None, benchmark=None, since=None):
+        """Return the values of a metric over time.
+
+        Args:
+            metric: One of BENCHMARK_METRICS. Without a benchmark only
+                    'overall_score' is available, meaning each run's overall score.
+            model: Only include runs of this model
+            benchmark: Benchmark to report; None reports the run's overall score
+            since: Only include runs at or after this datetime
+
+        Returns:
+            list: Dicts with run_id, model, benchmark, timestamp and value,
+                  oldest first
+        """
+        if metric not in BENCHMARK_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        conditions, params = [], []
+        if benchmark is None:
+            if metric != 'overall_score':
+                raise ValueError(f"Metric '{metric}' needs a benchmark")
+            query = "SELECT run_id, model, NULL AS benchmark, timestamp, overall_score AS value FROM runs"
+        else:
+            query = f"SELECT run_id, model, benchmark, timestamp, {metric} AS value FROM benchmarks"
+            conditions.append("benchmark = ?")
+            params.append(benchmark)
+        if model is not None:
+            conditions.append("model = ?")
+            params.append(model)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since.timestamp())
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp, run_id"
+        return self._query(query, params)
+
+    def compare(self, base_run, new_run, threshold=0.0):
+        """Compare two runs benchmark by benchmark and task by task.
+
+        Args:
+            base_run: Run id of the earlier (reference) run
+            new_run: Run id of the run to check
+            threshold: Minimum score drop counted as a regression
+
+        Returns:
+            dict: 'benchmarks' lists each benchmark's scores, p95 latency and
+                  cache hit rate in both runs with the score delta; 'regressions' lists the
+                  benchmarks whose score dropped by more than threshold, and
+                  'task_regressions' the tasks that did, worst first
+        """
+        for run_id in (base_run, new_run):
+            if not self._query("SELECT 1 FROM runs WHERE run_id = ?", [run_id]):
+                raise ValueError(f"Unknown run: {run_id}")
+
+        scores = {}
+        for run_id, prefix in ((base_run, 'base'), (new_run, 'new')):
+            for row in self._query("SELECT benchmark, overall_score, latency_p95, cache_hit_rate "
+                                   "FROM benchmarks WHERE run_id = ?", [run_id]):
+                entry = scores.setdefault(row['benchmark'], {
+                    'benchmark': row['benchmark'], 'base_score': None, 'new_score': None,
+                    'base_latency_p95': None, 'new_latency_p95': None,
+                    'base_cache_hit_rate': None, 'new_cache_hit_rate': None})
+                entry[f"{prefix}_score"] = row['overall_score']
+                entry[f"{prefix}_latency_p95"] = row['latency_p95']
+                entry[f"{prefix}_cache_hit_rate"] = row['cache_hit_rate']
+        benchmarks = []
+        for name in sorted(scores):
+            entry = scores[name]
+            both = entry['base_score'] is not None and entry['new_score'] is not None
+            entry['delta'] = entry['new_score'] - entry['base_score'] if both else None
+            benchmarks.append(entry)
+        task_regressions = self._query(
+            "SELECT a.benchmark, a.task_id, a.score AS base_score, b.score AS new_score, "
+            "b.score - a.score AS delta "
+            "FROM tasks a JOIN tasks b ON b.run_id = ? AND b.benchmark = a.benchmark AND b.task_id = a.task_id "
+            "WHERE a.run_id = ? AND b.score < a.score - ? "
+            "ORDER BY delta, a.benchmark, a.task_id", [new_run, base_run, threshold])
+        return {
+            'benchmarks': benchmarks,
+            'regressions': [b for b in benchmarks if b['delta'] is not None and b['delta'] < -threshold],
+            'task_regressions': task_regressions
+        }
+
+    def _query(self, query, params):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _task_id(task, index):
+    """Return the id of a task result, falling back to its position."""
+    for field in ('task_id', 'id', 'pair_id', 'episode_id'):
+        if field in task:
+            return task[field]
+    return index
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _format_value(value):
+    return 'n/a' if value is None else f"{value:.2f}"
+
+
+def _format_cached(base_rate, new_rate):
+    """Note how much of either run came from the response cache, if any did."""
+    if not base_rate and not new_rate:
+        return ''
+    return f"  (cached {base_rate or 0:.0%} -> {new_rate or 0:.0%})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='history', description='Query historical benchmark results')
+    parser.add_argument('--db', type=str, default=os.path.join('.cache', 'history.sqlite3'),
+                        help='Path of the history database')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='Add results files to the history')
+    ingest_parser.add_argument('results_files', nargs='+', help='JSON results files')
+
+    runs_parser = commands.add_parser('runs', help='List recorded runs')
+    runs_parser.add_argument('--model', type=str, default=None, help='Only list runs of this model')
+    runs_parser.add_argument('--limit', type=int, default=20, help='Maximum number of runs to list')
+
+    trend_parser = commands.add_parser('trend', help='Show a score or latency trend')
+    trend_parser.add_argument('--metric', type=str, choices=BENCHMARK_METRICS, default='overall_score',
+                              help='Metric to show')
+    trend_parser.add_argument('--model', type=str, default=None, help='Only include runs of this model')
+    trend_parser.add_argument('--benchmark', type=str, default=None,
+                              help='Benchmark to show (default: the overall score of each run)')
+    trend_parser.add_argument('--plot', type=str, default=None, help='Also save a chart to this file')
+
+    compare_parser = commands.add_parser('compare', help='Show regressions between two runs')
+    compare_parser.add_argument('base_run', type=int, help='Run id of the reference run')
+    compare_parser.add_argument('new_run', type=int, help='Run id of the run to check')
+    compare_parser.add_argument('--threshold', type=float, default=0.0,
+                                help='Minimum score drop counted as a regression')
+    compare_parser.add_argument('--max-tasks', type=int, default=20,
+                                help='Maximum number of task regressions to list')
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.db)
+    try:
+        if args.command == 'ingest':
+            for results_file in args.results_files:
+                run_ids = store.ingest_file(results_file)
+                print(f"{results_file}: run(s) {', '.join(str(run_id) for run_id in run_ids)}")
+
+        elif args.command == 'runs':
+            for run in store.runs(model=args.model, limit=args.limit):
+                print(f"{run['run_id']:>6}  {_format_time(run['timestamp'])}  {run['model']:<30} "
+                      f"{_format_value(run['overall_score'])}")
+
+        elif args.command == 'trend':
+            points = store.trend(metric=args.metric, model=args.model, benchmark=args.benchmark)
+            for point in points:
+                print(f"{point['run_id']:>6}  {_format_time(point['timestamp'])}  {point['model']:<30} "
+                      f"{_format_value(point['value'])}")
+            if args.plot:
+                from .visualization import BenchmarkVisualizer
+                chart = BenchmarkVisualizer().plot_history(store, metric=args.metric, model=args.model,
+                                                           benchmark=args.benchmark, output_file=args.plot)
+                print(f"Trend chart saved to {chart}")
+
+        else:
+            comparison = store.compare(args.base_run, args.new_run, threshold=args.threshold)
+            print(f"{'Benchmark':<25} {'Base':>6} {'New':>6} {'Delta':>7}  p95 latency (s)")
+            for row in comparison['benchmarks']:
+                delta = 'n/a' if row['delta'] is None else f"{row['delta']:+.2f}"
+                print(f"{row['benchmark']:<25} {_format_value(row['base_score']):>6} "
+                      f"{_format_value(row['new_score']):>6} {delta:>7}  "
+                      f"{_format_value(row['base_latency_p95'])} -> {_format_value(row['new_latency_p95'])}"
+                      f"{_format_cached(row['base_cache_hit_rate'], row['new_cache_hit_rate'])}")
+            print(f"\n{len(comparison['regressions'])} benchmark regression(s), "
+                  f"{len(comparison['task_regressions'])} task regression(s)")
+            for row in comparison['task_regressions'][:args.max_tasks]:
+                print(f"  {row['benchmark']}: {row['task_id']} {row['base_score']:.2f} -> {row['new_score']:.2f}")
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
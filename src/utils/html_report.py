@@ -0,0 +1,239 @@
+import html
+import json
+import os
+import shutil
+
+# Rows per page of a task table; each page is stored in its own file
+PAGE_SIZE = 500
+
+# Text longer than this is moved out of the task table into a side file that
+# is only loaded when the reader expands it
+INLINE_TEXT_CHARS = 120
+
+_STYLE = """
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        h1, h2, h3 { color: #333; }
+        .chart { margin: 20px 0; text-align: center; }
+        .chart svg { max-width: 100%; height: auto; }
+        table { border-collapse: collapse; width: 100%; }
+        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; vertical-align: top; }
+        th { background-color: #f2f2f2; }
+        tr:nth-child(even) { background-color: #f9f9f9; }
+        .pager { margin: 10px 0; }
+        .pager span { margin: 0 10px; }
+        pre { white-space: pre-wrap; margin: 0; max-height: 400px; overflow: auto; }
+"""
+
+# Task table pages and long texts are loaded by adding <script> tags for their
+# files, which unlike fetch() also works when the report is opened from disk
+_SCRIPT = """
+    var reportChunks = {};
+    function reportChunk(id, data) {
+        var chunk = reportChunks[id];
+        chunk.data = data;
+        chunk.callbacks.forEach(function(callback) { callback(data); });
+        chunk.callbacks = [];
+    }
+    function loadChunk(id, callback) {
+        var chunk = reportChunks[id];
+        if (!chunk) {
+            chunk = reportChunks[id] = {callbacks: []};
+            var script = document.createElement('script');
+            script.src = REPORT_ASSETS + '/' + id + '.js';
+            document.head.appendChild(script);
+        }
+        if (chunk.data !== undefined) {
+            callback(chunk.data);
+        } else {
+            chunk.callbacks.push(callback);
+        }
+    }
+    function textCell(cell, chunkId, key, chars) {
+        var button = document.createElement('button');
+        button.textContent = 'Show (' + chars + ' characters)';
+        button.onclick = function() {
+            loadChunk(chunkId, function(texts) {
+                var pre = document.createElement('pre');
+                pre.textContent = texts[key];
+                cell.replaceChild(pre, button);
+            });
+        };
+        cell.appendChild(button);
+    }
+    function showPage(table, page) {
+        var pages = +table.dataset.pages;
+        page = Math.max(0, Math.min(page, pages - 1));
+        table.dataset.page = page;
+        var id = table.dataset.id;
+        table.closest('.task-table').querySelector('.page-label').textContent =
+            'Page ' + (page + 1) + ' of ' + pages;
+        loadChunk('tasks_' + id + '_' + page, function(rows) {
+            if (+table.dataset.page !== page) {
+                return;
+            }
+            var body = table.tBodies[0];
+            body.textContent = '';
+            rows.forEach(function(row, r) {
+                var tr = body.insertRow();
+                row.forEach(function(value, c) {
+                    var cell = tr.insertCell();
+                    if (value !== null && typeof value === 'object') {
+                        textCell(cell, 'text_' + id + '_' + page, r + ',' + c, value.chars);
+                    } else if (value !== null) {
+                        cell.textContent = value;
+                    }
+                });
+            });
+        });
+    }
+    function turnPage(button, delta) {
+        var table = button.closest('.task-table').querySelector('table.tasks');
+        showPage(table, +table.dataset.page + delta);
+    }
+    document.querySelectorAll('table.tasks').forEach(function(table) { showPage(table, 0); });
+"""
+
+
+class HtmlReportWriter:
+    """Writes an HTML report to disk incrementally.
+
+    The page is streamed to the output file section by section instead of
+    being assembled in memory. Per-task tables are paginated: each page of
+    rows is written to its own script file next to the report, and text too
+    long to show inline (such as generated solutions) goes to a further file
+    per page that is only loaded when the reader expands it. Opening a report
+    with tens of thousands of tasks therefore only loads the summary and the
+    first page of each table.
+    """
+
+    def __init__(self, output_file, title, page_size=PAGE_SIZE):
+        """Open the report and write the page header.
+
+        Args:
+            output_file: Path of the HTML file to write
+            title: Title of the page
+            page_size: Number of rows per page of a task table
+        """
+        self.output_file = output_file
+        self.page_size = page_size
+        # Side files live in a directory named after the report
+        self.assets_dir = os.path.splitext(output_file)[0] + '_files'
+        if os.path.isdir(self.assets_dir):
+            shutil.rmtree(self.assets_dir)
+        os.makedirs(self.assets_dir)
+        self._table_count = 0
+
+        self._file = open(output_file, 'w')
+        self.write(f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{html.escape(title)}</title>
+    <style>{_STYLE}    </style>
+</head>
+<body>
+""")
+
+    def write(self, text):
+        """Append raw HTML to the page."""
+        self._file.write(text)
+
+    def heading(self, text, level=2):
+        self.write(f"    <h{level}>{html.escape(text)}</h{level}>\n")
+
+    def paragraph(self, label, text):
+        """Write a paragraph of the form '<strong>label:</strong> text'."""
+        self.write(f"    <p><strong>{html.escape(label)}:</strong> {html.escape(text)}</p>\n")
+
+    def chart(self, svg_file, title):
+        """Embed an SVG chart file inline."""
+        with open(svg_file, 'r') as f:
+            svg = f.read()
+        # Drop the XML declaration and doctype, which are not allowed inline
+        svg = svg[svg.index('<svg'):]
+        self.write(f'    <div class="chart" title="{html.escape(title)}">\n{svg}\n    </div>\n')
+
+    def table(self, header, rows):
+        """Write a small static table; cells are HTML."""
+        self.write("    <table>\n        <tr>")
+        for cell in header:
+            self.write(f"<th>{html.escape(cell)}</th>")
+        self.write("</tr>\n")
+        for row in rows:
+            self.write("        <tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>\n")
+        self.write("    </table>\n")
+
+    def task_table(self, tasks):
+        """Write a paginated table with one row per task.
+
+        Columns are the union of the task fields in order of first appearance.
+        Only the first page is loaded when the report is opened.
+
+        Args:
+            tasks: List of task result dicts
+        """
+        columns = {}
+        for task in tasks:
+            for field in task:
+                columns.setdefault(field, None)
+        columns = list(columns)
+        table_id = self._table_count
+        self._table_count += 1
+        pages = max(1, -(-len(tasks) // self.page_size))
+
+        for page in range(pages):
+            rows, texts = [], {}
+            for r, task in enumerate(tasks[page * self.page_size:(page + 1) * self.page_size]):
+                row = []
+                for c, field in enumerate(columns):
+                    value = _cell_value(task.get(field))
+                    if isinstance(value, str) and len(value) > INLINE_TEXT_CHARS:
+                        texts[f"{r},{c}"] = value
+                        value = {'chars': len(value)}
+                    row.append(value)
+                rows.append(row)
+            self._write_chunk(f"tasks_{table_id}_{page}", rows)
+            if texts:
+                self._write_chunk(f"text_{table_id}_{page}", texts)
+
+        self.write(f'    <div class="task-table">\n'
+                   f'        <div class="pager"><button onclick="turnPage(this, -1)">Previous</button>'
+                   f'<span class="page-label"></span>'
+                   f'<button onclick="turnPage(this, 1)">Next</button> {len(tasks)} tasks</div>\n'
+                   f'        <table class="tasks" data-id="{table_id}" data-pages="{pages}" data-page="0">\n'
+                   f'            <thead><tr>')
+        for field in columns:
+            self.write(f"<th>{html.escape(str(field))}</th>")
+        self.write("</tr></thead>\n            <tbody></tbody>\n        </table>\n    </div>\n")
+
+    def _write_chunk(self, chunk_id, data):
+        with open(os.path.join(self.assets_dir, f"{chunk_id}.js"), 'w') as f:
+            f.write(f"reportChunk({json.dumps(chunk_id)}, ")
+            json.dump(data, f, separators=(',', ':'))
+            f.write(");\n")
+
+    def close(self):
+        """Write the page footer and close the file."""
+        if self._file.closed:
+            return
+        if self._table_count:
+            assets = json.dumps(os.path.basename(self.assets_dir))
+            self.write(f"    <noscript>Task tables require JavaScript.</noscript>\n"
+                       f"    <script>\n    var REPORT_ASSETS = {assets};{_SCRIPT}    </script>\n")
+        self.write("</body>\n</html>\n")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _cell_value(value):
+    """Convert a task field to a JSON scalar for the task table."""
+    if isinstance(value, float):
+        return round(value, 4)
+    if value is None or isinstance(value, (str, int)):
+        return value
+    return json.dumps(value)
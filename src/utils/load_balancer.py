@@ -0,0 +1,128 @@
+import threading
+import time
+import requests
+
+# Seconds a failed host stays out of rotation before it is health-checked again
+RECHECK_INTERVAL = 30.0
+
+
+class Host:
+    """Routing state of one Ollama server."""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.healthy = True
+        self.down_since = None
+        self.requests = 0
+        self.failures = 0
+
+
+class HostPool:
+    """Balances requests across several Ollama servers serving the same models.
+
+    Each request goes to the healthy host with the fewest requests in flight,
+    so faster hosts, which finish sooner, receive more of the work. A host
+    whose request fails is taken out of rotation and health-checked again
+    after recheck_interval seconds; if every host is down, all of them are
+    checked right away.
+    """
+
+    def __init__(self, urls, session, health_timeout=5.0, recheck_interval=RECHECK_INTERVAL):
+        """Initialize the pool.
+
+        Args:
+            urls: Base URLs of the Ollama servers
+            session: requests.Session used for health checks
+            health_timeout: Seconds to wait for a health check
+            recheck_interval: Seconds before a failed host is checked again
+
+        Raises:
+            ValueError: If no URLs are given
+        """
+        if not urls:
+            raise ValueError("At least one Ollama host is required")
+        self.hosts = [Host(url) for url in urls]
+        self.session = session
+        self.health_timeout = health_timeout
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+
+    def acquire(self, prefer=None, exclude=()):
+        """Pick a host for the next request and count the request against it.
+
+        Args:
+            prefer: URL of a host to use if it is healthy, e.g. the host holding
+                    a conversation's cached context
+            exclude: URLs of hosts not to use, e.g. hosts that already failed
+                     this request
+
+        Returns:
+            Host: The chosen host, or None if no healthy host is left
+        """
+        self._recheck()
+        host = self._choose(prefer, exclude)
+        if host is None and not any(h.healthy for h in self.hosts if h.url not in exclude):
+            # Everything is down; a host may have recovered since it failed
+            self._recheck(force=True)
+            host = self._choose(prefer, exclude)
+        return host
+
+    def _choose(self, prefer, exclude):
+        with self._lock:
+            candidates = [h for h in self.hosts if h.healthy and h.url not in exclude]
+            if not candidates:
+                return None
+            preferred = [h for h in candidates if h.url == prefer]
+            host = preferred[0] if preferred else min(candidates, key=lambda h: (h.outstanding, h.requests))
+            host.outstanding += 1
+            host.requests += 1
+            return host
+
+    def release(self, host, failed=False):
+        """Finish a request acquired from the pool.
+
+        Args:
+            host: The Host returned by acquire
+            failed: Whether the host failed the request; it is then taken out of
+                    rotation
+        """
+        with self._lock:
+            host.outstanding -= 1
+            if failed:
+                host.failures += 1
+                host.healthy = False
+                host.down_since = time.monotonic()
+
+    def _recheck(self, force=False):
+        """Health-check the hosts that are out of rotation and due for a check."""
+        now = time.monotonic()
+        with self._lock:
+            due = [h for h in self.hosts
+                   if not h.healthy and (force or now - h.down_since >= self.recheck_interval)]
+            # Restart the interval so concurrent requests do not check the same host
+            for host in due:
+                host.down_since = now
+        for host in due:
+            if self.check(host):
+                with self._lock:
+                    host.healthy = True
+
+    def check(self, host):
+        """Return whether a host answers its /api/tags endpoint."""
+        try:
+            response = self.session.get(f"{host.url}/api/tags", timeout=self.health_timeout)
+            return response.ok
+        except requests.exceptions.RequestException:
+            return False
+
+    def stats(self):
+        """Return the request and failure counts and health of every host.
+
+        Returns:
+            dict: Per host URL, 'requests', 'failures', 'outstanding' and 'healthy'
+        """
+        with self._lock:
+            return {h.url: {'requests': h.requests, 'failures': h.failures,
+                            'outstanding': h.outstanding, 'healthy': h.healthy}
+                    for h in self.hosts}
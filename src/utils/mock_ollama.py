@@ -0,0 +1,331 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOllamaServer:
+    """Local stand-in for an Ollama server, for exercising the harness offline.
+
+    Implements the /api/generate, /api/chat and /api/tags endpoints used by
+    OllamaInterface, including streaming and the timing fields of the final
+    response. Latency follows a configurable distribution plus a prompt and
+    generation token rate, requests queue for a fixed number of parallel slots,
+    and a fraction of requests can be made to fail. Each slot remembers the
+    tokens of its last prompt so that shared prefixes are reported as cached,
+    like the real server's prompt cache.
+    """
+
+    LATENCY_DISTRIBUTIONS = ['constant', 'uniform', 'exponential', 'lognormal']
+    STREAM_FAULTS = ['truncated', 'malformed']
+
+    def __init__(self, host='127.0.0.1', port=11434, model_name='mock:latest', slots=1,
+                 responses=None, latency='constant', latency_mean=0.05, latency_spread=0.5,
+                 prompt_rate=2000.0, token_rate=50.0, max_response_tokens=64,
+                 error_rate=0.0, stream_fault='truncated', stream_fault_rate=0.0, seed=0):
+        """Initialize the server.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            model_name: Model name reported by /api/tags
+            slots: Number of requests processed in parallel; others queue
+            responses: Scripted responses, either a dict mapping prompts to
+                       responses or a list cycled through in order. Prompts
+                       without a scripted response are echoed back.
+            latency: Distribution of per-request overhead, one of
+                     LATENCY_DISTRIBUTIONS
+            latency_mean: Mean per-request overhead in seconds
+            latency_spread: Spread of the distribution (fraction of the mean for
+                            'uniform', sigma for 'lognormal')
+            prompt_rate: Prompt tokens evaluated per second
+            token_rate: Tokens generated per second
+            max_response_tokens: Maximum number of tokens in an echoed response
+            error_rate: Probability that a request fails with HTTP 500
+            stream_fault: How a broken streamed response fails, one of
+                          STREAM_FAULTS: 'truncated' ends the stream before
+                          the final chunk, 'malformed' sends a line that is
+                          not JSON
+            stream_fault_rate: Probability that a streamed response is broken
+            seed: Seed for the latency and error random number generator
+        """
+        if latency not in self.LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        if stream_fault not in self.STREAM_FAULTS:
+            raise ValueError(f"Unknown stream fault: {stream_fault}")
+
+        self.model_name = model_name
+        self.responses = responses
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_spread = latency_spread
+        self.prompt_rate = prompt_rate
+        self.token_rate = token_rate
+        self.max_response_tokens = max_response_tokens
+        self.error_rate = error_rate
+        self.stream_fault = stream_fault
+        self.stream_fault_rate = stream_fault_rate
+
+        self.request_count = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slot_semaphore = threading.Semaphore(slots)
+        self._free_slots = [[] for _ in range(slots)]
+        self._thread = None
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        """Base URL to pass to OllamaInterface."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _sample(self):
+        """Draw the request overhead, whether the request fails and whether its stream breaks."""
+        with self._lock:
+            self.request_count += 1
+            request_index = self.request_count
+            fail = self._rng.random() < self.error_rate
+            broken = bool(self.stream_fault_rate) and self._rng.random() < self.stream_fault_rate
+
+            if self.latency == 'constant':
+                overhead = self.latency_mean
+            elif self.latency == 'uniform':
+                spread = self.latency_mean * self.latency_spread
+                overhead = self._rng.uniform(self.latency_mean - spread, self.latency_mean + spread)
+            elif self.latency == 'exponential':
+                overhead = self._rng.expovariate(1 / self.latency_mean) if self.latency_mean else 0.0
+            else:
+                # Parametrize so that the distribution's mean is latency_mean
+                sigma = self.latency_spread
+                mu = math.log(self.latency_mean) - sigma ** 2 / 2 if self.latency_mean else 0.0
+                overhead = self._rng.lognormvariate(mu, sigma) if self.latency_mean else 0.0
+        return request_index, max(0.0, overhead), fail, broken
+
+    def _respond_to(self, prompt, request_index):
+        """Return the response text for a prompt."""
+        if isinstance(self.responses, dict) and prompt in self.responses:
+            return self.responses[prompt]
+        if isinstance(self.responses, list) and self.responses:
+            return self.responses[(request_index - 1) % len(self.responses)]
+        return ' '.join(prompt.split()[:self.max_response_tokens])
+
+    def _acquire_slot(self, tokens):
+        """Wait for a free slot, preferring the one whose cache shares the longest prefix."""
+        self._slot_semaphore.acquire()
+        with self._lock:
+            best = max(range(len(self._free_slots)),
+                       key=lambda i: _common_prefix(self._free_slots[i], tokens))
+            cached = self._free_slots.pop(best)
+        return _common_prefix(cached, tokens)
+
+    def _release_slot(self, tokens):
+        """Return a slot, remembering the tokens now held in its cache."""
+        with self._lock:
+            self._free_slots.append(tokens)
+        self._slot_semaphore.release()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path != '/api/tags':
+                    return self._send_json(404, {'error': 'not found'})
+                self._send_json(200, {'models': [{
+                    'name': server.model_name,
+                    'model': server.model_name,
+                    'digest': hashlib.sha256(server.model_name.encode('utf-8')).hexdigest()
+                }]})
+
+            def do_POST(self):
+                if self.path not in ('/api/generate', '/api/chat'):
+                    return self._send_json(404, {'error': 'not found'})
+
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self._send_json(400, {'error': 'invalid JSON'})
+                server._handle(self, body, chat=self.path == '/api/chat')
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_chunk(self, payload):
+                data = (json.dumps(payload) + '\n').encode('utf-8')
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def _handle(self, handler, body, chat):
+        """Simulate one generate or chat request."""
+        start_time = time.perf_counter()
+        request_index, overhead, fail, broken = self._sample()
+
+        if chat:
+            messages = body.get('messages', [])
+            prompt = messages[-1]['content'] if messages else ''
+            tokens = [token for m in messages for token in m.get('content', '').split()]
+        else:
+            prompt = body.get('prompt', '')
+            tokens = list(body.get('context') or []) + prompt.split()
+
+        cached_tokens = self._acquire_slot(tokens)
+        slot_tokens = tokens
+        try:
+            time.sleep(overhead)
+            if fail:
+                return handler._send_json(500, {'error': 'mock server: injected failure'})
+
+            prompt_eval_count = len(tokens) - cached_tokens
+            prompt_eval_duration = prompt_eval_count / self.prompt_rate
+            time.sleep(prompt_eval_duration)
+
+            response_tokens = self._respond_to(prompt, request_index).split(' ')
+            slot_tokens = tokens + response_tokens
+            token_interval = 1 / self.token_rate
+            stream = body.get('stream', True)
+
+            if stream:
+                handler.send_response(200)
+                handler.send_header('Content-Type', 'application/x-ndjson')
+                handler.send_header('Transfer-Encoding', 'chunked')
+                handler.end_headers()
+
+            eval_start = time.perf_counter()
+            for i, token in enumerate(response_tokens):
+                time.sleep(token_interval)
+                if stream:
+                    piece = token if i == 0 else ' ' + token
+                    chunk = {'model': body.get('model'), 'done': False}
+                    if chat:
+                        chunk['message'] = {'role': 'assistant', 'content': piece}
+                    else:
+                        chunk['response'] = piece
+                    handler._send_chunk(chunk)
+                    if broken:
+                        if self.stream_fault == 'malformed':
+                            data = b'{"response": "cut\n'
+                            handler.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                        handler.wfile.write(b"0\r\n\r\n")
+                        return
+            eval_duration = time.perf_counter() - eval_start
+
+            text = ' '.join(response_tokens)
+            final = {
+                'model': body.get('model'),
+                'done': True,
+                'total_duration': int((time.perf_counter() - start_time) * 1e9),
+                'load_duration': 0,
+                'prompt_eval_count': prompt_eval_count,
+                'prompt_eval_duration': int(prompt_eval_duration * 1e9),
+                'eval_count': len(response_tokens),
+                'eval_duration': int(eval_duration * 1e9)
+            }
+            if chat:
+                final['message'] = {'role': 'assistant', 'content': '' if stream else text}
+            else:
+                final['response'] = '' if stream else text
+                final['context'] = tokens + response_tokens
+
+            if stream:
+                handler._send_chunk(final)
+                handler.wfile.write(b"0\r\n\r\n")
+            else:
+                handler._send_json(200, final)
+        finally:
+            self._release_slot(slot_tokens)
+
+
+def _common_prefix(a, b):
+    """Return the length of the common prefix of two token lists."""
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a mock Ollama server for offline load testing')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=11434, help='Port to listen on')
+    parser.add_argument('--model', type=str, default='mock:latest', help='Model name to report')
+    parser.add_argument('--slots', type=int, default=1, help='Number of requests served in parallel')
+    parser.add_argument('--responses', type=str, default=None,
+                        help='JSON file with scripted responses (object of prompt -> response, or a list)')
+    parser.add_argument('--latency', type=str, choices=MockOllamaServer.LATENCY_DISTRIBUTIONS,
+                        default='constant', help='Distribution of per-request overhead')
+    parser.add_argument('--latency-mean', type=float, default=0.05, help='Mean per-request overhead in seconds')
+    parser.add_argument('--latency-spread', type=float, default=0.5, help='Spread of the latency distribution')
+    parser.add_argument('--prompt-rate', type=float, default=2000.0, help='Prompt tokens evaluated per second')
+    parser.add_argument('--token-rate', type=float, default=50.0, help='Tokens generated per second')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--stream-fault', type=str, choices=MockOllamaServer.STREAM_FAULTS,
+                        default='truncated', help='How broken streamed responses fail')
+    parser.add_argument('--stream-fault-rate', type=float, default=0.0,
+                        help='Fraction of streamed responses that break')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses, 'r') as f:
+            responses = json.load(f)
+
+    server = MockOllamaServer(host=args.host, port=args.port, model_name=args.model, slots=args.slots,
+                              responses=responses, latency=args.latency, latency_mean=args.latency_mean,
+                              latency_spread=args.latency_spread, prompt_rate=args.prompt_rate,
+                              token_rate=args.token_rate, error_rate=args.error_rate,
+                              stream_fault=args.stream_fault, stream_fault_rate=args.stream_fault_rate,
+                              seed=args.seed)
+    print(f"Mock Ollama server listening on {server.url} with {args.slots} slot(s)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
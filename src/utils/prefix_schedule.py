@@ -0,0 +1,134 @@
+import threading
+
+# Number of pending prompts reordered together by default
+PREFIX_WINDOW = 64
+
+
+def tokenize(prompt):
+    """Split a prompt into the units prefixes are compared in.
+
+    Whitespace-separated words stand in for the model's tokens: two prompts
+    that share their first n words share roughly that many tokens.
+    """
+    return prompt.split()
+
+
+def common_prefix_length(a, b):
+    """Return the length of the common prefix of two token lists."""
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def _chain_shared(last, sequence):
+    """Sum the prefix tokens each prompt in a sequence shares with the one before it.
+
+    Returns:
+        tuple: (shared tokens, tokens of the last prompt)
+    """
+    shared = 0
+    for tokens in sequence:
+        shared += common_prefix_length(last, tokens)
+        last = tokens
+    return shared, last
+
+
+class PromptTrie:
+    """Trie over prompt tokens whose traversal groups prompts by shared prefix.
+
+    Values are stored at the node their prompt ends at. A depth-first walk
+    visits every prompt below a node before moving on, so prompts sharing a
+    prefix come out next to each other, and the longer the shared prefix the
+    closer together they are.
+    """
+
+    def __init__(self):
+        # Children are keyed by token; None holds the values ending here
+        self.root = {}
+
+    def insert(self, tokens, value):
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(value)
+
+    def __iter__(self):
+        """Yield the values in depth-first order, children in insertion order."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield from node.get(None, ())
+            stack.extend(child for token, child in reversed(list(node.items())) if token is not None)
+
+
+class PrefixScheduler:
+    """Orders pending prompts so that consecutive requests share long prefixes.
+
+    The model server keeps the prompt it last evaluated in its KV cache and
+    only evaluates the part of the next prompt that differs. Prompts from one
+    benchmark often share long instructions, but in generation order they
+    alternate between task types and lose most of that reuse. The scheduler
+    takes the prompts of a window of pending tasks and returns the order of a
+    walk over their trie. It also counts the prefix words consecutive prompts
+    share in that order and in the original order. These are estimates from
+    whitespace-separated words, not measurements; the prompt tokens the server
+    actually evaluated are in the telemetry (prompt_eval_count).
+    """
+
+    def __init__(self, window=PREFIX_WINDOW):
+        """Initialize the scheduler.
+
+        Args:
+            window: Number of pending prompts reordered together
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._last_scheduled = []
+        self._last_original = []
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {'prompts': 0, 'prompt_words': 0, 'shared_prefix_words': 0,
+                       'baseline_shared_prefix_words': 0}
+
+    def order(self, prompts):
+        """Return the order in which to send a window of prompts.
+
+        Args:
+            prompts: List of prompt strings
+
+        Returns:
+            list: Indices into prompts
+        """
+        tokens = [tokenize(prompt) for prompt in prompts]
+        trie = PromptTrie()
+        for index, prompt_tokens in enumerate(tokens):
+            trie.insert(prompt_tokens, index)
+        order = list(trie)
+
+        with self._lock:
+            shared, self._last_scheduled = _chain_shared(self._last_scheduled, [tokens[i] for i in order])
+            baseline, self._last_original = _chain_shared(self._last_original, tokens)
+            self._stats['prompts'] += len(prompts)
+            self._stats['prompt_words'] += sum(len(t) for t in tokens)
+            self._stats['shared_prefix_words'] += shared
+            self._stats['baseline_shared_prefix_words'] += baseline
+        return order
+
+    def drain(self):
+        """Return the counts since the last call and start new ones.
+
+        Returns:
+            dict: Numbers of prompts and prompt words, of prefix words shared
+                  between consecutive prompts in scheduled and in original order,
+                  and the difference as 'estimated_shared_prefix_words'
+        """
+        with self._lock:
+            stats = self._stats
+            self._reset_stats()
+        stats['estimated_shared_prefix_words'] = (stats['shared_prefix_words']
+                                                  - stats['baseline_shared_prefix_words'])
+        return stats
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """Persistent on-disk cache of model responses.
+
+    Entries are keyed by a hash of everything that determines a completion
+    (model name, model digest, prompt and generation options) and stored in a
+    SQLite database. When the cache grows beyond its size bound, the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir, max_entries=100000):
+        """Open (or create) the cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            max_entries: Maximum number of responses to keep
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'responses.sqlite3')
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # The dispatcher calls into the cache from several threads, so share
+        # one connection and serialize access to it
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, last_access REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model_name, model_digest, prompt, options=None):
+        """Build the content address for a request.
+
+        Args:
+            model_name: Name of the model
+            model_digest: Digest of the model weights, so a re-pulled model misses
+            prompt: The prompt text
+            options: Generation options sent with the request
+
+        Returns:
+            str: Hex SHA-256 digest identifying the request
+        """
+        payload = json.dumps([model_name, model_digest, prompt, options or {}], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Look up a cached response.
+
+        Args:
+            key: Key produced by make_key
+
+        Returns:
+            dict: The cached response, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        """Store a response, evicting least recently used entries if needed.
+
+        Args:
+            key: Key produced by make_key
+            response: JSON-serializable response object
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO responses (key, response, last_access) VALUES (?, ?, ?)",
+                (key, json.dumps(response), time.time()))
+            self._entries += cursor.rowcount
+
+            excess = self._entries - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access LIMIT ?)", (excess,))
+                self._entries -= excess
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters for this run.
+
+        Returns:
+            dict: Hits, misses, hit rate and number of stored entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self._entries
+        }
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
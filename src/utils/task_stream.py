@@ -0,0 +1,56 @@
+import itertools
+import random
+
+
+def parse_shard(spec):
+    """Parse a shard specification of the form 'i/n'.
+
+    Args:
+        spec: String such as '0/4' selecting the first of four shards
+
+    Returns:
+        tuple: (index, count)
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected the form i/n") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}', need 0 <= i < n")
+    return index, count
+
+
+def select_tasks(tasks, start=0, limit=None, shard=None):
+    """Lazily select the tasks a run should process.
+
+    Args:
+        tasks: Iterable of tasks in generation order
+        start: Number of selected tasks to skip, i.e. positions in the stream
+               after shard and limit are applied
+        limit: Maximum number of tasks to select
+        shard: Optional (index, count); only tasks whose position modulo count
+               equals index are selected, so n machines can split a suite
+
+    Returns:
+        iterator: The selected tasks
+    """
+    selected = iter(tasks)
+    if shard is not None:
+        index, count = shard
+        selected = (task for position, task in enumerate(selected) if position % count == index)
+    if limit is not None:
+        selected = itertools.islice(selected, limit)
+    return itertools.islice(selected, start, None)
+
+
+def task_rng(seed, index):
+    """Return the random number generator for the task at a given position.
+
+    Every task gets its own generator derived from the benchmark seed and its
+    position, so any task can be regenerated without generating the ones
+    before it, and a resumed or sharded run sees exactly the same tasks.
+    """
+    return random.Random(f"{seed}:{index}")
@@ -0,0 +1,163 @@
+import bisect
+import math
+import threading
+
+# Duration fields Ollama reports in nanoseconds on every generate response
+DURATION_FIELDS = ['total_duration', 'load_duration', 'prompt_eval_duration', 'eval_duration']
+COUNT_FIELDS = ['prompt_eval_count', 'eval_count']
+
+# Upper edges in milliseconds of the request latency histogram buckets; a last
+# bucket counts everything slower. Fixed edges keep the results size constant
+# however many requests a benchmark makes, and let histograms be compared and
+# summed across runs.
+LATENCY_BUCKETS_MS = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 60000, 120000, 300000]
+
+
+class InferenceTelemetry:
+    """Thread-safe collector of per-request inference timings.
+
+    OllamaInterface records one entry per request sent to the server, combining
+    the client-side wall time with the timing fields Ollama returns. Entries are
+    drained after each benchmark and summarized into its results.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = []
+
+    def record(self, response, wall_time, host=None):
+        """Record one completed request.
+
+        Args:
+            response: The final response object returned by Ollama
+            wall_time: Seconds between sending the request and receiving the response
+            host: Base URL of the server that answered
+        """
+        record = {'wall_time': wall_time, 'host': host}
+        for field in DURATION_FIELDS:
+            record[field] = response.get(field, 0) / 1e9
+        for field in COUNT_FIELDS:
+            record[field] = response.get(field, 0)
+        if response.get('time_to_first_token') is not None:
+            record['time_to_first_token'] = response['time_to_first_token']
+
+        with self._lock:
+            self._records.append(record)
+
+    def record_failure(self, wall_time, host=None):
+        """Record a request that failed.
+
+        Args:
+            wall_time: Seconds between sending the request and the failure
+            host: Base URL of the server the request was sent to
+        """
+        with self._lock:
+            self._records.append({'wall_time': wall_time, 'host': host, 'failed': True})
+
+    def record_cached(self):
+        """Record a request answered from the response cache without reaching a server."""
+        with self._lock:
+            self._records.append({'cached': True})
+
+    def drain(self):
+        """Return all recorded entries and start a new collection period.
+
+        Returns:
+            list: The recorded entries
+        """
+        with self._lock:
+            records, self._records = self._records, []
+        return records
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def latency_histogram(latencies):
+    """Count latencies into the LATENCY_BUCKETS_MS buckets.
+
+    Args:
+        latencies: Latencies in seconds
+
+    Returns:
+        dict: 'bucket_ms' (the upper bucket edges) and 'counts', with one more
+              count than edges for latencies above the last edge
+    """
+    counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for latency in latencies:
+        counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency * 1000)] += 1
+    return {'bucket_ms': list(LATENCY_BUCKETS_MS), 'counts': counts}
+
+
+def summarize(records):
+    """Aggregate telemetry entries into latency and throughput statistics.
+
+    Args:
+        records: Entries returned by InferenceTelemetry.drain
+
+    Returns:
+        dict: Request count, latency percentiles (seconds), prompt and generation
+              tokens per second, model load time and a latency histogram (see
+              latency_histogram) for plotting. Responses served from the cache are
+              only counted, under 'cached_requests' and 'cache_hit_rate';
+              latency and throughput cover requests the server answered and are
+              None if there were none. When requests went to several servers,
+              'hosts' holds the request and failure counts and latency
+              percentiles of each.
+    """
+    cached = [r for r in records if r.get('cached')]
+    failed = [r for r in records if r.get('failed')]
+    records = [r for r in records if not r.get('failed') and not r.get('cached')]
+    latencies = [r['wall_time'] for r in records]
+    prompt_tokens = sum(r['prompt_eval_count'] for r in records)
+    prompt_time = sum(r['prompt_eval_duration'] for r in records)
+    generated_tokens = sum(r['eval_count'] for r in records)
+    generation_time = sum(r['eval_duration'] for r in records)
+    load_times = [r['load_duration'] for r in records]
+
+    summary = {
+        'requests': len(records),
+        'failed_requests': len(failed),
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+        'prompt_tokens': prompt_tokens,
+        'generated_tokens': generated_tokens,
+        'prompt_tokens_per_sec': prompt_tokens / prompt_time if prompt_time else 0.0,
+        'generation_tokens_per_sec': generated_tokens / generation_time if generation_time else 0.0,
+        'load_time_total': sum(load_times),
+        'load_time_max': max(load_times, default=0.0),
+        'cached_requests': len(cached),
+        'cache_hit_rate': len(cached) / (len(cached) + len(records)) if cached else 0.0,
+        'latency_histogram': latency_histogram(latencies)
+    }
+    if not records:
+        # Nothing was measured; zeros would read as a fast run
+        for field in ('latency_p50', 'latency_p95', 'latency_p99', 'prompt_tokens_per_sec',
+                      'generation_tokens_per_sec'):
+            summary[field] = None
+
+    first_token_times = [r['time_to_first_token'] for r in records if 'time_to_first_token' in r]
+    if first_token_times:
+        summary['time_to_first_token_p50'] = percentile(first_token_times, 50)
+        summary['time_to_first_token_p95'] = percentile(first_token_times, 95)
+
+    hosts = {r.get('host') for r in records + failed}
+    if len(hosts) > 1:
+        summary['hosts'] = {}
+        for host in sorted(hosts, key=str):
+            host_latencies = [r['wall_time'] for r in records if r.get('host') == host]
+            summary['hosts'][host] = {
+                'requests': len(host_latencies),
+                'failures': sum(1 for r in failed if r.get('host') == host),
+                'latency_p50': percentile(host_latencies, 50),
+                'latency_p95': percentile(host_latencies, 95)
+            }
+
+    return summary
@@ -1,8 +1,30 @@
-import matplotlib.pyplot as plt
+import argparse
+import hashlib
+import html
+import multiprocessing
 import numpy as np
 import os
 import json
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from .html_report import PAGE_SIZE, HtmlReportWriter
+
+# Chart name -> prefix of the default output file name
+CHART_FILES = {
+    'overall': 'overall_comparison',
+    'tasks': 'task_comparison',
+    'models': 'model_comparison',
+    'latency': 'latency_histogram',
+    'throughput': 'throughput',
+    'history': 'history'
+}
+
+# Part of every chart's cache key; bump it when the way charts are drawn changes
+CHART_VERSION = 1
+
+# Cached chart images live in this subdirectory of the output directory
+CHART_CACHE_DIR = '.chart_cache'
 
 class BenchmarkVisualizer:
     """Visualizer for AGI benchmark results.
@@ -11,12 +33,15 @@ class BenchmarkVisualizer:
     from benchmark results.
     """
     
-    def __init__(self, results_file=None, results_data=None):
+    def __init__(self, results_file=None, results_data=None, output_dir='reports', cache_dir=None):
         """Initialize the visualizer with either a results file or data.
         
         Args:
             results_file: Path to a JSON file containing benchmark results
             results_data: Dictionary containing benchmark results
+            output_dir: Directory to write reports and charts into
+            cache_dir: Directory of cached chart images (default: a
+                       subdirectory of output_dir)
         """
         self.results = None
         
@@ -25,269 +50,648 @@ class BenchmarkVisualizer:
                 self.results = json.load(f)
         elif results_data:
             self.results = results_data
-            
-        self.output_dir = 'reports'
-        os.makedirs(self.output_dir, exist_ok=True)
         
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir or os.path.join(output_dir, CHART_CACHE_DIR)
+        os.makedirs(self.output_dir, exist_ok=True)
+    
     def generate_summary_report(self, output_file=None):
         """Generate a text summary report of benchmark results.
         
         Args:
             output_file: Path to save the report (default: reports/summary_YYYY-MM-DD.txt)
-            
+        
         Returns:
             str: Path to the generated report file
         """
         if not self.results:
             raise ValueError("No results data available")
-            
+        
         if not output_file:
             timestamp = datetime.now().strftime("%Y-%m-%d")
             output_file = os.path.join(self.output_dir, f"summary_{timestamp}.txt")
-            
+        
         with open(output_file, 'w') as f:
             f.write(f"AGI Benchmark Suite - Results Summary\n")
             f.write(f"=====================================\n\n")
-            f.write(f"Model: {self.results.get('model', 'Unknown')}\n")
-            f.write(f"Overall Score: {self.results.get('overall_score', 0):.2f}\n\n")
             
-            f.write(f"Benchmark Scores:\n")
-            f.write(f"----------------\n")
-            
-            for name, data in self.results.get('benchmarks', {}).items():
-                f.write(f"{name}: {data.get('overall_score', 0):.2f}\n")
+            for model, results in self._model_results():
+                f.write(f"Model: {model}\n")
+                f.write(f"Overall Score: {results.get('overall_score', 0):.2f}\n\n")
                 
-                # Add detailed metrics if available
-                if 'transfer_efficiency' in data:
-                    f.write(f"  Transfer Efficiency: {data.get('transfer_efficiency', 0):.2f}\n")
-                if 'decay_rate' in data:
-                    f.write(f"  Memory Decay Rate: {data.get('decay_rate', 0):.2f}\n")
-                    
-                # Add task-specific scores
-                if 'task_type_scores' in data:
-                    f.write(f"  Task Type Scores:\n")
-                    for task_type, score in data['task_type_scores'].items():
-                        f.write(f"    {task_type}: {score:.2f}\n")
-                        
-                f.write("\n")
+                f.write(f"Benchmark Scores:\n")
+                f.write(f"----------------\n")
                 
+                for name, data in results.get('benchmarks', {}).items():
+                    f.write(f"{name}: {data.get('overall_score', 0):.2f}\n")
+                    
+                    # Add detailed metrics if available
+                    if 'transfer_efficiency' in data:
+                        f.write(f"  Transfer Efficiency: {data.get('transfer_efficiency', 0):.2f}\n")
+                    if 'decay_rate' in data:
+                        f.write(f"  Memory Decay Rate: {data.get('decay_rate', 0):.2f}\n")
+                    
+                    # Add task-specific scores
+                    if 'task_type_scores' in data:
+                        f.write(f"  Task Type Scores:\n")
+                        for task_type, score in data['task_type_scores'].items():
+                            f.write(f"    {task_type}: {score:.2f}\n")
+                    
+                    # Add inference telemetry
+                    telemetry = data.get('telemetry', {})
+                    if telemetry.get('requests'):
+                        f.write(f"  Requests: {telemetry['requests']}\n")
+                        f.write(f"  Latency p50/p95/p99: {telemetry['latency_p50']:.2f}s / "
+                                f"{telemetry['latency_p95']:.2f}s / {telemetry['latency_p99']:.2f}s\n")
+                        f.write(f"  Prompt Throughput: {telemetry['prompt_tokens_per_sec']:.1f} tokens/s\n")
+                        f.write(f"  Generation Throughput: {telemetry['generation_tokens_per_sec']:.1f} tokens/s\n")
+                        f.write(f"  Model Load Time: {telemetry['load_time_total']:.2f}s\n")
+                        for host, host_stats in telemetry.get('hosts', {}).items():
+                            f.write(f"  Host {host}: {host_stats['requests']} requests, "
+                                    f"{host_stats['failures']} failures, p50/p95 "
+                                    f"{host_stats['latency_p50']:.2f}s / {host_stats['latency_p95']:.2f}s\n")
+                    
+                    f.write("\n")
+        
         return output_file
     
+    def is_multi_model(self):
+        """Return True if the results compare several models."""
+        return bool(self.results) and 'models' in self.results
+    
+    def _model_results(self):
+        """Return (model name, results) pairs for single- and multi-model results."""
+        if self.is_multi_model():
+            return list(self.results['models'].items())
+        return [(self.results.get('model', 'Unknown'), self.results)]
+    
+    def plot_model_comparison(self, output_file=None):
+        """Generate a grouped bar chart comparing models side by side on each benchmark.
+        
+        Args:
+            output_file: Path to save the chart (default: reports/model_comparison_YYYY-MM-DD.png)
+        
+        Returns:
+            str: Path to the generated chart file
+        """
+        return self.render_charts({'models': output_file})['models']
+    
     def plot_overall_comparison(self, output_file=None):
         """Generate a bar chart comparing overall benchmark scores.
         
         Args:
             output_file: Path to save the chart (default: reports/overall_comparison_YYYY-MM-DD.png)
-            
+        
         Returns:
             str: Path to the generated chart file
         """
-        if not self.results:
-            raise ValueError("No results data available")
-            
-        if not output_file:
-            timestamp = datetime.now().strftime("%Y-%m-%d")
-            output_file = os.path.join(self.output_dir, f"overall_comparison_{timestamp}.png")
-        
-        benchmark_names = []
-        scores = []
-        
-        for name, data in self.results.get('benchmarks', {}).items():
-            benchmark_names.append(name)
-            scores.append(data.get('overall_score', 0))
-            
-        plt.figure(figsize=(10, 6))
-        bars = plt.bar(benchmark_names, scores, color='skyblue')
-        
-        # Add score labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height + 0.02,
-                    f'{height:.2f}', ha='center', va='bottom')
+        return self.render_charts({'overall': output_file})['overall']
+    
+    def plot_task_type_comparison(self, output_file=None):
+        """Generate a grouped bar chart comparing task type scores across benchmarks.
         
-        plt.axhline(y=self.results.get('overall_score', 0), color='r', linestyle='-', 
-                   label=f"Overall: {self.results.get('overall_score', 0):.2f}")
+        Args:
+            output_file: Path to save the chart (default: reports/task_comparison_YYYY-MM-DD.png)
         
-        plt.ylim(0, 1.1)  # Assuming scores are between 0 and 1
-        plt.title(f"AGI Benchmark Results - {self.results.get('model', 'Unknown')}")
-        plt.ylabel('Score')
-        plt.legend()
-        plt.tight_layout()
+        Returns:
+            str: Path to the generated chart file, or None if no task type scores were recorded
+        """
+        return self.render_charts({'tasks': output_file})['tasks']
+    
+    def _telemetry_by_benchmark(self):
+        """Return (label, telemetry) pairs for every benchmark with recorded requests."""
+        multi_model = self.is_multi_model()
+        entries = []
+        for model, results in self._model_results():
+            for name, data in results.get('benchmarks', {}).items():
+                telemetry = data.get('telemetry', {})
+                if telemetry.get('requests'):
+                    label = f"{model}: {name}" if multi_model else name
+                    entries.append((label, telemetry))
+        return entries
+    
+    def plot_latency_histogram(self, output_file=None):
+        """Generate a histogram of request latencies for each benchmark.
         
-        plt.savefig(output_file)
-        plt.close()
+        Args:
+            output_file: Path to save the chart (default: reports/latency_histogram_YYYY-MM-DD.png)
         
-        return output_file
+        Returns:
+            str: Path to the generated chart file, or None if no telemetry was recorded
+        """
+        return self.render_charts({'latency': output_file})['latency']
     
-    def plot_task_type_comparison(self, output_file=None):
-        """Generate a grouped bar chart comparing task type scores across benchmarks.
+    def plot_throughput(self, output_file=None):
+        """Generate a bar chart of prompt and generation throughput per benchmark.
         
         Args:
-            output_file: Path to save the chart (default: reports/task_comparison_YYYY-MM-DD.png)
-            
+            output_file: Path to save the chart (default: reports/throughput_YYYY-MM-DD.png)
+        
         Returns:
-            str: Path to the generated chart file
+            str: Path to the generated chart file, or None if no telemetry was recorded
         """
-        if not self.results:
-            raise ValueError("No results data available")
-            
-        if not output_file:
-            timestamp = datetime.now().strftime("%Y-%m-%d")
-            output_file = os.path.join(self.output_dir, f"task_comparison_{timestamp}.png")
+        return self.render_charts({'throughput': output_file})['throughput']
+    
+    def default_charts(self):
+        """Return the names of the charts that apply to these results."""
+        if self.is_multi_model():
+            return ['models', 'latency', 'throughput']
+        return ['overall', 'tasks', 'latency', 'throughput']
+    
+    def report_charts(self):
+        """Return the names of the charts shown in the HTML report."""
+        return ['models'] if self.is_multi_model() else ['overall', 'tasks']
+    
+    def render_charts(self, charts, max_workers=None, include_report=False):
+        """Render several charts, reusing cached images and drawing the rest in parallel.
         
-        # Collect all task types across benchmarks
-        all_task_types = set()
-        for data in self.results.get('benchmarks', {}).values():
-            if 'task_type_scores' in data:
-                all_task_types.update(data['task_type_scores'].keys())
+        Every chart is cached under the cache directory by a hash of the data it
+        is drawn from, so only charts whose data changed are redrawn; the others
+        are copied from the cache. Charts that need drawing are rendered on a
+        pool of worker processes.
         
-        if not all_task_types:
-            return None  # No task type data available
+        Args:
+            charts: Dict mapping chart names (see CHART_FILES) to output paths;
+                    None selects the default dated path
+            max_workers: Number of rendering processes (default: one per chart
+                         to draw, up to the number of CPUs); 1 draws in this process
+            include_report: Also draw the SVG charts of the HTML report in the
+                            same batch, so generate_html_report finds them in
+                            the cache
         
-        all_task_types = sorted(list(all_task_types))
-        benchmark_names = list(self.results.get('benchmarks', {}).keys())
+        Returns:
+            dict: Chart name to the path of the rendered chart, or None for
+                  charts without data
+        """
+        jobs = [(chart, 'png') for chart in charts]
+        if include_report:
+            jobs += [(chart, 'svg') for chart in self.report_charts()]
+        cached = self._render_cached(jobs, max_workers)
+        
+        outputs = {}
+        for chart in charts:
+            cache_file = cached[chart, 'png']
+            if cache_file is None:
+                outputs[chart] = None
+                continue
+            output_file = charts[chart]
+            if not output_file:
+                timestamp = datetime.now().strftime("%Y-%m-%d")
+                output_file = os.path.join(self.output_dir, f"{CHART_FILES[chart]}_{timestamp}.png")
+            shutil.copyfile(cache_file, output_file)
+            outputs[chart] = output_file
+        return outputs
+    
+    def _render_cached(self, jobs, max_workers=None):
+        """Make sure the given charts are in the cache and return their cached paths.
         
-        # Prepare data for grouped bar chart
-        data = []
-        for task_type in all_task_types:
-            task_scores = []
-            for name in benchmark_names:
-                benchmark_data = self.results.get('benchmarks', {}).get(name, {})
-                score = benchmark_data.get('task_type_scores', {}).get(task_type, 0)
-                task_scores.append(score)
-            data.append(task_scores)
+        Args:
+            jobs: List of (chart name, image format) pairs, the format being
+                  'png' or 'svg'
+            max_workers: See render_charts
         
-        # Create grouped bar chart
-        fig, ax = plt.subplots(figsize=(12, 7))
+        Returns:
+            dict: (chart name, image format) to the cached image, or None for
+                  charts without data
+        """
+        if not self.results:
+            raise ValueError("No results data available")
         
-        x = np.arange(len(benchmark_names))
-        width = 0.8 / len(all_task_types)
+        cached = {}
+        pending = []
+        for chart, image_format in jobs:
+            if chart not in CHART_FILES:
+                raise ValueError(f"Unknown chart: {chart}")
+            data = self._chart_data(chart)
+            if data is None:
+                cached[chart, image_format] = None
+                continue
+            cache_file = os.path.join(self.cache_dir,
+                                      f"{chart}_{_digest([CHART_VERSION, chart, data])}.{image_format}")
+            cached[chart, image_format] = cache_file
+            if not os.path.exists(cache_file):
+                pending.append((chart, data, cache_file))
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        workers = min(len(pending), max_workers or os.cpu_count() or 1)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                for future in [executor.submit(_draw_chart, *job) for job in pending]:
+                    future.result()
+        else:
+            for job in pending:
+                _draw_chart(*job)
+        return cached
+    
+    def plot_history(self, store, metric='overall_score', model=None, benchmark=None, output_file=None):
+        """Generate a line chart of a metric over time from a historical results store.
         
-        for i, (task_type, scores) in enumerate(zip(all_task_types, data)):
-            offset = width * i - width * len(all_task_types) / 2 + width / 2
-            ax.bar(x + offset, scores, width, label=task_type)
+        Only the queried series is read from the store, so this works without
+        loading any results files.
         
-        ax.set_xticks(x)
-        ax.set_xticklabels(benchmark_names)
-        ax.set_ylim(0, 1.1)  # Assuming scores are between 0 and 1
-        ax.set_ylabel('Score')
-        ax.set_title(f"Task Type Performance Across Benchmarks - {self.results.get('model', 'Unknown')}")
-        ax.legend(title="Task Types")
+        Args:
+            store: A ResultsStore
+            metric: Metric to plot (see ResultsStore.trend)
+            model: Only plot runs of this model (default: one line per model)
+            benchmark: Benchmark to plot (default: the overall score of each run)
+            output_file: Path to save the chart (default: reports/history_YYYY-MM-DD.png)
         
-        plt.tight_layout()
-        plt.savefig(output_file)
-        plt.close()
+        Returns:
+            str: Path to the generated chart file, or None if the store has no matching runs
+        """
+        series = {}
+        for point in store.trend(metric=metric, model=model, benchmark=benchmark):
+            if point['value'] is not None:
+                times, values = series.setdefault(point['model'], ([], []))
+                times.append(point['timestamp'])
+                values.append(point['value'])
+        if not series:
+            return None
+        
+        data = {
+            'title': f"{benchmark or 'Overall'} {metric.replace('_', ' ')}",
+            'metric': metric,
+            'series': [[name, times, values] for name, (times, values) in series.items()]
+        }
+        if not output_file:
+            timestamp = datetime.now().strftime("%Y-%m-%d")
+            output_file = os.path.join(self.output_dir, f"{CHART_FILES['history']}_{timestamp}.png")
         
+        cache_file = os.path.join(self.cache_dir, f"history_{_digest([CHART_VERSION, 'history', data])}.png")
+        if not os.path.exists(cache_file):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _draw_chart('history', data, cache_file)
+        shutil.copyfile(cache_file, output_file)
         return output_file
     
-    def generate_html_report(self, output_file=None):
-        """Generate a comprehensive HTML report with embedded charts.
+    def _chart_data(self, chart):
+        """Extract the data a chart is drawn from, or None if there is nothing to draw."""
+        if chart == 'history':
+            return None  # Drawn from a ResultsStore, see plot_history
+        
+        model = self.results.get('model', 'Unknown')
+        benchmarks = self.results.get('benchmarks', {})
+        
+        if chart == 'overall':
+            return {
+                'model': model,
+                'overall_score': self.results.get('overall_score', 0),
+                'names': list(benchmarks.keys()),
+                'scores': [data.get('overall_score', 0) for data in benchmarks.values()]
+            }
+        
+        if chart == 'tasks':
+            # Collect all task types across benchmarks
+            all_task_types = set()
+            for data in benchmarks.values():
+                all_task_types.update(data.get('task_type_scores', {}).keys())
+            if not all_task_types:
+                return None  # No task type data available
+            all_task_types = sorted(all_task_types)
+            return {
+                'model': model,
+                'names': list(benchmarks.keys()),
+                'task_types': all_task_types,
+                'scores': [[data.get('task_type_scores', {}).get(task_type, 0) for data in benchmarks.values()]
+                           for task_type in all_task_types]
+            }
+        
+        if chart == 'models':
+            model_results = self._model_results()
+            # Keep benchmark order stable across models that ran different subsets
+            benchmark_names = []
+            for _, results in model_results:
+                for name in results.get('benchmarks', {}):
+                    if name not in benchmark_names:
+                        benchmark_names.append(name)
+            return {
+                'names': benchmark_names + ['Overall'],
+                'models': [model_name for model_name, _ in model_results],
+                'scores': [[results.get('benchmarks', {}).get(name, {}).get('overall_score', 0)
+                            for name in benchmark_names] + [results.get('overall_score', 0)]
+                           for _, results in model_results]
+            }
+        
+        entries = self._telemetry_by_benchmark()
+        if not entries:
+            return None  # No telemetry available
+        title = self.results.get('model', 'Model Comparison')
+        if chart == 'latency':
+            return {
+                'title': title,
+                'labels': [label for label, _ in entries],
+                'p95': [telemetry['latency_p95'] for _, telemetry in entries],
+                'histograms': [telemetry['latency_histogram'] for _, telemetry in entries]
+            }
+        return {
+            'title': title,
+            'labels': [label for label, _ in entries],
+            'prompt_rates': [telemetry['prompt_tokens_per_sec'] for _, telemetry in entries],
+            'generation_rates': [telemetry['generation_tokens_per_sec'] for _, telemetry in entries]
+        }
+    
+    def generate_html_report(self, output_file=None, max_workers=None, page_size=PAGE_SIZE):
+        """Generate a comprehensive HTML report with inline charts and per-task tables.
+        
+        The report is written incrementally. Per-task results are shown in
+        paginated tables whose pages, and any long text such as generated
+        solutions, are stored in side files next to the report and loaded on
+        demand, so the report stays fast to open for runs with many tasks.
         
         Args:
             output_file: Path to save the HTML report (default: reports/report_YYYY-MM-DD.html)
-            
+            max_workers: Number of processes used to render the charts (see render_charts)
+            page_size: Number of rows per page of a task table
+        
         Returns:
             str: Path to the generated HTML report
         """
         if not self.results:
             raise ValueError("No results data available")
-            
+        
         if not output_file:
             timestamp = datetime.now().strftime("%Y-%m-%d")
             output_file = os.path.join(self.output_dir, f"report_{timestamp}.html")
         
-        # Generate charts for embedding
-        chart_dir = os.path.join(self.output_dir, 'charts')
-        os.makedirs(chart_dir, exist_ok=True)
-        
-        overall_chart = os.path.join(chart_dir, 'overall.png')
-        self.plot_overall_comparison(overall_chart)
-        
-        task_chart = os.path.join(chart_dir, 'tasks.png')
-        self.plot_task_type_comparison(task_chart)
-        
-        # Generate HTML content
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>AGI Benchmark Report - {self.results.get('model', 'Unknown')}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                h1, h2, h3 {{ color: #333; }}
-                .chart {{ margin: 20px 0; text-align: center; }}
-                .chart img {{ max-width: 100%; }}
-                table {{ border-collapse: collapse; width: 100%; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                tr:nth-child(even) {{ background-color: #f9f9f9; }}
-            </style>
-        </head>
-        <body>
-            <h1>AGI Benchmark Suite - Results Report</h1>
-            <p><strong>Model:</strong> {self.results.get('model', 'Unknown')}</p>
-            <p><strong>Overall Score:</strong> {self.results.get('overall_score', 0):.2f}</p>
+        multi_model = self.is_multi_model()
+        chart_titles = {
+            'overall': "Benchmark Comparison",
+            'tasks': "Task Type Performance",
+            'models': "Benchmark Comparison"
+        }
+        cached = self._render_cached([(chart, 'svg') for chart in self.report_charts()],
+                                     max_workers=max_workers)
+        charts = {chart: cached[chart, 'svg'] for chart in self.report_charts()}
+        
+        title = ("AGI Benchmark Report - Model Comparison" if multi_model
+                 else f"AGI Benchmark Report - {self.results.get('model', 'Unknown')}")
+        with HtmlReportWriter(output_file, title, page_size=page_size) as report:
+            report.heading("AGI Benchmark Suite - Model Comparison" if multi_model
+                           else "AGI Benchmark Suite - Results Report", level=1)
+            if multi_model:
+                report.paragraph("Models", ", ".join(model for model, _ in self._model_results()))
+            else:
+                report.paragraph("Model", self.results.get('model', 'Unknown'))
+                report.paragraph("Overall Score", f"{self.results.get('overall_score', 0):.2f}")
             
-            <h2>Benchmark Comparison</h2>
-            <div class="chart">
-                <img src="charts/overall.png" alt="Overall Benchmark Comparison">
-            </div>
+            for chart, svg_file in charts.items():
+                if svg_file:
+                    report.heading(chart_titles[chart])
+                    report.chart(svg_file, chart_titles[chart])
             
-            <h2>Task Type Performance</h2>
-            <div class="chart">
-                <img src="charts/tasks.png" alt="Task Type Performance">
-            </div>
+            report.heading("Detailed Results")
+            if multi_model:
+                self._write_model_comparison_table(report)
+            else:
+                report.table(['Benchmark', 'Overall Score', 'Details'],
+                             ([html.escape(name), f"{data.get('overall_score', 0):.2f}",
+                               self._details_html(data)]
+                              for name, data in self.results.get('benchmarks', {}).items()))
             
-            <h2>Detailed Results</h2>
-        """
-        
-        # Add detailed results table
-        html_content += """
-            <table>
-                <tr>
-                    <th>Benchmark</th>
-                    <th>Overall Score</th>
-                    <th>Details</th>
-                </tr>
-        """
-        
-        for name, data in self.results.get('benchmarks', {}).items():
-            details = []
-            
-            if 'transfer_efficiency' in data:
-                details.append(f"Transfer Efficiency: {data.get('transfer_efficiency', 0):.2f}")
-            if 'decay_rate' in data:
-                details.append(f"Memory Decay Rate: {data.get('decay_rate', 0):.2f}")
-                
-            # Add task-specific scores
-            if 'task_type_scores' in data:
-                task_details = []
-                for task_type, score in data['task_type_scores'].items():
-                    task_details.append(f"{task_type}: {score:.2f}")
-                if task_details:
-                    details.append("Task Scores: " + ", ".join(task_details))
-            
-            details_str = "<br>".join(details) if details else "No detailed metrics available"
+            for model, results in self._model_results():
+                for name, data in results.get('benchmarks', {}).items():
+                    if data.get('tasks'):
+                        report.heading(f"Tasks: {model}: {name}" if multi_model else f"Tasks: {name}")
+                        report.task_table(data['tasks'])
             
-            html_content += f"""
-                <tr>
-                    <td>{name}</td>
-                    <td>{data.get('overall_score', 0):.2f}</td>
-                    <td>{details_str}</td>
-                </tr>
-            """
-        
-        html_content += """
-            </table>
-            
-            <h2>Test Environment</h2>
-            <p>Report generated on {timestamp}</p>
-            
-        </body>
-        </html>
-        """.format(timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            report.heading("Test Environment")
+            report.write(f"    <p>Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>\n")
         
-        with open(output_file, 'w') as f:
-            f.write(html_content)
-            
-        return output_file
\ No newline at end of file
+        return output_file
+    
+    def _details_html(self, data):
+        """Return the details cell of a benchmark's row in the results table."""
+        details = []
+        
+        if 'transfer_efficiency' in data:
+            details.append(f"Transfer Efficiency: {data.get('transfer_efficiency', 0):.2f}")
+        if 'decay_rate' in data:
+            details.append(f"Memory Decay Rate: {data.get('decay_rate', 0):.2f}")
+        
+        telemetry = data.get('telemetry', {})
+        if telemetry.get('requests'):
+            details.append(f"Latency p50/p95/p99: {telemetry['latency_p50']:.2f}s / "
+                           f"{telemetry['latency_p95']:.2f}s / {telemetry['latency_p99']:.2f}s")
+            details.append(f"Throughput: {telemetry['prompt_tokens_per_sec']:.1f} prompt tokens/s, "
+                           f"{telemetry['generation_tokens_per_sec']:.1f} generated tokens/s")
+        
+        # Add task-specific scores
+        if 'task_type_scores' in data:
+            task_details = []
+            for task_type, score in data['task_type_scores'].items():
+                task_details.append(f"{html.escape(str(task_type))}: {score:.2f}")
+            if task_details:
+                details.append("Task Scores: " + ", ".join(task_details))
+        
+        return "<br>".join(details) if details else "No detailed metrics available"
+    
+    def _write_model_comparison_table(self, report):
+        """Write a table of benchmark scores with one column per model."""
+        model_results = self._model_results()
+        benchmark_names = []
+        for _, results in model_results:
+            for name in results.get('benchmarks', {}):
+                if name not in benchmark_names:
+                    benchmark_names.append(name)
+        
+        rows = []
+        for name in benchmark_names + ['Overall']:
+            row = [html.escape(name)]
+            for _, results in model_results:
+                if name == 'Overall':
+                    score = results.get('overall_score', 0)
+                else:
+                    score = results.get('benchmarks', {}).get(name, {}).get('overall_score', 0)
+                row.append(f"{score:.2f}")
+            rows.append(row)
+        report.table(['Benchmark'] + [model for model, _ in model_results], rows)
+
+def _digest(data):
+    """Return a stable hash of JSON-serializable data."""
+    encoded = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def _draw_chart(chart, data, output_file):
+    """Draw one chart from its data and save it; runs inside a worker process.
+
+    Charts are drawn on a standalone Figure with the non-interactive Agg
+    backend rather than through pyplot, so no global state is shared between
+    charts or processes and neither MPLBACKEND nor a display affect them. The
+    image format follows the extension of output_file.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6) if chart == 'overall' else (12, 7))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    if chart == 'overall':
+        bars = ax.bar(data['names'], data['scores'], color='skyblue')
+
+        # Add score labels on top of bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height + 0.02,
+                    f'{height:.2f}', ha='center', va='bottom')
+
+        ax.axhline(y=data['overall_score'], color='r', linestyle='-',
+                   label=f"Overall: {data['overall_score']:.2f}")
+        ax.set_ylim(0, 1.1)  # Assuming scores are between 0 and 1
+        ax.set_title(f"AGI Benchmark Results - {data['model']}")
+        ax.set_ylabel('Score')
+        ax.legend()
+
+    elif chart in ('tasks', 'models'):
+        # Grouped bar chart: one group per benchmark, one bar per series
+        series = data['task_types'] if chart == 'tasks' else data['models']
+        x = np.arange(len(data['names']))
+        width = 0.8 / len(series)
+
+        for i, (label, scores) in enumerate(zip(series, data['scores'])):
+            offset = width * i - width * len(series) / 2 + width / 2
+            ax.bar(x + offset, scores, width, label=label)
+
+        ax.set_xticks(x)
+        ax.set_xticklabels(data['names'])
+        ax.set_ylim(0, 1.1)  # Assuming scores are between 0 and 1
+        ax.set_ylabel('Score')
+        if chart == 'tasks':
+            ax.set_title(f"Task Type Performance Across Benchmarks - {data['model']}")
+            ax.legend(title="Task Types")
+        else:
+            ax.set_title("AGI Benchmark Results - Model Comparison")
+            ax.legend(title="Models")
+
+    elif chart == 'latency':
+        # Buckets have fixed edges; show the range up to the slowest one used
+        edges = data['histograms'][0]['bucket_ms']
+        used = max(max(i for i, count in enumerate(h['counts']) if count) for h in data['histograms'])
+        x = np.arange(used + 1)
+        width = 0.8 / len(data['labels'])
+        for i, (label, p95, histogram) in enumerate(zip(data['labels'], data['p95'], data['histograms'])):
+            offset = width * i - width * len(data['labels']) / 2 + width / 2
+            ax.bar(x + offset, histogram['counts'][:used + 1], width, label=f"{label} (p95 {p95:.2f}s)")
+
+        ax.set_xticks(x)
+        ax.set_xticklabels([f"≤{edges[i] / 1000:g}" if i < len(edges) else f">{edges[-1] / 1000:g}"
+                            for i in x], rotation=20)
+        ax.set_xlabel('Latency (s)')
+        ax.set_ylabel('Requests')
+        ax.set_title(f"Request Latency Distribution - {data['title']}")
+        ax.legend()
+
+    elif chart == 'history':
+        for name, times, values in data['series']:
+            ax.plot([datetime.fromtimestamp(t) for t in times], values, marker='o', label=name)
+
+        ax.set_xlabel('Run time')
+        ax.set_ylabel(data['metric'].replace('_', ' '))
+        ax.set_title(f"History - {data['title']}")
+        ax.legend(title="Models")
+        fig.autofmt_xdate()
+
+    else:
+        x = np.arange(len(data['labels']))
+        width = 0.4
+        ax.bar(x - width / 2, data['prompt_rates'], width, label='Prompt evaluation')
+        ax.bar(x + width / 2, data['generation_rates'], width, label='Generation')
+
+        ax.set_xticks(x)
+        ax.set_xticklabels(data['labels'], rotation=20, ha='right')
+        ax.set_ylabel('Tokens per second')
+        ax.set_title(f"Inference Throughput - {data['title']}")
+        ax.legend()
+
+    fig.tight_layout()
+    # Write under a temporary name so concurrent renders never expose a partial
+    # file. SVG text is kept as text rather than glyph paths to keep it small.
+    image_format = os.path.splitext(output_file)[1][1:]
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    with matplotlib.rc_context({'svg.fonttype': 'none'}):
+        fig.savefig(tmp_file, format=image_format,
+                    metadata={'Date': None} if image_format == 'svg' else None)
+    os.replace(tmp_file, output_file)
+
+
+def _render_report(results_file, output_dir, cache_dir, report_format):
+    """Render the reports and charts for one results file; runs inside a worker process."""
+    if not os.path.exists(results_file):
+        raise FileNotFoundError(f"Results file not found: {results_file}")
+    visualizer = BenchmarkVisualizer(results_file=results_file, output_dir=output_dir, cache_dir=cache_dir)
+    if not visualizer.results:
+        raise ValueError(f"No results data in {results_file}")
+
+    html = report_format in ['html', 'all']
+    charts = visualizer.render_charts(dict.fromkeys(visualizer.default_charts()), max_workers=1,
+                                      include_report=html)
+    outputs = []
+    if report_format in ['text', 'all']:
+        outputs.append(visualizer.generate_summary_report())
+    if html:
+        outputs.append(visualizer.generate_html_report(max_workers=1))
+    outputs.extend(path for path in charts.values() if path)
+    return outputs
+
+
+def render_reports(results_files, output_dir='reports', report_format='all', max_workers=None):
+    """Render reports and charts for many results files in parallel.
+
+    Each results file is rendered by its own worker process into a
+    subdirectory of output_dir named after the file. All files share one
+    chart cache, so charts that are identical across runs are drawn once.
+
+    Args:
+        results_files: Paths of JSON results files
+        output_dir: Directory to write the reports into
+        report_format: 'text', 'html' or 'all'
+        max_workers: Number of rendering processes (default: number of CPUs)
+
+    Returns:
+        dict: Results file to the list of generated files, or to the exception
+              raised while rendering it
+    """
+    cache_dir = os.path.join(output_dir, CHART_CACHE_DIR)
+    rendered = {}
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {}
+        for results_file in results_files:
+            name = os.path.splitext(os.path.basename(results_file))[0]
+            futures[results_file] = executor.submit(_render_report, results_file,
+                                                    os.path.join(output_dir, name), cache_dir, report_format)
+        for results_file, future in futures.items():
+            try:
+                rendered[results_file] = future.result()
+            except Exception as e:
+                rendered[results_file] = e
+    return rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render reports and charts for benchmark results files')
+    parser.add_argument('results_files', nargs='+', help='JSON results files to render')
+    parser.add_argument('--output-dir', type=str, default='reports', help='Directory to write reports into')
+    parser.add_argument('--report-format', type=str, choices=['text', 'html', 'all'], default='all',
+                        help='Report format')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of rendering processes (default: number of CPUs)')
+    args = parser.parse_args()
+
+    rendered = render_reports(args.results_files, output_dir=args.output_dir,
+                              report_format=args.report_format, max_workers=args.workers)
+    for results_file, outputs in rendered.items():
+        if isinstance(outputs, Exception):
+            print(f"Error rendering {results_file}: {outputs}")
+            continue
+        print(f"{results_file}:")
+        for path in outputs:
+            print(f"  {path}")
+
+
+if __name__ == '__main__':
+    main()
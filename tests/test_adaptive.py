@@ -0,0 +1,87 @@
+import itertools
+from src.utils.adaptive import adaptive_map, apply_estimates, score_variance
+from src.utils.dispatch import TaskDispatcher
+
+
+def make_stream(sizes, yielded=None):
+    """Return an iter_tasks callable over strata of the given sizes, in stratum order."""
+    def iter_tasks(start=0):
+        def generate():
+            for name, size in sizes.items():
+                for index in range(size):
+                    if yielded is not None:
+                        yielded.append((name, index))
+                    yield {'id': f"{name}-{index}", 'kind': name, 'index': index}
+        return itertools.islice(generate(), start, None)
+    return iter_tasks
+
+
+def test_score_variance_shrinks_to_zero_for_a_full_population():
+    assert score_variance(5, 10) > score_variance(50, 100) > 0
+    assert score_variance(10, 10, population=10) == 0
+
+
+def test_large_strata_stop_early_and_small_ones_run_in_full():
+    sizes = {'large': 2000, 'small': 10}
+    results, sampling = adaptive_map(TaskDispatcher(), lambda task: {'score': 1.0}, make_stream(sizes),
+                                     ('kind',), tolerance=0.05)
+    strata = sampling['strata']
+    assert strata['small']['samples'] == 10
+    assert strata['large']['samples'] < 200
+    assert sampling['tasks_run'] == len(results) < sampling['population'] == 2010
+    assert sampling['overall']['score'] == 1.0
+
+
+def test_strata_are_drawn_lazily():
+    sizes = {'a': 1000, 'b': 1000}
+    yielded = []
+    _, sampling = adaptive_map(TaskDispatcher(), lambda task: {'score': 1.0}, make_stream(sizes, yielded),
+                               ('kind',), tolerance=0.1)
+    # One counting pass, then only the drawn tasks and the skip to stratum b
+    assert len(yielded) <= 2000 + 1000 + sampling['tasks_run'] + 2
+
+
+def test_small_strata_may_stop_after_half_their_tasks():
+    _, sampling = adaptive_map(TaskDispatcher(), lambda task: {'score': 1.0}, make_stream({'a': 10}),
+                               ('kind',), tolerance=0.25)
+    assert sampling['strata']['a']['samples'] == 5
+
+
+def test_estimate_weights_strata_by_population():
+    def fn(task):
+        return {'score': 1.0 if task['kind'] == 'easy' else float(task['index'] % 2)}
+    results, sampling = adaptive_map(TaskDispatcher(concurrency=4), fn, make_stream({'easy': 30, 'hard': 10}),
+                                     ('kind',), tolerance=0.001)
+    assert len(results) == 40
+    assert sampling['overall']['score'] == (30 * 1.0 + 10 * 0.5) / 40
+    low, high = sampling['overall']['ci']
+    assert low <= sampling['overall']['score'] <= high
+
+
+def test_errors_are_not_samples_and_failed_strata_are_left_out():
+    def fn(task):
+        if task['kind'] == 'broken':
+            return {'error': 'server down'}
+        return {'score': 1.0}
+    results, sampling = adaptive_map(TaskDispatcher(), fn, make_stream({'ok': 10, 'broken': 10}), ('kind',))
+    assert len(results) == 20
+    assert sampling['strata']['broken'] == {'score': None, 'ci': [0.0, 1.0], 'samples': 0, 'population': 0}
+    assert sampling['overall']['score'] == 1.0
+    assert sampling['overall']['population'] == 10
+
+    benchmark_results = {'overall_score': 0.0, 'sampling': sampling, 'kind_scores': {'ok': 0, 'broken': 0}}
+    apply_estimates(benchmark_results, {'kind': 'kind_scores'})
+    assert benchmark_results['overall_score'] == 1.0
+    assert benchmark_results['kind_scores'] == {'ok': 1.0, 'broken': 0}
+
+
+def test_strata_whose_stream_runs_dry_are_closed():
+    counted = make_stream({'a': 50, 'b': 50})
+    # Later streams hold fewer tasks of stratum b than the counting pass saw
+    short = make_stream({'a': 50, 'b': 20})
+    calls = iter([counted])
+    iter_tasks = lambda start: next(calls, short)(start)
+    _, sampling = adaptive_map(TaskDispatcher(), lambda task: {'score': float(task['index'] % 2)},
+                               iter_tasks, ('kind',), tolerance=0.001)
+    assert sampling['strata']['a']['samples'] == 50
+    assert sampling['strata']['b']['samples'] == 20
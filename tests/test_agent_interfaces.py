@@ -0,0 +1,123 @@
+import threading
+import time
+import pytest
+from src.benchmarks.transfer.task_adaptation import TaskAdaptationBenchmark
+from src.utils.agent_interfaces import OllamaError, OllamaInterface
+from src.utils.dispatch import AgentError, server_time, timed_solve
+from src.utils.mock_ollama import MockOllamaServer
+from src.utils.response_cache import ResponseCache
+
+
+def test_last_server_time_reports_server_durations():
+    with MockOllamaServer(port=0, latency_mean=0.0) as server:
+        agent = OllamaInterface(model_name='mock:latest', base_url=server.url)
+        try:
+            assert agent.last_server_time() is None
+            result = agent.generate("hello there")
+            expected = (result['prompt_eval_duration'] + result['eval_duration']) / 1e9
+            assert agent.last_server_time() == expected
+            timed_solve(agent, "hello again")
+            assert server_time(agent) is not None
+        finally:
+            agent.close()
+
+
+def test_transfer_benchmark_times_by_server_compute():
+    with MockOllamaServer(port=0, latency_mean=0.0) as server:
+        agent = OllamaInterface(model_name='mock:latest', base_url=server.url)
+        try:
+            results = TaskAdaptationBenchmark(limit=2).run(agent)
+        finally:
+            agent.close()
+    for pair in results['tasks']:
+        for result in (pair['base_task'], pair['transfer_task']):
+            assert result['server_time'] is not None
+            assert result['server_time'] <= result['time']
+
+
+def test_last_server_time_is_none_for_cached_responses(tmp_path):
+    with MockOllamaServer(port=0, latency_mean=0.0) as server:
+        agent = OllamaInterface(model_name='mock:latest', base_url=server.url,
+                                cache=ResponseCache(str(tmp_path)))
+        try:
+            agent.generate("cache me")
+            assert agent.last_server_time() is not None
+            assert agent.generate("cache me")['cached']
+            assert agent.last_server_time() is None
+        finally:
+            agent.close()
+
+
+def test_model_errors_are_not_retried_and_keep_the_server_in_rotation():
+    agent = OllamaInterface(model_name='mock:latest', base_url=['http://a:1', 'http://b:2'],
+                            max_retries=3, retry_delay=0.0)
+    calls = []
+
+    def fail(url, request_data):
+        calls.append(url)
+        raise OllamaError("model failed to load")
+
+    agent._post = fail
+    try:
+        with pytest.raises(AgentError):
+            agent.solve("hello")
+        assert len(calls) == 1
+        assert all(host['healthy'] and not host['outstanding'] for host in agent.hosts.stats().values())
+    finally:
+        agent.close()
+
+
+def test_requests_held_by_the_limiter_are_not_outstanding_on_a_server():
+    agent = OllamaInterface(model_name='mock:latest', base_url='http://a:1', pool_size=4,
+                            adaptive_concurrency=True)
+    started = threading.Event()
+    finish = threading.Event()
+
+    def post(url, request_data):
+        started.set()
+        finish.wait(5)
+        return {'response': 'ok', 'prompt_eval_duration': 0, 'eval_duration': 0}
+
+    agent._post = post
+    try:
+        # The limit starts at one request in flight
+        threads = [threading.Thread(target=agent.solve, args=(f"prompt {i}",)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        assert started.wait(5)
+        time.sleep(0.1)
+        assert agent.hosts.stats()['http://a:1']['outstanding'] == 1
+        finish.set()
+        for thread in threads:
+            thread.join(5)
+        assert agent.hosts.stats()['http://a:1']['outstanding'] == 0
+    finally:
+        agent.close()
+
+
+def test_streamed_responses_are_assembled_from_chunks():
+    with MockOllamaServer(port=0, latency_mean=0.0) as server:
+        agent = OllamaInterface(model_name='mock:latest', base_url=server.url, stream=True)
+        try:
+            result = agent.generate("one two three")
+            assert result['response'] == "one two three"
+            assert result['done'] and result['time_to_first_token'] is not None
+            assert agent.start_session(mode='chat').solve("four five") == "four five"
+        finally:
+            agent.close()
+
+
+@pytest.mark.parametrize('fault', MockOllamaServer.STREAM_FAULTS)
+def test_broken_streams_are_retried(fault):
+    with MockOllamaServer(port=0, latency_mean=0.0, stream_fault=fault, stream_fault_rate=1.0) as server:
+        agent = OllamaInterface(model_name='mock:latest', base_url=server.url, stream=True,
+                                max_retries=2, retry_delay=0.0)
+        try:
+            with pytest.raises(AgentError):
+                agent.solve("one two three")
+            assert server.request_count == 3
+
+            server.stream_fault_rate = 0.0
+            assert agent.solve("one two three") == "one two three"
+        finally:
+            agent.close()
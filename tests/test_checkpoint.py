@@ -0,0 +1,68 @@
+import json
+import pytest
+from src.utils.checkpoint import ResultJournal, write_results
+
+
+def test_resume_skips_recorded_tasks(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    journal = ResultJournal(path, model='m')
+    journal.record_task('a', {'score': 1.0})
+    journal.record_benchmark('memory', {'overall_score': 0.5})
+    assert journal.has_task('a') and journal.has_benchmark('memory')
+    assert journal.get_task('a') == {'score': 1.0}
+    journal.close()
+
+    journal = ResultJournal(path, model='m', resume=True)
+    assert journal.has_task('a') and not journal.has_task('b')
+    assert journal.get_task('a') == {'score': 1.0}
+    assert journal.has_benchmark('memory')
+    journal.close()
+
+    # Without resume the journal starts over
+    journal = ResultJournal(path, model='m')
+    assert not journal.has_task('a')
+    journal.close()
+
+
+def test_resume_rejects_journal_of_another_model(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    ResultJournal(path, model='m').close()
+    with pytest.raises(ValueError):
+        ResultJournal(path, model='other', resume=True)
+
+
+@pytest.mark.parametrize('tail', ['{"kind": "task", "key": "b", "res', '{"kind": "task", "key": "c", "result": {}}'])
+def test_resume_after_crash_keeps_new_records(tmp_path, tail):
+    path = str(tmp_path / 'run.journal.jsonl')
+    journal = ResultJournal(path, model='m')
+    journal.record_task('a', {'score': 1.0})
+    journal.close()
+    # A crash leaves the last record without its newline, or cut short
+    with open(path, 'a') as f:
+        f.write(tail)
+
+    journal = ResultJournal(path, model='m', resume=True)
+    journal.record_task('d', {'score': 0.0})
+    journal.close()
+
+    journal = ResultJournal(path, model='m', resume=True)
+    assert journal.has_task('a') and journal.has_task('d')
+    assert journal.get_task('d') == {'score': 0.0}
+    journal.close()
+    with open(path) as f:
+        for line in f:
+            json.loads(line)
+
+
+def test_write_results_streams_benchmarks(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    journal = ResultJournal(path, model='m')
+    journal.record_benchmark('memory', {'overall_score': 0.25})
+    journal.record_benchmark('planning', {'overall_score': 0.75})
+    output = str(tmp_path / 'results.json')
+    assert write_results(journal, output) == 0.5
+    journal.close()
+    with open(output) as f:
+        results = json.load(f)
+    assert results['model'] == 'm'
+    assert set(results['benchmarks']) == {'memory', 'planning'}
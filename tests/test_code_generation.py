@@ -0,0 +1,52 @@
+from src.domains.code.code_generation import CodeGenerationBenchmark
+from src.domains.code.sandbox import CodeGrader, extract_code
+from src.utils.dispatch import AgentError, split_errors
+
+SUM_PROGRAM = "a, b = map(int, input().split())\nprint(a + b)\n"
+TESTS = [{'input': '2 3\n', 'expected_output': '5'}, {'input': '-7 7\n', 'expected_output': '0'}]
+
+
+class SumAgent:
+    """Answers every task with the sum program, and fails on Fibonacci tasks."""
+
+    def solve(self, task_description):
+        if 'Fibonacci' in task_description:
+            raise AgentError("server unavailable")
+        return f"```python\n{SUM_PROGRAM}```"
+
+
+def test_extract_code_prefers_the_block_of_the_language():
+    response = "Here:\n```js\nconsole.log(1)\n```\n```python\nprint(1)\n```"
+    assert extract_code(response, 'python') == "print(1)\n"
+    assert extract_code(response, 'rust') == "console.log(1)\n"
+    assert extract_code("print(2)", 'python') == "print(2)"
+
+
+def test_grader_scores_programs_and_enforces_limits(tmp_path):
+    with CodeGrader(max_workers=2, artifact_dir=str(tmp_path), cpu_time_limit=1, memory_limit_mb=256,
+                    wall_time_limit=3) as grader:
+        correct = grader.submit(SUM_PROGRAM, 'python', TESTS)
+        wrong = grader.submit("print(5)\n", 'python', TESTS)
+        loop = grader.submit("while True:\n    pass\n", 'python', TESTS[:1])
+        hog = grader.submit("x = bytearray(1024 ** 3)\nprint(5)\n", 'python', TESTS[:1])
+        broken = grader.submit("def (:\n", 'python', TESTS[:1])
+
+        assert correct.result()['score'] == 1.0 and correct.result()['error'] is None
+        assert wrong.result()['passed'] == 1 and wrong.result()['score'] == 0.5
+        assert loop.result()['score'] == 0.0 and loop.result()['error']
+        assert hog.result()['score'] == 0.0 and hog.result()['error']
+        assert broken.result()['score'] == 0.0
+
+        # The same source is served from the artifact cache
+        assert grader.submit(SUM_PROGRAM, 'python', TESTS).result()['cache_hit']
+
+
+def test_scored_rows_are_not_mistaken_for_failed_tasks(tmp_path):
+    benchmark = CodeGenerationBenchmark(languages=['python'], task_types=['algorithm'],
+                                        artifact_dir=str(tmp_path), grader_workers=2)
+    results = benchmark.run(SumAgent())
+    assert results['errors'] == [{'error': 'server unavailable', 'task_key': 'code:algorithm-medium-python'}]
+    scores = {task['task_id']: task['score'] for task in results['tasks']}
+    assert scores == {'algorithm-easy-python': 1.0, 'algorithm-hard-python': 0.0}
+    assert all('error' not in task and 'grading_error' in task for task in results['tasks'])
+    assert split_errors(results['tasks']) == (results['tasks'], [])
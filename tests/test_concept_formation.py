@@ -0,0 +1,95 @@
+import itertools
+import threading
+import numpy as np
+from src.benchmarks.abstraction.canonical import (ConceptIndex, canonical_grid_task, canonical_rule_task,
+                                                  canonical_string_task)
+from src.benchmarks.abstraction.concept_formation import ConceptFormationBenchmark
+from src.domains.vision.visual_reasoning import VisualReasoningBenchmark
+
+
+class EchoAgent:
+    """Agent that answers every task with the same text."""
+
+    def solve(self, task_description):
+        return "yes"
+
+
+def test_canonical_grid_task_ignores_symmetry_colors_and_example_order():
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, 4, size=(2, 2, 4, 4), dtype=np.uint8)
+    test_input = rng.integers(0, 4, size=(4, 4), dtype=np.uint8)
+    answer = test_input[::-1].copy()
+    key, canonical_answer = canonical_grid_task(pairs, test_input)
+
+    # Swap the examples, rotate every grid and permute two colors
+    colors = np.array([0, 2, 1, 3, 4, 5, 6, 7, 8, 9], dtype=np.uint8)
+    variant_pairs = colors[np.rot90(pairs[::-1], 1, axes=(-2, -1))]
+    variant_input = colors[np.rot90(test_input)]
+    variant_key, variant_answer = canonical_grid_task(variant_pairs, variant_input)
+    assert variant_key == key
+    assert variant_answer(colors[np.rot90(answer)]) == canonical_answer(answer)
+    assert variant_answer(colors[np.rot90(test_input)]) != canonical_answer(answer)
+
+
+def test_canonical_rule_and_string_tasks_ignore_names_and_order():
+    examples = [((True, False), True), ((False, False), False)]
+    # The same task with the variables renamed and swapped and the examples reordered
+    swapped = [((False, False), False), ((False, True), True)]
+    assert canonical_rule_task('XY', swapped, (True, True)) == canonical_rule_task('PQ', examples, (True, True))
+    relabeled = [((True, False), False), ((False, False), False)]
+    assert canonical_rule_task('PQ', relabeled, (True, True)) != canonical_rule_task('PQ', examples, (True, True))
+
+    key, canonical_answer = canonical_string_task([('abc', 'cba'), ('bca', 'acb')], 'cab')
+    variant_key, variant_answer = canonical_string_task([('yzx', 'xzy'), ('xyz', 'zyx')], 'zxy')
+    assert variant_key == key
+    assert variant_answer('yxz') == canonical_answer('bac')
+
+
+def test_concept_index_rejects_duplicates():
+    index = ConceptIndex()
+    assert index.add(b'task', b'answer')
+    assert not index.add(b'task', b'other')
+    assert index.verify(b'task', b'answer')
+    assert len(index) == 1 and index.duplicates == 1
+
+
+def test_generated_concepts_are_unique():
+    tasks = list(ConceptFormationBenchmark(tasks_per_type=5).iter_tasks())
+    assert len(tasks) == 45
+    assert len({task['task_key'] for task in tasks}) == len(tasks)
+
+
+def test_interleaved_task_streams_of_a_shared_benchmark_agree():
+    # Benchmarks are shared by the runs of several models
+    benchmark = ConceptFormationBenchmark(tasks_per_type=3)
+    first, second = benchmark.iter_tasks(), benchmark.iter_tasks()
+    pairs = list(itertools.zip_longest(first, second))
+    assert len(pairs) == 27
+    for a, b in pairs:
+        assert a['id'] == b['id'] and a['description'] == b['description']
+
+
+def test_concurrent_runs_of_a_shared_benchmark_are_independent():
+    benchmark = ConceptFormationBenchmark(tasks_per_type=4)
+    results = [None, None]
+
+    def run(i):
+        results[i] = benchmark.run(EchoAgent())
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for result in results:
+        assert result['unique_concepts'] == len(result['tasks']) == 36
+    assert [t['score'] for t in results[0]['tasks']] == [t['score'] for t in results[1]['tasks']]
+
+
+def test_visual_concepts_do_not_repeat_visual_reasoning_puzzles():
+    concept_tasks = [task for task in ConceptFormationBenchmark(tasks_per_type=10).iter_tasks()
+                     if task['concept_type'] == 'visual']
+    vision_tasks = VisualReasoningBenchmark(task_types=['visual_analogy'], tasks_per_type=10).iter_tasks()
+    vision_answers = {task['expected_solution'] for task in vision_tasks}
+    assert concept_tasks
+    assert not vision_answers & {task['expected_solution'] for task in concept_tasks}
@@ -0,0 +1,62 @@
+import random
+from src.utils.concurrency import AdaptiveConcurrency, backoff_delay
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    rng = random.Random(0)
+    delays = [backoff_delay(3, base_delay=0.5, rng=rng) for _ in range(200)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) == len(delays)
+    assert all(backoff_delay(20, base_delay=0.5, max_delay=30.0, rng=rng) <= 30.0 for _ in range(100))
+
+
+def complete_window(limiter, wait=0.0, failed=False):
+    """Send and finish one full window of requests at the current limit."""
+    tokens = [limiter.acquire() for _ in range(limiter.limit)]
+    for token in tokens:
+        limiter.release(token, wait=wait, failed=failed)
+
+
+def test_limit_grows_exponentially_then_linearly():
+    limiter = AdaptiveConcurrency(max_limit=64)
+    limits = []
+    for _ in range(4):
+        complete_window(limiter)
+        limits.append(limiter.limit)
+    assert limits == [2, 4, 8, 16]
+
+    complete_window(limiter, failed=True)
+    assert limiter.limit == 8
+    complete_window(limiter)
+    assert limiter.limit == 9
+    stats = limiter.drain()
+    assert stats == {'limit': 9, 'min_limit': 1, 'max_limit': 16, 'increases': 5, 'decreases': 1}
+
+
+def test_queueing_delay_halves_the_limit():
+    limiter = AdaptiveConcurrency(max_limit=16, initial_limit=8, tolerance=2.0, slack=0.05)
+    complete_window(limiter, wait=0.1)
+    assert limiter.limit == 16
+    complete_window(limiter, wait=0.5)
+    assert limiter.limit == 8
+
+
+def test_limit_stays_within_bounds():
+    limiter = AdaptiveConcurrency(max_limit=4)
+    for _ in range(10):
+        complete_window(limiter)
+    assert limiter.limit == 4
+    for _ in range(10):
+        complete_window(limiter, failed=True)
+    assert limiter.limit == 1
+
+
+def test_outcomes_of_requests_sent_under_an_old_limit_are_ignored():
+    limiter = AdaptiveConcurrency(max_limit=16, initial_limit=4)
+    old = [limiter.acquire() for _ in range(4)]
+    limiter.release(old[0], failed=True)
+    assert limiter.limit == 2
+    # The other requests of the congested window must not cut the limit again
+    for token in old[1:]:
+        limiter.release(token, failed=True)
+    assert limiter.limit == 2
@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+from src.utils.checkpoint import ResultJournal
+from src.utils.dispatch import AgentError, TaskDispatcher, split_errors
+
+
+def test_results_keep_input_order_under_concurrency():
+    def slow_square(n):
+        time.sleep(random.uniform(0, 0.01))
+        return n * n
+
+    with TaskDispatcher(concurrency=4) as dispatcher:
+        assert dispatcher.map(slow_square, range(40)) == [n * n for n in range(40)]
+    with TaskDispatcher() as dispatcher:
+        assert dispatcher.map(slow_square, range(5)) == [0, 1, 4, 9, 16]
+
+
+def test_in_flight_tasks_are_bounded_by_concurrency():
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def task(n):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.005)
+        with lock:
+            running[0] -= 1
+        return n
+
+    with TaskDispatcher(concurrency=3) as dispatcher:
+        dispatcher.map(task, range(30))
+    assert running[1] <= 3
+
+
+def test_imap_pulls_items_lazily():
+    pulled = []
+
+    def items():
+        for n in range(1000):
+            pulled.append(n)
+            yield n
+
+    with TaskDispatcher(concurrency=2) as dispatcher:
+        results = dispatcher.imap(lambda n: n, items())
+        assert [next(results) for _ in range(3)] == [0, 1, 2]
+        assert len(pulled) <= 3 + 2 * 2
+        results.close()
+
+
+def test_agent_errors_become_error_results_and_are_retried_on_resume(tmp_path):
+    path = str(tmp_path / 'run.journal.jsonl')
+    calls = []
+    failing = {1, 3}
+
+    def flaky(n):
+        calls.append(n)
+        if n in failing:
+            raise AgentError(f"server failed on {n}")
+        return {'score': n}
+
+    key = lambda n: f"task-{n}"
+    journal = ResultJournal(path, model='m')
+    with TaskDispatcher(concurrency=2, journal=journal) as dispatcher:
+        results = dispatcher.map(flaky, range(4), key=key)
+    journal.close()
+    scored, errors = split_errors(results)
+    assert scored == [{'score': 0}, {'score': 2}]
+    assert errors == [{'error': 'server failed on 1', 'task_key': 'task-1'},
+                      {'error': 'server failed on 3', 'task_key': 'task-3'}]
+
+    # Completed tasks come from the journal; only the failed ones run again
+    calls.clear()
+    failing.clear()
+    journal = ResultJournal(path, model='m', resume=True)
+    with TaskDispatcher(journal=journal) as dispatcher:
+        results = dispatcher.map(flaky, range(4), key=key)
+        assert journal.has_task('task-1') and journal.has_task('task-3')
+    journal.close()
+    assert results == [{'score': n} for n in range(4)]
+    assert sorted(calls) == [1, 3]
@@ -0,0 +1,82 @@
+import re
+import threading
+import time
+from src.benchmarks.memory.episodic_memory import EpisodicMemoryBenchmark, interleave_episodes
+from src.utils.agent_interfaces import OllamaInterface
+from src.utils.dispatch import TaskDispatcher
+from src.utils.mock_ollama import MockOllamaServer
+
+
+class RecallAgent:
+    """Agent implementing only solve, remembering every code it was shown."""
+
+    def __init__(self):
+        self.codes = {}
+
+    def solve(self, task_description):
+        listed = re.search(r"list for (\S+?)[.,]? ", task_description)
+        if listed is None:
+            return "0"
+        episode = listed.group(1)
+        for item, code in re.findall(r"^(\w+): (\w+)$", task_description, re.MULTILINE):
+            self.codes[episode, item] = code
+        asked = re.search(r"code of the (\w+)\?", task_description)
+        return self.codes.get((episode, asked.group(1)), "") if asked else "OK"
+
+
+def test_interleave_episodes_places_recalls_at_exact_delays():
+    delays = [1, 5, 10]
+    schedule = interleave_episodes(8, delays)
+    study = {}
+    for turn, slot in enumerate(schedule):
+        if slot is not None and slot[1] == 0:
+            study[slot[0]] = turn
+    assert sorted(study) == list(range(8))
+    for turn, slot in enumerate(schedule):
+        if slot is not None and slot[1]:
+            episode, delay = slot
+            assert turn - study[episode] == delay
+    # Interleaving needs far fewer turns than running the episodes one by one
+    assert len(schedule) < 8 * (max(delays) + 1)
+    assert interleave_episodes(0, delays) == []
+
+
+def test_agents_without_sessions_are_used_directly():
+    results = EpisodicMemoryBenchmark(episodes=4, episodes_per_session=2).run(RecallAgent())
+    assert len(results['tasks']) == 4 * 3
+    assert results['overall_score'] == 1.0
+    assert results['errors'] == []
+    assert results['model_calls'] < results['naive_model_calls']
+
+
+def test_agents_without_sessions_hold_one_session_at_a_time():
+    agent = RecallAgent()
+    lock = threading.Lock()
+    in_flight = [0, 0]
+    solve = agent.solve
+
+    def tracked_solve(task_description):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.001)
+        with lock:
+            in_flight[0] -= 1
+        return solve(task_description)
+
+    agent.solve = tracked_solve
+    with TaskDispatcher(concurrency=2) as dispatcher:
+        results = EpisodicMemoryBenchmark(episodes=4, episodes_per_session=1).run(agent, dispatcher)
+    assert in_flight[1] == 1
+    assert results['overall_score'] == 1.0
+
+
+def test_sessions_run_against_the_mock_server():
+    with MockOllamaServer(port=0, latency_mean=0.0) as server:
+        agent = OllamaInterface(model_name='mock:latest', base_url=server.url)
+        try:
+            results = EpisodicMemoryBenchmark(episodes=2, episodes_per_session=2).run(agent)
+        finally:
+            agent.close()
+    assert len(results['tasks']) == 2 * 3
+    assert set(results['delay_scores']) == {'1', '5', '10'}
@@ -0,0 +1,66 @@
+import random
+from collections import Counter
+import pytest
+from src.utils.evaluation import BATCH_METRICS, _edit_similarity, _normalize, evaluate_batch, evaluate_response
+
+WORDS = ['the', 'cat', 'sat', 'on', 'mat', 'The', 'dog', 'a']
+
+
+def random_texts(rng, count):
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randrange(0, 8))) for _ in range(count)]
+
+
+def levenshtein(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (x != y))
+    return row[-1]
+
+
+def f1(response, expected):
+    common = sum((Counter(response) & Counter(expected)).values())
+    if not common:
+        return 0.0
+    precision, recall = common / len(response), common / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+
+def test_batch_scores_match_per_pair_definitions():
+    rng = random.Random(0)
+    responses, expecteds = random_texts(rng, 300), random_texts(rng, 300)
+    tokens = lambda text: text.lower().split()
+    bigrams = lambda text: list(zip(tokens(text), tokens(text)[1:]))
+
+    assert evaluate_batch(responses, expecteds, 'token_overlap').tolist() == pytest.approx(
+        [evaluate_response(r, e, 'token_overlap') for r, e in zip(responses, expecteds)])
+    assert evaluate_batch(responses, expecteds, 'token_f1').tolist() == pytest.approx(
+        [f1(tokens(r), tokens(e)) for r, e in zip(responses, expecteds)])
+    assert evaluate_batch(responses, expecteds, 'ngram_f1').tolist() == pytest.approx(
+        [f1(bigrams(r), bigrams(e)) for r, e in zip(responses, expecteds)])
+    assert evaluate_batch(responses, expecteds, 'normalized_exact_match').tolist() == \
+        [float(_normalize(r) == _normalize(e)) for r, e in zip(responses, expecteds)]
+
+
+def test_edit_similarity_matches_levenshtein_across_chunks():
+    rng = random.Random(1)
+    responses, expecteds = random_texts(rng, 100), random_texts(rng, 100)
+    expected_scores = []
+    for r, e in zip(responses, expecteds):
+        r, e = _normalize(r), _normalize(e)
+        longest = max(len(r), len(e))
+        expected_scores.append(1 - levenshtein(r, e) / longest if longest else 1.0)
+    assert _edit_similarity(responses, expecteds, chunk_size=7).tolist() == pytest.approx(expected_scores)
+    assert evaluate_batch(['kitten'], ['sitting'], 'edit_similarity')[0] == pytest.approx(1 - 3 / 7)
+
+
+def test_single_responses_use_the_batch_metrics():
+    for metric in BATCH_METRICS:
+        assert evaluate_response("The cat sat.", "the cat sat.", metric) == \
+            evaluate_batch(["The cat sat."], ["the cat sat."], metric)[0]
+    assert len(evaluate_batch([], [], 'token_f1')) == 0
+    with pytest.raises(ValueError):
+        evaluate_batch(['a'], [], 'token_f1')
+    with pytest.raises(ValueError):
+        evaluate_batch(['a'], ['a'], 'bleu')
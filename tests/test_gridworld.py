@@ -0,0 +1,67 @@
+import numpy as np
+from src.benchmarks.planning.gridworld import (ACTIONS, GOAL_REWARD, STEP_COST, TRAP_PENALTY, GridWorld,
+                                               make_environment, optimal_return, parse_plan,
+                                               rollout_returns)
+
+
+def greedy_plan(env, horizon):
+    """Follow the optimal values of a deterministic environment from the start."""
+    values = env.optimal_values(horizon)
+    state, plan = env.start, []
+    for t in range(horizon, 0, -1):
+        if state == env.goal:
+            break
+        future = env.entry_reward + values[t - 1] * (np.arange(len(env.entry_reward)) != env.goal)
+        action = int(np.argmax(future[env.transitions[:, state]]))
+        plan.append(action)
+        state = env.transitions[action, state]
+    return plan
+
+
+def test_walls_and_edges_block_moves():
+    walls = np.zeros((3, 3), dtype=bool)
+    walls[1, 1] = True
+    env = GridWorld(walls, start=0, goal=8, traps=[2])
+    up, right, down, left = range(4)
+    assert env.transitions[up, 0] == 0 and env.transitions[left, 0] == 0
+    assert env.transitions[down, 1] == 1
+    next_states, rewards, done = env.step([0, 5], [right, down])
+    assert next_states.tolist() == [1, 8]
+    assert rewards.tolist() == [-STEP_COST, GOAL_REWARD - STEP_COST]
+    assert done.tolist() == [False, True]
+    assert env.entry_reward[2] == -STEP_COST - TRAP_PENALTY
+    assert env.shortest_path_length() == 4
+    assert env.render() == 'S.X\n.#.\n..G'
+
+
+def test_optimal_return_of_a_deterministic_grid_follows_the_shortest_path():
+    for seed in range(5):
+        env = make_environment(seed, 'simple', False, 10)
+        distance = env.shortest_path_length()
+        assert optimal_return(seed, 'simple', False, 10) == GOAL_REWARD - distance * STEP_COST
+        plan = greedy_plan(env, 10)
+        assert len(plan) == distance
+        assert rollout_returns(env, plan, 10)[0] == GOAL_REWARD - distance * STEP_COST
+
+
+def test_slips_cannot_raise_the_optimal_return():
+    for seed in range(5):
+        stochastic = make_environment(seed, 'complex', True, 20)
+        deterministic = make_environment(seed, 'complex', False, 20)
+        assert stochastic.render() == deterministic.render()
+        assert optimal_return(seed, 'complex', True, 20) <= optimal_return(seed, 'complex', False, 20)
+
+
+def test_rollouts_stop_at_the_goal_and_at_the_horizon():
+    walls = np.zeros((2, 2), dtype=bool)
+    env = GridWorld(walls, start=0, goal=1)
+    right, left = 1, 3
+    returns = rollout_returns(env, [right, left, right], horizon=10, num_rollouts=3)
+    assert returns.tolist() == [GOAL_REWARD - STEP_COST] * 3
+    assert rollout_returns(env, [left, right], horizon=1)[0] == -STEP_COST
+
+
+def test_parse_plan_reads_words_and_letters():
+    assert parse_plan("Plan: Up, right, D l\nnorth") == [0, 1, 2, 3, 0]
+    assert parse_plan("go upward") == []
+    assert len(ACTIONS) == 4
@@ -0,0 +1,68 @@
+from src.utils.history import ResultsStore
+from src.utils.telemetry import InferenceTelemetry, summarize
+
+
+def make_results(score, telemetry, task_scores, timestamp):
+    return {
+        'model': 'm',
+        'timestamp': timestamp,
+        'overall_score': score,
+        'benchmarks': {
+            'Memory': {
+                'overall_score': score,
+                'telemetry': telemetry,
+                'tasks': [{'task_id': f"t{i}", 'score': s} for i, s in enumerate(task_scores)]
+            }
+        }
+    }
+
+
+def server_telemetry():
+    telemetry = InferenceTelemetry()
+    for wall_time in (0.05, 0.09):
+        telemetry.record({'eval_count': 10, 'eval_duration': 1e8}, wall_time)
+    return summarize(telemetry.drain())
+
+
+def cached_telemetry():
+    telemetry = InferenceTelemetry()
+    telemetry.record_cached()
+    telemetry.record_cached()
+    return summarize(telemetry.drain())
+
+
+def test_cached_responses_are_left_out_of_latency():
+    summary = cached_telemetry()
+    assert summary['requests'] == 0 and summary['cached_requests'] == 2
+    assert summary['cache_hit_rate'] == 1.0
+    assert summary['latency_p95'] is None
+
+    telemetry = InferenceTelemetry()
+    telemetry.record({'eval_count': 5, 'eval_duration': 1e8}, 0.2)
+    telemetry.record_cached()
+    summary = summarize(telemetry.drain())
+    assert summary['cache_hit_rate'] == 0.5
+    assert summary['latency_p95'] == 0.2
+
+
+def test_compare_reports_regressions_and_cache_hit_rate(tmp_path):
+    store = ResultsStore(str(tmp_path / 'history.sqlite3'))
+    try:
+        base, = store.ingest(make_results(0.8, server_telemetry(), [1.0, 1.0], '2026-01-01T00:00:00'))
+        new, = store.ingest(make_results(0.5, cached_telemetry(), [1.0, 0.0], '2026-01-02T00:00:00'))
+        # Ingesting the same results again adds nothing
+        assert store.ingest(make_results(0.5, cached_telemetry(), [1.0, 0.0], '2026-01-02T00:00:00')) == [new]
+
+        comparison = store.compare(base, new, threshold=0.1)
+        row, = comparison['benchmarks']
+        assert abs(row['delta'] + 0.3) < 1e-9
+        assert row['base_latency_p95'] == 0.09 and row['new_latency_p95'] is None
+        assert row['base_cache_hit_rate'] == 0.0 and row['new_cache_hit_rate'] == 1.0
+        assert [r['benchmark'] for r in comparison['regressions']] == ['Memory']
+        assert [r['task_id'] for r in comparison['task_regressions']] == ['t1']
+
+        latencies = [point['value'] for point in store.trend('latency_p95', benchmark='Memory')]
+        assert latencies == [0.09, None]
+    finally:
+        store.close()
+
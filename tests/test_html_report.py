@@ -0,0 +1,58 @@
+import json
+import os
+from src.utils.html_report import INLINE_TEXT_CHARS, HtmlReportWriter
+
+
+def read_chunk(path):
+    """Return the id and data of a chunk file written as reportChunk(id, data);"""
+    with open(path) as f:
+        text = f.read()
+    assert text.startswith('reportChunk(') and text.endswith(');\n')
+    chunk_id, data = json.loads('[' + text[len('reportChunk('):-len(');\n')] + ']')
+    return chunk_id, data
+
+
+def test_task_tables_are_split_into_page_files(tmp_path):
+    svg_file = tmp_path / 'chart.svg'
+    svg_file.write_text('<?xml version="1.0"?>\n<!DOCTYPE svg>\n<svg xmlns="http://www.w3.org/2000/svg"></svg>\n')
+    output_file = str(tmp_path / 'report.html')
+    tasks = [{'task_id': f"t{i}", 'score': i / 3, 'solution': 'x' * (INLINE_TEXT_CHARS + 1) if i == 4 else 'ok'}
+             for i in range(5)] + [{'task_id': 't5', 'extra': [1, 2]}]
+
+    with HtmlReportWriter(output_file, 'Report <1>', page_size=2) as report:
+        report.heading('Charts')
+        report.chart(str(svg_file), 'Scores')
+        report.task_table(tasks)
+        report.task_table([])
+
+    page = open(output_file).read()
+    assert '<title>Report &lt;1&gt;</title>' in page
+    assert '<div class="chart" title="Scores">\n<svg xmlns' in page
+    assert '<?xml' not in page and 'DOCTYPE svg' not in page
+    assert 'data-id="0" data-pages="3"' in page and 'data-id="1" data-pages="1"' in page
+    assert '<th>task_id</th><th>score</th><th>solution</th><th>extra</th>' in page
+    assert 'var REPORT_ASSETS = "report_files";' in page
+    assert page.endswith('</body>\n</html>\n')
+
+    assets = tmp_path / 'report_files'
+    assert sorted(os.listdir(assets)) == ['tasks_0_0.js', 'tasks_0_1.js', 'tasks_0_2.js', 'tasks_1_0.js',
+                                          'text_0_2.js']
+    assert read_chunk(assets / 'tasks_0_0.js') == ('tasks_0_0', [['t0', 0.0, 'ok', None],
+                                                                 ['t1', 0.3333, 'ok', None]])
+    # Long text is left out of the page and stored in the page's text file
+    assert read_chunk(assets / 'tasks_0_2.js')[1] == [['t4', 1.3333, {'chars': INLINE_TEXT_CHARS + 1}, None],
+                                                      ['t5', None, None, '[1, 2]']]
+    assert read_chunk(assets / 'text_0_2.js') == ('text_0_2', {'0,2': 'x' * (INLINE_TEXT_CHARS + 1)})
+    assert read_chunk(assets / 'tasks_1_0.js') == ('tasks_1_0', [])
+
+
+def test_rewriting_a_report_replaces_its_side_files(tmp_path):
+    output_file = str(tmp_path / 'report.html')
+    with HtmlReportWriter(output_file, 'Report', page_size=1) as report:
+        report.task_table([{'a': 1}, {'a': 2}])
+    with HtmlReportWriter(output_file, 'Report', page_size=1) as report:
+        report.paragraph('Model', 'm & n')
+    assert os.listdir(tmp_path / 'report_files') == []
+    page = open(output_file).read()
+    assert '<strong>Model:</strong> m &amp; n' in page
+    assert '<script>' not in page
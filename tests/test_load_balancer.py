@@ -0,0 +1,81 @@
+import socket
+import pytest
+from src.utils.agent_interfaces import OllamaInterface
+from src.utils.load_balancer import HostPool
+from src.utils.mock_ollama import MockOllamaServer
+
+
+class FakeResponse:
+
+    def __init__(self, ok):
+        self.ok = ok
+
+
+class FakeSession:
+    """Session whose health checks succeed only for the URLs in up."""
+
+    def __init__(self, up=()):
+        self.up = set(up)
+        self.checked = []
+
+    def get(self, url, timeout=None):
+        self.checked.append(url)
+        return FakeResponse(any(url.startswith(u) for u in self.up))
+
+
+def unused_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def test_requests_go_to_the_least_loaded_host():
+    pool = HostPool(['http://a', 'http://b/'], FakeSession())
+    first, second = pool.acquire(), pool.acquire()
+    assert {first.url, second.url} == {'http://a', 'http://b'}
+    pool.release(first)
+    assert pool.acquire() is first
+    assert pool.acquire(prefer='http://b') is second
+    assert pool.stats()['http://b']['outstanding'] == 2
+
+
+def test_failed_hosts_leave_rotation_until_they_pass_a_health_check():
+    session = FakeSession()
+    pool = HostPool(['http://a', 'http://b'], session, recheck_interval=3600)
+    host = pool.acquire()
+    pool.release(host, failed=True)
+    for _ in range(3):
+        other = pool.acquire(prefer=host.url)
+        assert other is not host
+        pool.release(other)
+    assert session.checked == []
+
+    # Excluding the only healthy host forces a recheck of the failed one
+    session.up.add(host.url)
+    assert pool.acquire(exclude=[other.url]) is host
+    assert pool.stats()[host.url]['healthy']
+    assert pool.stats()[host.url]['failures'] == 1
+
+
+def test_acquire_returns_none_when_every_host_is_down():
+    pool = HostPool(['http://a'], FakeSession())
+    pool.release(pool.acquire(), failed=True)
+    assert pool.acquire() is None
+    with pytest.raises(ValueError):
+        HostPool([], FakeSession())
+
+
+def test_requests_fail_over_to_a_live_server():
+    with MockOllamaServer(port=0, latency_mean=0.0) as server:
+        dead = unused_url()
+        agent = OllamaInterface(model_name='mock:latest', base_url=[dead, server.url],
+                                retry_delay=0.0)
+        try:
+            for i in range(4):
+                assert agent.generate(f"prompt {i}")['response']
+            stats = agent.hosts.stats()
+        finally:
+            agent.close()
+    assert stats[dead]['failures'] == 1
+    assert not stats[dead]['healthy']
+    assert stats[server.url]['requests'] == 4
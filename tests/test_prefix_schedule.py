@@ -0,0 +1,36 @@
+from src.utils.dispatch import TaskDispatcher
+from src.utils.prefix_schedule import PrefixScheduler, PromptTrie, common_prefix_length
+
+
+def test_trie_groups_prompts_by_shared_prefix():
+    trie = PromptTrie()
+    prompts = ["solve grid a", "write code x", "solve grid b", "write code y", "solve maze"]
+    for index, prompt in enumerate(prompts):
+        trie.insert(prompt.split(), index)
+    assert list(trie) == [0, 2, 4, 1, 3]
+
+
+def test_scheduler_counts_shared_prefix_words():
+    scheduler = PrefixScheduler(window=8)
+    prompts = ["a b c 1", "x y 1", "a b c 2", "x y 2"]
+    order = scheduler.order(prompts)
+    assert sorted(order) == [0, 1, 2, 3]
+    assert common_prefix_length(prompts[order[0]].split(), prompts[order[1]].split()) == 3
+    stats = scheduler.drain()
+    assert stats['prompts'] == 4 and stats['prompt_words'] == 14
+    assert stats['baseline_shared_prefix_words'] == 0
+    assert stats['shared_prefix_words'] == 5
+    assert stats['estimated_shared_prefix_words'] == 5
+    assert scheduler.drain()['prompts'] == 0
+
+
+def test_dispatcher_keeps_input_order_when_reordering():
+    items = [f"{'ab'[i % 2]} task {i}" for i in range(10)]
+    for concurrency in (1, 4):
+        sent = []
+        with TaskDispatcher(concurrency=concurrency, prefix_window=4) as dispatcher:
+            results = dispatcher.map(lambda item: sent.append(item) or item.upper(), items,
+                                     prompt=lambda item: item)
+        assert results == [item.upper() for item in items]
+        if concurrency == 1:
+            assert sent[:4] == [items[0], items[2], items[1], items[3]]
@@ -0,0 +1,76 @@
+import hashlib
+import time
+from src.utils.agent_interfaces import OllamaInterface
+from src.utils.mock_ollama import MockOllamaServer
+from src.utils.response_cache import ResponseCache
+from tests.test_load_balancer import unused_url
+
+
+def test_keys_depend_on_everything_that_determines_a_completion():
+    key = ResponseCache.make_key('m', 'sha256:1', 'prompt', {'temperature': 0, 'seed': 1})
+    assert key == ResponseCache.make_key('m', 'sha256:1', 'prompt', {'seed': 1, 'temperature': 0})
+    assert ResponseCache.make_key('m', 'sha256:1', 'prompt') == \
+        ResponseCache.make_key('m', 'sha256:1', 'prompt', {})
+    others = [ResponseCache.make_key('n', 'sha256:1', 'prompt', {'temperature': 0, 'seed': 1}),
+              ResponseCache.make_key('m', 'sha256:2', 'prompt', {'temperature': 0, 'seed': 1}),
+              ResponseCache.make_key('m', 'sha256:1', 'prompt ', {'temperature': 0, 'seed': 1}),
+              ResponseCache.make_key('m', 'sha256:1', 'prompt', {'temperature': 1, 'seed': 1})]
+    assert key not in others and len(set(others)) == len(others)
+
+
+def test_responses_persist_across_runs(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get('k') is None
+    cache.put('k', {'response': 'hi'})
+    cache.close()
+
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get('k') == {'response': 'hi'}
+    assert cache.stats() == {'hits': 1, 'misses': 0, 'hit_rate': 1.0, 'entries': 1}
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    cache.put('a', {'response': 'a'})
+    time.sleep(0.01)
+    cache.put('b', {'response': 'b'})
+    time.sleep(0.01)
+    assert cache.get('a') is not None
+    time.sleep(0.01)
+    cache.put('c', {'response': 'c'})
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['entries'] == 2
+    cache.close()
+
+
+def test_model_digest_asks_each_host_once(tmp_path):
+    with MockOllamaServer(port=0, latency_mean=0.0) as server:
+        dead = unused_url()
+        agent = OllamaInterface(model_name='mock:latest', base_url=[dead, server.url],
+                                cache=ResponseCache(str(tmp_path)))
+        gets = []
+        get = agent.session.get
+        agent.session.get = lambda url, **kwargs: gets.append(url) or get(url, **kwargs)
+        try:
+            digest = agent.model_digest()
+            assert digest == hashlib.sha256(b'mock:latest').hexdigest()
+            assert gets == [f"{dead}/api/tags", f"{server.url}/api/tags"]
+            agent.generate("hello")
+            assert agent.model_digest() == digest and len(gets) == 2
+        finally:
+            agent.close()
+
+
+def test_failed_model_digest_lookups_are_not_repeated():
+    agent = OllamaInterface(model_name='mock:latest', base_url=[unused_url(), unused_url()])
+    gets = []
+    get = agent.session.get
+    agent.session.get = lambda url, **kwargs: gets.append(url) or get(url, **kwargs)
+    try:
+        for _ in range(3):
+            assert agent.model_digest() == ""
+        assert len(gets) == 2
+    finally:
+        agent.close()
@@ -0,0 +1,73 @@
+import numpy as np
+from src.benchmarks.planning.gridworld import ACTIONS, SLIP_PROBABILITY, make_environment
+from src.benchmarks.planning.sequential_decision import SequentialDecisionBenchmark
+
+
+class PlanAgent:
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def solve(self, task_description):
+        return ' '.join(ACTIONS[action] for action in self.plan)
+
+
+def exact_return(env, plan, horizon):
+    """Expected return of an open-loop plan, by propagating the distribution over cells."""
+    outcomes = [(1 - env.slip, 0), (env.slip / 2, 1), (env.slip / 2, 3)]
+    distribution = np.zeros(len(env.entry_reward))
+    distribution[env.start] = 1.0
+    total = 0.0
+    for action in plan[:horizon]:
+        moved = np.zeros_like(distribution)
+        for probability, turn in outcomes:
+            np.add.at(moved, env.transitions[(action + turn) % 4], probability * distribution)
+        total += moved @ env.entry_reward
+        # Rollouts that reach the goal stop there
+        moved[env.goal] = 0.0
+        distribution = moved
+    return total
+
+
+def test_rollout_confidence_interval_covers_the_exact_expected_return():
+    benchmark = SequentialDecisionBenchmark(environment_types=['stochastic'], horizon_lengths=[10],
+                                            complexity_levels=['simple'], tasks_per_setting=3)
+    for task in benchmark.iter_tasks():
+        env = make_environment(task['env_seed'], 'simple', True, 10)
+        assert env.slip == SLIP_PROBABILITY
+        plan = [1, 2] * 5
+        result = benchmark._evaluate_task(PlanAgent(plan), task)
+        low, high = result['return_ci']
+        assert result['rollouts'] == benchmark.config['rollouts']
+        assert low <= exact_return(env, plan, 10) <= high
+        assert high - low < 4
+
+
+def test_deterministic_plans_are_simulated_once():
+    benchmark = SequentialDecisionBenchmark(environment_types=['deterministic'], horizon_lengths=[5],
+                                            complexity_levels=['simple'], tasks_per_setting=1)
+    task = next(benchmark.iter_tasks())
+    result = benchmark._evaluate_task(PlanAgent([]), task)
+    assert result['rollouts'] == 1
+    assert result['return_ci'] == [0.0, 0.0]
+    assert result['score'] == 0.0
+
+
+def adaptive_run(**config):
+    benchmark = SequentialDecisionBenchmark(adaptive=True, tasks_per_setting=2, min_samples=2, **config)
+    results = benchmark.run(PlanAgent([1, 2] * 10))
+    selected = {task['id'] for task in benchmark.iter_tasks()}
+    return results, selected
+
+
+def test_adaptive_runs_stay_within_the_shard():
+    results, selected = adaptive_run(shard=(1, 2))
+    assert {task['task_id'] for task in results['tasks']} <= selected
+    assert results['sampling']['population'] == len(selected) == 12
+    assert results['sampling']['tasks_run'] == len(results['tasks']) <= 12
+
+
+def test_adaptive_runs_stay_within_the_limit():
+    results, selected = adaptive_run(limit=8)
+    assert {task['task_id'] for task in results['tasks']} <= selected
+    assert results['sampling']['tasks_run'] <= results['sampling']['population'] == 8
@@ -0,0 +1,34 @@
+import pytest
+from src.utils.task_stream import parse_shard, select_tasks
+
+
+def test_shard_and_limit_select_from_the_stream():
+    assert list(select_tasks(range(10), shard=(1, 3))) == [1, 4, 7]
+    assert list(select_tasks(range(10), limit=4)) == [0, 1, 2, 3]
+    assert list(select_tasks(range(10), limit=2, shard=(0, 2))) == [0, 2]
+
+
+def test_start_skips_tasks_of_the_selection():
+    assert list(select_tasks(range(10), start=3)) == [3, 4, 5, 6, 7, 8, 9]
+    assert list(select_tasks(range(10), start=3, shard=(0, 2))) == [6, 8]
+    assert list(select_tasks(range(10), start=3, limit=4)) == [3]
+    assert list(select_tasks(range(10), start=1, limit=3, shard=(1, 2))) == [3, 5]
+    assert list(select_tasks(range(10), start=5, limit=3)) == []
+
+
+def test_select_tasks_is_lazy():
+    def endless():
+        n = 0
+        while True:
+            yield n
+            n += 1
+
+    selected = select_tasks(endless(), start=2, shard=(1, 4))
+    assert [next(selected) for _ in range(2)] == [9, 13]
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    for spec in ('4/4', '1', 'a/b', '0/0'):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
@@ -0,0 +1,56 @@
+import json
+from src.utils.telemetry import LATENCY_BUCKETS_MS, InferenceTelemetry, latency_histogram, percentile, summarize
+from src.utils.visualization import BenchmarkVisualizer
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([], 95) == 0.0
+
+
+def test_latency_histogram_has_fixed_buckets():
+    histogram = latency_histogram([0.005, 0.010, 0.011, 0.9, 1000.0])
+    assert histogram['bucket_ms'] == LATENCY_BUCKETS_MS
+    assert len(histogram['counts']) == len(LATENCY_BUCKETS_MS) + 1
+    assert histogram['counts'][0] == 2 and histogram['counts'][1] == 1
+    assert histogram['counts'][LATENCY_BUCKETS_MS.index(1000)] == 1
+    assert histogram['counts'][-1] == 1
+
+
+def test_summary_size_does_not_grow_with_requests():
+    sizes = []
+    for requests in (10, 10000):
+        telemetry = InferenceTelemetry()
+        for i in range(requests):
+            telemetry.record({'eval_count': 10, 'eval_duration': 1e8, 'prompt_eval_count': 5,
+                              'prompt_eval_duration': 1e7}, 0.05 + i % 100 / 1000)
+        summary = summarize(telemetry.drain())
+        assert sum(summary['latency_histogram']['counts']) == requests
+        sizes.append(len(json.dumps(summary)))
+    assert sizes[1] - sizes[0] < 20
+
+
+def test_summary_reports_failures_per_host():
+    telemetry = InferenceTelemetry()
+    telemetry.record({'eval_count': 1, 'eval_duration': 1e6}, 0.1, host='http://a')
+    telemetry.record({'eval_count': 1, 'eval_duration': 1e6}, 0.3, host='http://b')
+    telemetry.record_failure(0.2, host='http://b')
+    summary = summarize(telemetry.drain())
+    assert summary['requests'] == 2 and summary['failed_requests'] == 1
+    assert summary['hosts']['http://b'] == {'requests': 1, 'failures': 1, 'latency_p50': 0.3, 'latency_p95': 0.3}
+
+
+def test_latency_chart_is_drawn_from_histograms(tmp_path):
+    telemetry = InferenceTelemetry()
+    for latency in (0.05, 0.2, 1.5):
+        telemetry.record({'eval_count': 1, 'eval_duration': 1e6}, latency)
+    summary = summarize(telemetry.drain())
+    results = {'model': 'm', 'overall_score': 0.5, 'benchmarks': {
+        'Memory': {'overall_score': 0.5, 'telemetry': summary}}}
+    results_file = tmp_path / 'results.json'
+    results_file.write_text(json.dumps(results))
+    visualizer = BenchmarkVisualizer(results_file=str(results_file), output_dir=str(tmp_path / 'reports'))
+    chart = visualizer.plot_latency_histogram(str(tmp_path / 'latency.png'))
+    assert chart and (tmp_path / 'latency.png').stat().st_size > 0
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import pytest
+from src.utils import visualization
+from src.utils.visualization import BenchmarkVisualizer
+
+RESULTS = {'model': 'm', 'overall_score': 0.6, 'benchmarks': {
+    'Memory': {'overall_score': 0.5, 'task_type_scores': {'recall': 0.5}},
+    'Planning': {'overall_score': 0.7, 'task_type_scores': {'recall': 0.6, 'plan': 0.8}}}}
+
+
+@pytest.fixture
+def drawn(monkeypatch):
+    """Record the charts drawn, in this process, by visualization._draw_chart."""
+    drawn = []
+    draw = visualization._draw_chart
+
+    def record(chart, data, output_file):
+        drawn.append(output_file.rsplit('.', 1)[-1] + ':' + chart)
+        draw(chart, data, output_file)
+
+    monkeypatch.setattr(visualization, '_draw_chart', record)
+    return drawn
+
+
+def test_second_render_is_a_cache_hit(tmp_path, drawn):
+    visualizer = BenchmarkVisualizer(results_data=RESULTS, output_dir=str(tmp_path))
+    charts = {'overall': str(tmp_path / 'overall.png'), 'tasks': str(tmp_path / 'tasks.png')}
+    visualizer.render_charts(charts, max_workers=1)
+    assert sorted(drawn) == ['png:overall', 'png:tasks']
+    assert visualizer.render_charts(charts, max_workers=1) == charts
+    assert len(drawn) == 2
+
+    # Another visualizer over the same data shares the cache directory
+    BenchmarkVisualizer(results_data=dict(RESULTS), output_dir=str(tmp_path)).render_charts(charts, max_workers=1)
+    assert len(drawn) == 2
+
+
+def test_html_report_reuses_charts_rendered_in_the_batch(tmp_path, drawn):
+    visualizer = BenchmarkVisualizer(results_data=RESULTS, output_dir=str(tmp_path))
+    visualizer.render_charts(dict.fromkeys(visualizer.default_charts()), max_workers=1, include_report=True)
+    assert sorted(drawn) == ['png:overall', 'png:tasks', 'svg:overall', 'svg:tasks']
+    report = visualizer.generate_html_report(str(tmp_path / 'report.html'), max_workers=1)
+    assert len(drawn) == 4
+    assert '<svg' in open(report).read()
+
+
+def test_charts_are_drawn_with_the_agg_backend(tmp_path):
+    script = ("import matplotlib, sys; from src.utils.visualization import _draw_chart; "
+              "_draw_chart('overall', {'model': 'm', 'overall_score': 0.5, 'names': ['a'], 'scores': [0.5]}, "
+              "sys.argv[1]); print(matplotlib.get_backend())")
+    env = dict(os.environ, MPLBACKEND='TkAgg')
+    env.pop('DISPLAY', None)
+    output = subprocess.run([sys.executable, '-c', script, str(tmp_path / 'chart.png')], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip().lower() == 'agg'
+    assert (tmp_path / 'chart.png').stat().st_size > 0